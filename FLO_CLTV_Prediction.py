@@ -33,13 +33,20 @@
 ###############################################################
 # GÖREV 1: Veriyi Hazırlama
 ###############################################################
+import os
+import sys
+
 import pandas as pd
 import numpy as np
+# grafik açmadan zamanlanmış çalıştırma için: python flo_cli.py cltv ... (grafikler sadece --diagnostics ile dosyaya)
+# script ekran olmadan (DISPLAY yok ya da FLO_HEADLESS=1) çalışırsa matplotlib CLI'daki gibi "Agg"
+# backend'iyle yükleniyor ve plt.show() çağrıları atlanıyor; pencere açılmıyor, beklenmiyor
+headless = os.environ.get("FLO_HEADLESS") == "1" or (
+    sys.platform.startswith("linux") and not os.environ.get("DISPLAY") and not os.environ.get("WAYLAND_DISPLAY"))
+if headless:
+    import matplotlib
+    matplotlib.use("Agg")
 import matplotlib.pyplot as plt
-import seaborn as sns
-import matplotlib.pyplot as plt
-from lifetimes import BetaGeoFitter
-from lifetimes import GammaGammaFitter
 from lifetimes.plotting import plot_period_transactions
 pd.set_option('display.max_columns', None)
 pd.set_option('display.width', 500)
@@ -47,48 +54,44 @@ pd.set_option('display.float_format', lambda x: '%.4f' % x)
 
 
 # 1. OmniChannel.csv verisini okuyunuz.Dataframe’in kopyasını oluşturunuz.
-df_ = pd.read_csv('FLOCLTVPrediction/flo_data_20k.csv')
+# tipli şema ile okuma (bkz. flo_loader.py)
+# aykırı değerleri baskılanmış ve total sütunları eklenmiş tablo Parquet önbelleğinden okunuyor,
+# CSV sadece değiştiğinde yeniden ayrıştırılıyor (bkz. flo_cache.py)
+from flo_cache import load_prepared
+
+df_ = load_prepared('FLOCLTVPrediction/flo_data_20k.csv', cap_outliers=True)
 df = df_.copy()
 
 # 2. Aykırı değerleri baskılamak için gerekli olan outlier_thresholds ve replace_with_thresholds fonksiyonlarını tanımlayınız.
 # Not: cltv hesaplanırken frequency değerleri integer olması gerekmektedir.Bu nedenle alt ve üst limitlerini round() ile yuvarlayınız.
 
-def outlier_thresholds(dataframe, variable):
-    quartile1 = dataframe[variable].quantile(0.01)
-    quartile3 = dataframe[variable].quantile(0.99)
-    interquantile_range = quartile3 - quartile1
-    up_limit = quartile3 + 1.5 * interquantile_range
-    low_limit = quartile1 - 1.5 * interquantile_range
-    return low_limit, up_limit
-
-
-def replace_with_thresholds(dataframe, variable):
-    low_limit, up_limit = outlier_thresholds(dataframe, variable)
-    dataframe.loc[(dataframe[variable] < low_limit), variable] = round(low_limit)
-    dataframe.loc[(dataframe[variable] > up_limit), variable] = round(up_limit)
+# fonksiyonlar (outlier_thresholds, replace_with_thresholds) outliers.py içinde; load_prepared
+# önbelleği oluştururken onları kullanıyor, burada ayrıca çağrılmıyor
 
 # 3. "order_num_total_ever_online","order_num_total_ever_offline","customer_value_total_ever_offline","customer_value_total_ever_online" değişkenlerinin
 #aykırı değerleri varsa baskılayanız.
 plt.boxplot(df["order_num_total_ever_online"])
-plt.show()
+if not headless:
+    plt.show()
 
-num_col= [col for col in df.columns if df[col].dtypes != "O"]
+num_col= df.select_dtypes("number").columns  # tarih ve kategorik sütunlar artık "O" değil
 for col in num_col:
     plt.boxplot(df[col])
     plt.title(col)
-    plt.show()
+    if not headless:
+        plt.show()
 ##########
 
 df.describe().T
 
-for col in df.columns[df.columns.str.contains('total')]:
-    replace_with_thresholds(df,col)
-
-
-replace_with_thresholds(df,"order_num_total_ever_online")
-replace_with_thresholds(df,"order_num_total_ever_offline")
-replace_with_thresholds(df,"customer_value_total_ever_offline")
-replace_with_thresholds(df,"customer_value_total_ever_online")
+# load_prepared(..., cap_outliers=True) bu dört sütunu zaten baskılanmış olarak döndürüyor
+# for col in df.columns[df.columns.str.contains('total')]:
+#     replace_with_thresholds(df,col)
+#
+# replace_with_thresholds(df,"order_num_total_ever_online")
+# replace_with_thresholds(df,"order_num_total_ever_offline")
+# replace_with_thresholds(df,"customer_value_total_ever_offline")
+# replace_with_thresholds(df,"customer_value_total_ever_online")
 
 # 4. Omnichannel müşterilerin hem online'dan hemde offline platformlardan alışveriş yaptığını ifade etmektedir.
 # Herbir müşterinin toplam alışveriş sayısı ve harcaması için yeni değişkenler oluşturun.
@@ -97,9 +100,10 @@ df["total_price"] = df["customer_value_total_ever_offline"] + df["customer_value
 
 # 5. Değişken tiplerini inceleyiniz. Tarih ifade eden değişkenlerin tipini date'e çeviriniz.
 df.info()
-selected_col=["first_order_date", "last_order_date", "last_order_date_online", "last_order_date_offline"]
-for col in selected_col:
-    df[col]= pd.to_datetime(df[col])
+# load_flo_data tarih sütunlarını okuma sırasında çeviriyor
+# selected_col=["first_order_date", "last_order_date", "last_order_date_online", "last_order_date_offline"]
+# for col in selected_col:
+#     df[col]= pd.to_datetime(df[col])
 
 
 ###############################################################
@@ -119,26 +123,19 @@ today_date=dt.datetime(2021,6,1)
 # fquency: tekrar eden toplam satın alma sayısı (frequency>1)
 # monetary: satın alma başına ortalama kazanç # burda ortalama diyor  toplan kazanç bölü frequency yapıcaz
 
-df["recency_cltv_weekly"]=(df["last_order_date"]- df["first_order_date"]).dt.days
+# cltv_df=df.groupby("master_id").agg({"recency_cltv_weekly": lambda x: x,
+#                             "first_order_date": lambda x: (today_date- x.min()).days,
+#                              "total_number_of_purchases": lambda y: y.astype(int),
+#                              "total_price": lambda z: z})
+# lambda'lı groupby yerine vektörel hesaplama (bkz. rfm_metrics.py).
+# compute_cltv_df: monetary'yi frequency'e böler, frequency > 1 filtresini uygular,
+# recency ve T değerlerini haftalığa (/ 7) çevirir.
+from rfm_metrics import compute_cltv_df
 
-cltv_df=df.groupby("master_id").agg({"recency_cltv_weekly": lambda x: x,
-                            "first_order_date": lambda x: (today_date- x.min()).days,
-                             "total_number_of_purchases": lambda y: y.astype(int),
-                             "total_price": lambda z: z})
+cltv_df = compute_cltv_df(df, today_date)
 
 cltv_df.head()
 
-cltv_df.columns=["recency_cltv_weekly","T_weekly","frequency","monetary_cltv_avg"]
-
-# satın alma başına ortalama dediği için monetary i frequency e bölecegiz
-cltv_df["monetary_cltv_avg"] = cltv_df["monetary_cltv_avg"] / cltv_df["frequency"]
-
-cltv_df = cltv_df[(cltv_df['frequency'] > 1)]  # neden 1
-
-cltv_df["recency_cltv_weekly"] = cltv_df["recency_cltv_weekly"] / 7  # # recency değeri haftalık oldugu için biz burda geçen gün sayısını bulduk 7 ye bölmemiz lazım ,haftalık cinsten kaç haftadır kendi içinde alışveriş yapmadıkalrı
-
-cltv_df["T_weekly"] = cltv_df["T_weekly"] / 7
-
 cltv_df.describe().T
 
 ###############################################################
@@ -147,75 +144,65 @@ cltv_df.describe().T
 # expected frequency
 # 1. BG/NBD modelini kurunuz.
 
-bgf = BetaGeoFitter(penalizer_coef=0.001)
-
-bgf.fit(cltv_df['frequency'],
-        cltv_df['recency_cltv_weekly'],
-        cltv_df['T_weekly'])
+# bgf = BetaGeoFitter(penalizer_coef=0.001)
+# bgf.fit(cltv_df['frequency'], cltv_df['recency_cltv_weekly'], cltv_df['T_weekly'])
+# parametreler output/cltv_model_params.json'a kaydediliyor (flo_cli.py cltv'nin varsayılanı):
+# veri değişmediyse fit atlanıyor, değiştiyse bir önceki parametrelerden başlanıyor (bkz. cltv_model.py)
+from cltv_model import CLTVModelStore
 
+os.makedirs("output", exist_ok=True)
+model_store = CLTVModelStore(os.path.join("output", "cltv_model_params.json"))
 
-# 3 ay içerisinde müşterilerden beklenen satın almaları tahmin ediniz ve exp_sales_3_month olarak cltv dataframe'ine ekleyiniz.
+bgf = model_store.fit_bgf(cltv_df['frequency'],
+                          cltv_df['recency_cltv_weekly'],
+                          cltv_df['T_weekly'],
+                          penalizer_coef=0.001)
 
 
-cltv_df["exp_sales_3_month"] = bgf.predict(4*3 ,
-                                              cltv_df['frequency'],
-                                              cltv_df['recency_cltv_weekly'],
-                                              cltv_df['T_weekly'])
+# 2.  Gamma-Gamma modelini fit ediniz. Müşterilerin ortalama bırakacakları değeri tahminleyip exp_average_value olarak cltv dataframe'ine ekleyiniz.
 
-# 6 ay içerisinde müşterilerden beklenen satın almaları tahmin ediniz ve exp_sales_6_month olarak cltv dataframe'ine ekleyiniz.
-cltv_df["aaa"] = bgf.predict(36*4 ,  # her bir müş için gerçekleştiğini nerden anlıyor
-                                              cltv_df['frequency'],
-                                              cltv_df['recency_cltv_weekly'],
-                                              cltv_df['T_weekly'])
+# ggf = GammaGammaFitter(penalizer_coef=0.01)
+# ggf.fit(cltv_df['frequency'], cltv_df['monetary_cltv_avg'])
+ggf = model_store.fit_ggf(cltv_df['frequency'], cltv_df['monetary_cltv_avg'], penalizer_coef=0.01)
+
+# 3 ay / 6 ay içerisinde beklenen satın almalar (exp_sales_3_month, exp_sales_6_month; ayrıca exp_sales_12_month),
+# exp_average_value ve CLTV tek seferde, parti parti hesaplanıyor (bkz. cltv_scoring.py).
+# cltv_df["exp_sales_3_month"] = bgf.predict(4*3, ...)
+# cltv_df["aaa"] = bgf.predict(36*4, ...)  -> 6 ay = 6*4 hafta olmalıydı, exp_sales_6_month olarak düzeltildi
+# cltv_df["exp_average_value"] = ggf.conditional_expected_average_profit(...)
+# cltv = ggf.customer_lifetime_value(bgf, ..., time=6*4, freq="W", discount_rate=0.01)
+# cltv_final = cltv_df.merge(cltv.reset_index(), on="master_id", how="left")
+# Not: lifetimes'ta time parametresi ay cinsinden, yani time=6*4 aslında 24 aylık CLTV; aynı değer korunuyor.
+from cltv_scoring import score_customers
+
+cltv_final = score_customers(cltv_df, bgf, ggf,
+                             clv_time=6*4,
+                             freq="W",  # T'nin frekans bilgisi.
+                             discount_rate=0.01)
 
 # 3. ve 6.aydaki en çok satın alım gerçekleştirecek 10 kişiyi inceleyeniz.
+# tüm tabloyu sıralamak yerine sadece ilk n satır seçiliyor (sort_values(...).head(n) yerine nlargest)
 
-cltv_df.sort_values("exp_sales_3_month", ascending=False).head(10)
+cltv_final.nlargest(10, "exp_sales_3_month")
 
-cltv_df.sort_values("exp_sales_6_month", ascending=False).head(10)
+cltv_final.nlargest(10, "exp_sales_6_month")
 
-cltv_df.sort_values("aaa", ascending=False).head(10)
 ################################################################
 # Tahmin Sonuçlarının Değerlendirilmesi
 ################################################################
 
 plot_period_transactions(bgf)
-plt.show(block=True)
-# 2.  Gamma-Gamma modelini fit ediniz. Müşterilerin ortalama bırakacakları değeri tahminleyip exp_average_value olarak cltv dataframe'ine ekleyiniz.
-
-ggf = GammaGammaFitter(penalizer_coef=0.01)
-
-ggf.fit(cltv_df['frequency'], cltv_df['monetary_cltv_avg'])
-
-# müşterilerin ortlama bırakacakları değer
-cltv_df["exp_average_value"] = ggf.conditional_expected_average_profit(cltv_df['frequency'],
-                                                                             cltv_df['monetary_cltv_avg'])
-cltv_df.sort_values("exp_average_value", ascending=False).head(10)
-# 3. 6 aylık CLTV hesaplayınız ve cltv ismiyle dataframe'e ekleyiniz.
-cltv = ggf.customer_lifetime_value(bgf,
-                                   cltv_df['frequency'],
-                                   cltv_df['recency_cltv_weekly'],
-                                   cltv_df['T_weekly'],
-                                   cltv_df['monetary_cltv_avg'],
-                                   time=6*4,  # 6 aylık
-                                   freq="W",  # T'nin frekans bilgisi.
-                                   discount_rate=0.01)
-
-# her bir gözlem birimi için customer_life time hesaplanacaktır
-cltv.head()
-
-cltv = cltv.reset_index()
-
-#? birisi index de birisi sütunda buna ragmen brileştirme nasıl oluyor
+if not headless:
+    plt.show(block=True)
 
-cltv_final = cltv_df.merge(cltv, on="master_id", how="left")
+cltv_final.nlargest(10, "exp_average_value")
 
 cltv_final.head()
 
 # CLTV değeri en yüksek 20 kişiyi gözlemleyiniz.
 
 
-cltv_final.sort_values(by="clv", ascending=False).head(20)
+cltv_final.nlargest(20, "clv")
 
 ###############################################################
 # GÖREV 4: CLTV'ye Göre Segmentlerin Oluşturulması
@@ -225,10 +212,10 @@ cltv_final.sort_values(by="clv", ascending=False).head(20)
 # cltv_segment ismi ile atayınız.
 cltv_final["cltv_segment"] = pd.qcut(cltv_final["clv"], 4, labels=["D", "C", "B", "A"])
 
-cltv_final.sort_values(by="clv", ascending=False).head(50)
+cltv_final.nlargest(50, "clv")
 
 # 2. Segmentlerin recency, frequnecy ve monetary ortalamalarını inceleyiniz.
-cltv_final.groupby("cltv_segment").agg({"recency_cltv_weekly":"mean",
+cltv_final.groupby("cltv_segment", observed=True).agg({"recency_cltv_weekly":"mean",
                                    "frequency":"mean",
                                    "monetary_cltv_avg" :"mean"})
 
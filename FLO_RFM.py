@@ -31,17 +31,21 @@
 ###############################################################
 # GÖREV 1: Veriyi  Hazırlama ve Anlama (Data Understanding)
 ###############################################################
+import os
+
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
+# matplotlib / seaborn bu script'te kullanılmıyor; zamanlanmış çalıştırma için: python flo_cli.py rfm ...
 
-pd.set_option('display.max_columns', None)
 pd.set_option('display.max_columns', None)
 pd.set_option('display.width', 500)
 pd.set_option('display.float_format', lambda x: '%.4f' % x)
 
-df_ = pd.read_csv('Flo_rfm_case/flo_data_20k.csv')
+# tipli şema ile okuma: tarihler okunurken çevriliyor, kanallar kategorik, sayılar float32 (bkz. flo_loader.py)
+# hazırlanmış tablo Parquet önbelleğinden okunuyor, CSV sadece değiştiğinde yeniden ayrıştırılıyor (bkz. flo_cache.py)
+from flo_cache import load_prepared
+
+df_ = load_prepared('Flo_rfm_case/flo_data_20k.csv')
 df = df_.copy()
 
 # 2. data set
@@ -57,6 +61,14 @@ df.describe().T
 df.isnull().sum()
 # f. Değişken tipleri, incelemesi yapın
 df.info()
+# isteğe bağlı kompakt düzen (FLO_COMPACT_LAYOUT=1 ile): master_id int32 kod + eşleme tablosu,
+# kanallar kategorik, tarihler gün sayısı, sayılar int16/float32, kategori listesi bit maskesi
+# (bkz. compact_layout.py; CLI'da --diagnostics ile <name>_memory.csv olarak yazılıyor)
+if os.environ.get("FLO_COMPACT_LAYOUT") == "1":
+    from compact_layout import CompactTable
+
+    compact = CompactTable.from_frame(df)
+    print(compact.memory_report())
 # 3. Omnichannel müşterilerin hem online'dan hemde offline platformlardan alışveriş yaptığını ifade etmektedir.
 # Herbir müşterinin toplam alışveriş sayısı ve harcaması için yeni değişkenler oluşturunuz.
 
@@ -66,32 +78,36 @@ df.head()
 # 4. Değişken tiplerini inceleyiniz. Tarih ifade eden değişkenlerin tipini date'e çeviriniz.
 df.info()
 # df[selected_col].astype(datetime64[ns])
-selected_col = ["first_order_date", "last_order_date", "last_order_date_online", "last_order_date_offline"]
-for col in selected_col:
-    df[col] = pd.to_datetime(df[col])
+# load_flo_data tarih sütunlarını okuma sırasında datetime64 olarak çeviriyor, tekrar çevirmeye gerek yok
+# selected_col = ["first_order_date", "last_order_date", "last_order_date_online", "last_order_date_offline"]
+# for col in selected_col:
+#     df[col] = pd.to_datetime(df[col])
 
 ## Farklı çözüm
-for i in df.columns:
-    if "date" in i:
-        df[i] = pd.to_datetime(df[i])
+# for i in df.columns:
+#     if "date" in i:
+#         df[i] = pd.to_datetime(df[i])
 
 # df["last_order_date"] = df["last_order_date"].apply(pd.to_datetime)
 
 # 5. Alışveriş kanallarındaki müşteri sayısının, toplam alınan ürün sayısı ve toplam harcamaların dağılımına bakınız.
 
-df_2 = df.groupby("order_channel").agg({"master_id": "count",
-                                        "total_number_of_purchases": "sum",
-                                        "total_price": "sum"})
+# order_channel kategorik: observed=True ile sadece veride geçen kanallar (pandas'ın
+# observed=False varsayılanı için FutureWarning da çıkmaz)
+df_2 = df.groupby("order_channel", observed=True).agg({"master_id": "count",
+                                                       "total_number_of_purchases": "sum",
+                                                       "total_price": "sum"})
 
 df_2
 
 # 6. En fazla kazancı getiren ilk 10 müşteriyi sıralayınız.
+# tüm tabloyu sıralamak yerine sadece ilk n satır seçiliyor (sort_values(...).head(n) yerine nlargest)
 
-df.sort_values(by="total_price", ascending=False).head(10)
+df.nlargest(10, "total_price")
 
 # 7. En fazla siparişi veren ilk 10 müşteriyi sıralayınız.
 
-df.sort_values(by="total_number_of_purchases", ascending=False).head(10)
+df.nlargest(10, "total_number_of_purchases")
 
 
 # 8. Veri ön hazırlık sürecini fonksiyonlaştırınız.
@@ -113,7 +129,8 @@ def preparation(dataframe):
 
     selected_col = ["first_order_date", "last_order_date", "last_order_date_online", "last_order_date_offline"]
     for col in selected_col:
-        df[col] = pd.to_datetime(df[col])
+        # load_flo_data ile okunduysa zaten datetime64, format verildiği için tahmin yapılmıyor
+        dataframe[col] = pd.to_datetime(dataframe[col], format="%Y-%m-%d")
 
     # dataframe["last_order_date"] = dataframe["last_order_date"].apply(pd.to_datetime)
     # dataframe["first_order_date"] = dataframe["first_order_date"].apply(pd.to_datetime)
@@ -145,13 +162,18 @@ today_date = dt.datetime(2021, 6, 1)  # tarih giriyorum bunu zaman değişkeni c
 # Adım 2: Müşteri özelinde Recency, Frequency ve Monetary metriklerini hesaplayınız.
 # Adım 3: Hesapladığınız metrikleri rfm isimli bir değişkene atayınız.
 
-rfm = df.groupby("master_id").agg({'last_order_date': lambda x: (today_date - x.max()).days,
-                                   "total_number_of_purchases": lambda y: y,
-                                   "total_price": lambda z: z})
+# rfm = df.groupby("master_id").agg({'last_order_date': lambda x: (today_date - x.max()).days,
+#                                    "total_number_of_purchases": lambda y: y,
+#                                    "total_price": lambda z: z})
+# lambda'lar her müşteri için ayrı ayrı çalıştığı için büyük veride çok yavaş,
+# compute_rfm aynı tabloyu vektörel işlemlerle üretiyor (bkz. rfm_metrics.py)
+from rfm_metrics import compute_rfm
+
+rfm = compute_rfm(df, today_date)
 rfm.shape
 rfm.head()
 # Adım 4: Oluşturduğunuz metriklerin isimlerini recency, frequency ve monetary olarak değiştiriniz
-rfm.columns = ["recency", "frequency", "monetary"]
+# compute_rfm sütunları zaten recency, frequency ve monetary olarak döndürüyor
 
 # customer_id, recency, frequnecy ve monetary değerlerinin yer aldığı yeni bir rfm dataframe
 
@@ -168,7 +190,8 @@ rfm["monetary_score"] = pd.qcut(rfm["monetary"], 5, labels=[1, 2, 3, 4, 5])
 
 rfm.head()
 # recency_score ve frequency_score’u tek bir değişken olarak ifade edilmesi ve RF_SCORE olarak kaydedilmesi
-rfm["RF_SCORE"] = rfm["recency_score"].astype(str) + rfm["frequency_score"].astype(str)
+# rfm["RF_SCORE"] = rfm["recency_score"].astype(str) + rfm["frequency_score"].astype(str)
+# segment ataması artık RF_SCORE string'ine ihtiyaç duymuyor (bkz. GÖREV 4)
 rfm.tail()
 ###############################################################
 # GÖREV 4: RF Skorlarının Segment Olarak Tanımlanması
@@ -187,7 +210,13 @@ seg_map = {
     r'[4-5][2-3]': 'potential_loyalists',
     r'5[4-5]': 'champions'}
 
-rfm['segment'] = rfm["RF_SCORE"].replace(seg_map, regex=True)
+# rfm['segment'] = rfm["RF_SCORE"].replace(seg_map, regex=True)
+# seg_map bir kere 5x5 tabloya derlenir (eksik/çakışan hücre varsa hata verir),
+# segmentler recency_score ve frequency_score ile doğrudan indekslenerek kategorik olarak atanır
+from rfm_segments import compile_seg_map, assign_segments
+
+seg_table = compile_seg_map(seg_map)
+rfm['segment'] = assign_segments(rfm["recency_score"], rfm["frequency_score"], seg_table)
 
 rfm.head()
 ###############################################################
@@ -195,9 +224,9 @@ rfm.head()
 ###############################################################
 
 # 1. Segmentlerin recency, frequnecy ve monetary ortalamalarını inceleyiniz.
-rfm.groupby("segment").agg({"recency": "mean",
-                            "frequency": "mean",
-                            "monetary": "mean"})
+rfm.groupby("segment", observed=True).agg({"recency": "mean",
+                                           "frequency": "mean",
+                                           "monetary": "mean"})
 
 # 2. RFM analizi yardımı ile 2 case için ilgili profildeki müşterileri bulunuz ve müşteri id'lerini csv ye kaydediniz.
 
@@ -206,42 +235,50 @@ rfm.groupby("segment").agg({"recency": "mean",
 # kadın kategorisinden alışveriş yapan kişiler olması planlandı. Müşterilerin id numaralarını csv dosyasına yeni_marka_hedef_müşteri_id.cvs
 # olarak kaydediniz.
 
-new_df = df[df["interested_in_categories_12"].apply(lambda x: "KADIN" in x)]
-new_df.head()
-bayan_ındex = new_df["master_id"]
+# new_df = df[df["interested_in_categories_12"].apply(lambda x: "KADIN" in x)]
+# bayan_ındex = new_df["master_id"]
+# her sorguda string taraması yerine kategori alanı rfm satır sırasında bir kere ayrıştırılıyor
+# (bkz. category_index.py), sorgular bit maskesi / sıralı satır dizisi kesişimi ile yapılıyor
+# ortak_id_diger: champions / loyal_customers ile KADIN listesinin kesişimi; aşağıdaki
+# "yeni_marka_hedef_müşteri_id" listesi olarak audience_export ile çözülüyor
+from category_index import CategoryIndex
 
 rfm.reset_index(inplace=True)
-rfm_cust = rfm.loc[(rfm["segment"] == "champions") | (rfm["segment"] == "loyal_customers"), "master_id"]
-ortak_id_diger = rfm_cust[rfm_cust.isin(bayan_ındex)].tolist()
+cat_index = CategoryIndex.from_series(
+    df.set_index("master_id").loc[rfm["master_id"], "interested_in_categories_12"])
 
 
-new_2 = pd.DataFrame()
-new_2["customer_id"] = ortak_id_diger
-new_2.to_csv("yeni_marka_hedef_müşteri_id.cvs", index=False)
+# new_2 = pd.DataFrame()
+# new_2["customer_id"] = ortak_id_diger
+# new_2.to_csv("yeni_marka_hedef_müşteri_id.cvs", index=False)
+# listeler en sonda audience_export ile hep birlikte yazılıyor (bkz. "Hedef listelerin yazılması")
 
 ## Farklı bir çözüm
-_segment = rfm[(rfm["segment"] == "champions") | (rfm["segment"] == "loyal_customers")]
-_sex = df[(df["interested_in_categories_12"]).str.contains("KADIN")]
-_case_A = pd.merge(_segment, _sex[["interested_in_categories_12", "master_id"]], on=["master_id"])
-_case_A[["master_id"]].to_csv("case_A.csv", index=False)
+# _segment = rfm[(rfm["segment"] == "champions") | (rfm["segment"] == "loyal_customers")]
+# _sex = df[(df["interested_in_categories_12"]).str.contains("KADIN")]
+# _case_A = pd.merge(_segment, _sex[["interested_in_categories_12", "master_id"]], on=["master_id"])
+# _case_A[["master_id"]].to_csv("case_A.csv", index=False)
+# sonucu yazılmayan bir str.contains taraması ve merge; liste audiences'taki "case_A"
 
 # b. Erkek ve Çoçuk ürünlerinde %40'a yakın indirim planlanmaktadır. Bu indirimle ilgili kategorilerle ilgilenen geçmişte iyi müşterilerden olan ama uzun süredir
 # alışveriş yapmayan ve yeni gelen müşteriler özel olarak hedef alınmak isteniliyor. Uygun profildeki müşterilerin id'lerini csv dosyasına indirim_hedef_müşteri_ids.csv
 # olarak kaydediniz.
 
 
-new_df_2 = df[df["interested_in_categories_12"].apply(lambda x: (("ERKEK") or ("COCUK")) in x)]
-sleected_category = new_df_2["master_id"]
+# new_df_2 = df[df["interested_in_categories_12"].apply(lambda x: (("ERKEK") or ("COCUK")) in x)]
+# (("ERKEK") or ("COCUK")) ifadesi "ERKEK" olarak değerlendiriliyor, yani sadece ERKEK kontrol ediliyordu
+# doğrusu cat_index.rows(any_of=("ERKEK", "COCUK")); liste audiences'taki "indirim_hedef_müşteri_ids"
 
 
-rfm_selected = df.loc[(rfm["segment"] == "cant_loose") | (rfm["segment"] == "new_customers"), "master_id"]
+# rfm_selected = df.loc[(rfm["segment"] == "cant_loose") | (rfm["segment"] == "new_customers"), "master_id"]
+# rfm maskesi df'in satırlarına uygulanıyordu; rfm master_id'ye göre sıralı olduğu için
+# seçilen satırlar başka müşterilere denk geliyordu. Maske rfm'in kendi master_id'sine uygulanmalı
+# (audience_export segmentleri rfm satır sırasında çözüyor).
 
-common_id = rfm_selected[rfm_selected.isin(sleected_category).to_list()]
-
-new_3 = pd.DataFrame()
-new_3["customer_id"] = common_id
-
-new_3.to_csv("indirim_hedef_müşteri_ids.csv")
+# common_id = rfm_selected[rfm_selected.isin(sleected_category).to_list()]
+# new_3 = pd.DataFrame()
+# new_3["customer_id"] = common_id
+# new_3.to_csv("indirim_hedef_müşteri_ids.csv")
 
 # isin [""]
 # isin()
@@ -252,9 +289,29 @@ x.head()
 # rfm[rfm[‘master_id'].isin(rfm[rfm['segment'].isin(['cant_loose', 'about_to_sleep', 'new_customers'])]['customer_id'])]
 
 ### Farklı çözüm
-segment = rfm[(rfm["segment"] == "hibernating") | (rfm["segment"] == "new_custcant_loosemers") | (
-            rfm["segment"] == "new_custmers")]
-sex = df[((df["interested_in_categories_12"]).str.contains("ERKEK")) & (
-    (df["interested_in_categories_12"]).str.contains("COCUK"))]
-case_B = pd.merge(segment, sex[["interested_in_categories_12", "master_id"]], on=["master_id"])
-case_B[["master_id"]].to_csv("case_B.csv", index=False)
+# segment = rfm[(rfm["segment"] == "hibernating") | (rfm["segment"] == "new_custcant_loosemers") | (
+#             rfm["segment"] == "new_custmers")]
+# sex = df[((df["interested_in_categories_12"]).str.contains("ERKEK")) & (
+#     (df["interested_in_categories_12"]).str.contains("COCUK"))]
+# case_B = pd.merge(segment, sex[["interested_in_categories_12", "master_id"]], on=["master_id"])
+# case_B[["master_id"]].to_csv("case_B.csv", index=False)
+# segment isimlerindeki yazım hataları ("new_custcant_loosemers", "new_custmers") hiçbir segmentle
+# eşleşmediği için bu çözüm sadece hibernating segmentini seçiyordu; düzeltilmiş hali
+# audiences'taki "case_B"
+
+###############################################################
+# Hedef listelerin yazılması
+###############################################################
+# Tüm listeler segment x kategori filtresi olarak tanımlanır, satır numarası kesişimleriyle
+# çözülür ve paralel yazılır. campaign_lists/manifest.json her liste için satır sayısı ve
+# sha256 özetini içerir (bkz. audience_export.py). fmt="csv", "csv.gz" ya da "parquet".
+from audience_export import export_audiences
+
+audiences = {
+    "yeni_marka_hedef_müşteri_id": {"segments": ["champions", "loyal_customers"], "all_of": ["KADIN"]},
+    "indirim_hedef_müşteri_ids": {"segments": ["cant_loose", "new_customers"], "any_of": ["ERKEK", "COCUK"]},
+    "case_A": {"segments": ["champions", "loyal_customers"], "all_of": ["KADIN"]},
+    "case_B": {"segments": ["hibernating", "cant_loose", "new_customers"], "all_of": ["ERKEK", "COCUK"]}}
+
+manifest = export_audiences(rfm["master_id"], rfm["segment"], cat_index, audiences, "campaign_lists", fmt="csv")
+pd.DataFrame(manifest["audiences"])[["name", "rows", "sha256"]]
@@ -0,0 +1,145 @@
+###############################################################
+# Kampanya Hedef Listelerinin (audience) Toplu ve Paralel Yazılması
+###############################################################
+# FLO_RFM.py'deki hedef listeler her vaka için ayrı ayrı Python listesinden DataFrame
+# kurup isin ile filtreleyip tek tek to_csv ile yazılıyordu. Burada:
+#   - her liste bir "segment x kategori" filtresi olarak tanımlanır:
+#       {"segments": [...], "all_of": [...], "any_of": [...], "none_of": [...]}
+#   - filtreler sıralı satır numarası dizileriyle çözülür: segment başına satır dizileri
+#     (tek bir argsort ile) ve kategori sorguları (CategoryIndex) bir kere hesaplanıp
+#     listeler arasında paylaşılır, sonra dizi kesişimi / birleşimi yapılır
+#   - tüm listeler thread pool ile paralel yazılır; CSV metni DataFrame.to_csv yerine
+#     pyarrow.csv.write_csv ile üretilir (to_csv GIL'i tuttuğu için thread'ler sırayla
+#     çalışıyordu), gzip sıkıştırma ve Parquet yazımı da GIL'i bırakır; bu yüzden process
+#     pool'a ve id dizilerini kopyalamaya gerek yok. pyarrow yoksa ya da bir id CSV'de
+#     tırnak gerektiriyorsa (virgül, tırnak, satır sonu) to_csv'ye dönülür.
+#   - biçimler: "csv", "csv.gz", "parquet"
+#   - manifest.json: her liste için filtre, dosya, satır sayısı, boyut ve sha256
+# csv.gz dosyaları gzip başlığına zaman yazılmadan üretilir; aynı liste her gün aynı
+# özeti verir, CRM tarafı değişmeyen listeleri atlayabilir.
+#
+# Kullanım:
+#   audiences = {"yeni_marka": {"segments": ["champions", "loyal_customers"], "all_of": ["KADIN"]}}
+#   manifest = export_audiences(rfm["master_id"], rfm["segment"], cat_index, audiences, "out/")
+
+import gzip
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
+
+from category_index import intersect_rows
+
+formats = {"csv": ".csv", "csv.gz": ".csv.gz", "parquet": ".parquet"}
+
+
+def _segment_postings(segments):
+    # segment adı -> sıralı satır dizisi (tüm segmentler tek bir stabil argsort ile)
+    segments = pd.Series(segments).astype("category")
+    codes = segments.cat.codes.to_numpy()
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(segments.cat.categories) + 1))
+    return {name: order[bounds[i]:bounds[i + 1]] for i, name in enumerate(segments.cat.categories)}
+
+
+def resolve_audiences(segments, cat_index, audiences):
+    # Çıktı: {liste adı: sıralı satır numaraları}
+    # segments ve cat_index aynı satır sırasında olmalı (ör. ikisi de rfm sırasında)
+    segment_rows = _segment_postings(segments)
+    category_rows = {}
+    resolved = {}
+    for name, spec in audiences.items():
+        parts = []
+        if spec.get("segments"):
+            parts.append(np.sort(np.concatenate([segment_rows.get(segment, np.empty(0, dtype=np.intp))
+                                                 for segment in spec["segments"]])))
+        key = tuple(tuple(spec.get(field, ())) for field in ("all_of", "any_of", "none_of"))
+        if any(key):
+            if key not in category_rows:
+                category_rows[key] = cat_index.rows(*key)
+            parts.append(category_rows[key])
+        resolved[name] = intersect_rows(*parts) if parts else np.arange(len(segments))
+    return resolved
+
+
+def _sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _csv_bytes(ids, column):
+    # to_csv(index=False) ile aynı metin
+    if pa is not None:
+        sink = pa.BufferOutputStream()
+        sink.write(f"{column}\n".encode("utf-8"))
+        try:
+            pa_csv.write_csv(pa.table({column: pa.array(ids, type=pa.string())}), sink,
+                             pa_csv.WriteOptions(include_header=False, quoting_style="none"))
+            return sink.getvalue()
+        except pa.ArrowInvalid:
+            pass
+    return pd.DataFrame({column: ids}).to_csv(index=False).encode("utf-8")
+
+
+def write_ids(ids, path, fmt="csv.gz", column="master_id"):
+    if fmt == "parquet":
+        pd.DataFrame({column: ids}).to_parquet(path, index=False)
+    elif fmt == "csv.gz":
+        with open(path, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as f:
+            f.write(_csv_bytes(ids, column))
+    elif fmt == "csv":
+        with open(path, "wb") as f:
+            f.write(_csv_bytes(ids, column))
+    else:
+        raise ValueError(f"bilinmeyen biçim: {fmt} (desteklenenler: {list(formats)})")
+    return path
+
+
+def _export_one(args):
+    name, ids, spec, out_dir, fmt, column = args
+    path = write_ids(ids, os.path.join(out_dir, name + formats[fmt]), fmt, column)
+    return {"name": name,
+            "filter": spec,
+            "path": os.path.basename(path),
+            "format": fmt,
+            "rows": len(ids),
+            "bytes": os.path.getsize(path),
+            "sha256": _sha256(path)}
+
+
+def export_audiences(ids, segments, cat_index, audiences, out_dir, fmt="csv.gz", n_jobs=4,
+                     column="master_id"):
+    # ids: satır sırasıyla müşteri id'leri (ör. rfm["master_id"])
+    # Çıktı: manifest sözlüğü (out_dir/manifest.json olarak da yazılır)
+    if fmt not in formats:
+        raise ValueError(f"bilinmeyen biçim: {fmt} (desteklenenler: {list(formats)})")
+    os.makedirs(out_dir, exist_ok=True)
+    ids = np.asarray(ids, dtype=object)
+    resolved = resolve_audiences(segments, cat_index, audiences)
+    jobs = [(name, ids[rows], audiences[name], out_dir, fmt, column) for name, rows in resolved.items()]
+    with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+        entries = list(executor.map(_export_one, jobs))
+
+    manifest = {"created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "format": fmt,
+                "column": column,
+                "audiences": entries}
+    manifest_path = os.path.join(out_dir, "manifest.json")
+    tmp = manifest_path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, manifest_path)
+    return manifest
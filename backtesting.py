@@ -0,0 +1,184 @@
+###############################################################
+# BG/NBD + Gamma-Gamma için Geriye Dönük Test (rolling-origin backtest)
+###############################################################
+# FLO_CLTV_Prediction.py'de modelin tek kontrolü plot_period_transactions(bgf); 3 ve 6
+# aylık tahminler hiç gerçekleşen değerlerle karşılaştırılmıyor. Müşteri dosyası sadece
+# toplamları tuttuğu için test sipariş bazında bir geçmiş üzerinden yapılır (incremental.py
+# delta tablosuyla aynı biçim: master_id, order_date, order_channel, order_value,
+# isteğe bağlı order_num).
+# Her kesim tarihi (cutoff) için:
+#   - kalibrasyon: cutoff'tan önceki siparişler müşteri bazında toplanır ve script ile aynı
+#     adımlardan (prepare_flo_data, compute_cltv_df; analysis_date = cutoff) geçirilir
+#   - holdout: cutoff'tan sonraki 4 * ay haftalık pencerelerdeki gerçekleşen sipariş
+#     sayıları ve tutarları
+#   - kalibrasyon + holdout tablosu veri özeti ve cutoff ile anahtarlanıp Parquet olarak
+#     önbelleğe alınır; farklı penalizer'larla yeniden çalıştırmada sadece fit'ler tekrarlanır
+#   - BG/NBD ve Gamma-Gamma her cutoff (ve penalizer listeleri verildiyse her penalizer
+#     çifti) için ayrı bir işçi süreçte fit edilir
+# Metrikler (cutoff başına):
+#   mae_purchases_<m>m       |exp_sales_<m>_month - gerçekleşen sipariş sayısı| ortalaması
+#   pred/actual_purchases_<m>m  tahmin edilen ve gerçekleşen ortalama sipariş sayısı
+#   clv_rank_corr            tahmini clv ile holdout'ta gerçekleşen tutarın Spearman korelasyonu
+#   segment_agreement        tahmini clv ve gerçekleşen tutarla yapılan D/C/B/A segmentlerinin
+#                            aynı olduğu müşteri oranı
+#   segment_stability        bir önceki cutoff'ta da skorlanan müşterilerden tahmini
+#                            segmenti değişmeyenlerin oranı
+#
+# Kullanım:
+#   orders = load_orders("orders.csv")
+#   results = backtest(orders, rolling_cutoffs(orders, n_cutoffs=4), n_jobs=4)
+#   grid = backtest(orders, cutoffs, bgf_penalizer=[0.0, 0.001, 0.01], ggf_penalizer=[0.001, 0.01])
+
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from cltv_model import fit_bgf, fit_ggf
+from cltv_scoring import score_arrays
+from flo_cache import prepare_flo_data
+from incremental import delta_totals
+from rfm_metrics import compute_cltv_df
+
+segment_labels = ["D", "C", "B", "A"]
+backtest_horizons = (3, 6)
+
+
+def load_orders(path):
+    return pd.read_csv(path, parse_dates=["order_date"], date_format="%Y-%m-%d")
+
+
+def _weeks(months):
+    # script'teki gibi ay = 4 hafta
+    return pd.Timedelta(weeks=4 * months)
+
+
+def rolling_cutoffs(orders, n_cutoffs=4, horizon_months=max(backtest_horizons), step_months=1):
+    # en son kesim tarihi, holdout penceresi son siparişe sığacak şekilde seçilir;
+    # önceki kesimler step_months aralıklarla geriye gider
+    last = pd.Timestamp(orders["order_date"].max()).normalize() + pd.Timedelta(days=1)
+    latest = last - _weeks(horizon_months)
+    return [latest - _weeks(step_months) * i for i in reversed(range(n_cutoffs))]
+
+
+def orders_fingerprint(orders):
+    cols = [col for col in ["master_id", "order_date", "order_channel", "order_value", "order_num"]
+            if col in orders.columns]
+    hashed = pd.util.hash_pandas_object(orders[cols], index=False).to_numpy()
+    return hashlib.sha256(hashed.tobytes()).hexdigest()
+
+
+def calibration_features(orders, cutoff, horizons=backtest_horizons):
+    # Çıktı: master_id index'li compute_cltv_df tablosu + actual_purchases_<m>m, actual_value_<m>m
+    cutoff = pd.Timestamp(cutoff)
+    calibration = orders[orders["order_date"] < cutoff]
+    customers = prepare_flo_data(delta_totals(calibration).reset_index())
+    features = compute_cltv_df(customers, cutoff)
+
+    num = orders["order_num"] if "order_num" in orders.columns else pd.Series(1.0, index=orders.index)
+    for months in horizons:
+        in_holdout = (orders["order_date"] >= cutoff) & (orders["order_date"] < cutoff + _weeks(months))
+        holdout = pd.DataFrame({"master_id": orders.loc[in_holdout, "master_id"],
+                                "purchases": num[in_holdout].astype(float),
+                                "value": orders.loc[in_holdout, "order_value"].astype(float)})
+        totals = holdout.groupby("master_id").sum().reindex(features.index, fill_value=0.0)
+        features[f"actual_purchases_{months}m"] = totals["purchases"].to_numpy()
+        features[f"actual_value_{months}m"] = totals["value"].to_numpy()
+    return features
+
+
+def cached_features(orders, cutoff, horizons=backtest_horizons, cache_dir=None, fingerprint=None):
+    # cache_dir None ise önbellek kullanılmaz
+    if cache_dir is None:
+        return calibration_features(orders, cutoff, horizons)
+    fingerprint = orders_fingerprint(orders) if fingerprint is None else fingerprint
+    horizon_key = "-".join(str(months) for months in horizons)
+    target = os.path.join(cache_dir, f"backtest-{fingerprint[:16]}-{pd.Timestamp(cutoff):%Y%m%d}-"
+                                     f"{horizon_key}.parquet")
+    if os.path.exists(target):
+        return pd.read_parquet(target)
+    features = calibration_features(orders, cutoff, horizons)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = target + ".tmp"
+    features.to_parquet(tmp)
+    os.replace(tmp, target)
+    return features
+
+
+def _segments(values):
+    # eşit değerler (ör. holdout'ta hiç alışveriş yapmayanlar) sıraya göre ayrılır
+    return pd.qcut(pd.Series(values).rank(method="first"), len(segment_labels), labels=segment_labels)
+
+
+def _evaluate_cutoff(args):
+    cutoff, features, horizons, bgf_penalizer, ggf_penalizer = args
+    result = {"cutoff": cutoff, "customers": len(features),
+              "bgf_penalizer": bgf_penalizer, "ggf_penalizer": ggf_penalizer}
+    try:
+        bgf = fit_bgf(features["frequency"], features["recency_cltv_weekly"], features["T_weekly"],
+                      penalizer_coef=bgf_penalizer)
+        ggf = fit_ggf(features["frequency"], features["monetary_cltv_avg"], penalizer_coef=ggf_penalizer)
+    except Exception as e:  # lifetimes ConvergenceError ve sayısal hatalar
+        result["error"] = str(e)
+        return result, None
+
+    longest = max(horizons)
+    scores = score_arrays(features["frequency"], features["recency_cltv_weekly"], features["T_weekly"],
+                          features["monetary_cltv_avg"], bgf.params_, ggf.params_,
+                          months=horizons, clv_time=longest, freq="W", discount_rate=0.01)
+    for months in horizons:
+        predicted = scores[f"exp_sales_{months}_month"]
+        actual = features[f"actual_purchases_{months}m"].to_numpy()
+        result[f"mae_purchases_{months}m"] = float(np.mean(np.abs(predicted - actual)))
+        result[f"pred_purchases_{months}m"] = float(np.mean(predicted))
+        result[f"actual_purchases_{months}m"] = float(np.mean(actual))
+
+    actual_value = features[f"actual_value_{longest}m"].to_numpy()
+    result["clv_rank_corr"] = float(pd.Series(scores["clv"]).corr(pd.Series(actual_value), method="spearman"))
+    predicted_segments = _segments(scores["clv"])
+    result["segment_agreement"] = float(np.mean(predicted_segments.to_numpy() ==
+                                                _segments(actual_value).to_numpy()))
+    result.update({name: float(value) for name, value in bgf.params_.items()})
+    result.update({name: float(value) for name, value in ggf.params_.items()})
+    return result, pd.Series(predicted_segments.to_numpy(), index=features.index)
+
+
+def _penalizer_grid(penalizers):
+    # tek değer ya da değer listesi
+    return [float(penalizers)] if np.isscalar(penalizers) else [float(value) for value in penalizers]
+
+
+def backtest(orders, cutoffs, horizons=backtest_horizons, bgf_penalizer=0.001, ggf_penalizer=0.01,
+             n_jobs=None, cache_dir=None):
+    # Çıktı: (bgf_penalizer, ggf_penalizer, cutoff) başına bir satır (metrikler ve fit edilen parametreler)
+    # bgf_penalizer / ggf_penalizer liste de olabilir: her (cutoff x BG/NBD penalizer x Gamma-Gamma
+    # penalizer) kombinasyonu process pool'da ayrı bir iş olarak fit edilir; kalibrasyon tabloları
+    # cutoff başına bir kez hazırlanır. segment_stability aynı penalizer çiftinin bir önceki
+    # cutoff'una göre hesaplanır.
+    fingerprint = orders_fingerprint(orders) if cache_dir is not None else None
+    cutoffs = [pd.Timestamp(cutoff) for cutoff in sorted(cutoffs)]
+    features = {cutoff: cached_features(orders, cutoff, horizons, cache_dir, fingerprint) for cutoff in cutoffs}
+    jobs = [(cutoff, features[cutoff], tuple(horizons), bgf_pen, ggf_pen)
+            for bgf_pen in _penalizer_grid(bgf_penalizer)
+            for ggf_pen in _penalizer_grid(ggf_penalizer)
+            for cutoff in cutoffs]
+    if n_jobs == 1:
+        evaluated = [_evaluate_cutoff(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            evaluated = list(executor.map(_evaluate_cutoff, jobs))
+
+    rows = []
+    previous = {}
+    for result, segments in evaluated:
+        key = (result["bgf_penalizer"], result["ggf_penalizer"])
+        if segments is not None and key in previous:
+            common = segments.index.intersection(previous[key].index)
+            result["segment_stability"] = float(np.mean(segments[common].to_numpy() ==
+                                                        previous[key][common].to_numpy())) if len(common) else np.nan
+        if segments is not None:
+            previous[key] = segments
+        rows.append(result)
+    return pd.DataFrame(rows)
@@ -0,0 +1,78 @@
+###############################################################
+# score_customers vs. lifetimes predict + customer_lifetime_value
+###############################################################
+# Kullanım:
+#   python benchmarks/bench_cltv_scoring.py
+#   python benchmarks/bench_cltv_scoring.py --sizes 1000000 50000000 --n-jobs 8 --max-lifetimes-rows 1000000
+# Parametreler sabit (20k örnek veriyle fit edilmiş değerlere yakın), fit süresi ölçülmez.
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cltv_model import bgf_from_params, ggf_from_params  # noqa: E402
+from cltv_scoring import score_customers  # noqa: E402
+
+bgf_params = {"r": 3.6, "alpha": 10.9, "a": 0.2, "b": 0.8}
+ggf_params = {"p": 4.1, "q": 0.5, "v": 4.3}
+
+
+def make_frame(n_rows, seed=42):
+    rng = np.random.default_rng(seed)
+    T = rng.integers(10, 500, n_rows) / 1.0
+    recency = np.floor(T * rng.random(n_rows))
+    return pd.DataFrame({"recency_cltv_weekly": recency,
+                         "T_weekly": T,
+                         "frequency": rng.integers(2, 60, n_rows),
+                         "monetary_cltv_avg": rng.gamma(2.0, 80.0, n_rows)})
+
+
+def lifetimes_scores(cltv_df, bgf, ggf):
+    args = (cltv_df["frequency"], cltv_df["recency_cltv_weekly"], cltv_df["T_weekly"])
+    out = cltv_df.copy()
+    for m in (3, 6, 12):
+        out[f"exp_sales_{m}_month"] = bgf.predict(4 * m, *args)
+    out["exp_average_value"] = ggf.conditional_expected_average_profit(cltv_df["frequency"],
+                                                                       cltv_df["monetary_cltv_avg"])
+    out["clv"] = ggf.customer_lifetime_value(bgf, *args, cltv_df["monetary_cltv_avg"],
+                                             time=6 * 4, freq="W", discount_rate=0.01)
+    return out
+
+
+def timeit(func):
+    start = time.perf_counter()
+    out = func()
+    return time.perf_counter() - start, out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20_000, 1_000_000, 10_000_000])
+    parser.add_argument("--batch-size", type=int, default=250_000)
+    parser.add_argument("--n-jobs", type=int, default=os.cpu_count())
+    parser.add_argument("--max-lifetimes-rows", type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    bgf, ggf = bgf_from_params(bgf_params), ggf_from_params(ggf_params)
+    print(f"{'rows':>12} {'lifetimes_s':>12} {'numpy_1_s':>10} {'numpy_N_s':>10} {'rows/s (N)':>14}")
+    for n in args.sizes:
+        cltv_df = make_frame(n)
+        one_s, one = timeit(lambda: score_customers(cltv_df, bgf, ggf, batch_size=args.batch_size))
+        par_s, _ = timeit(lambda: score_customers(cltv_df, bgf, ggf, batch_size=args.batch_size,
+                                                  n_jobs=args.n_jobs))
+        if n <= args.max_lifetimes_rows:
+            ref_s, ref = timeit(lambda: lifetimes_scores(cltv_df, bgf, ggf))
+            np.testing.assert_allclose(one["clv"], ref["clv"], rtol=1e-8)
+            ref_col = f"{ref_s:>12.3f}"
+        else:
+            ref_col = f"{'-':>12}"
+        print(f"{n:>12} {ref_col} {one_s:>10.3f} {par_s:>10.3f} {n / par_s:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
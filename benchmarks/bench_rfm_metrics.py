@@ -0,0 +1,68 @@
+###############################################################
+# compute_rfm vs. lambda'lı groupby karşılaştırması
+###############################################################
+# Kullanım:
+#   python benchmarks/bench_rfm_metrics.py
+#   python benchmarks/bench_rfm_metrics.py --sizes 20000 1000000 50000000 --max-lambda-rows 1000000
+# Lambda'lı sürüm büyük boyutlarda saatler sürebileceği için --max-lambda-rows
+# üstündeki boyutlarda sadece compute_rfm ölçülür.
+
+import argparse
+import os
+import sys
+import time
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rfm_metrics import compute_rfm  # noqa: E402
+
+today_date = dt.datetime(2021, 6, 1)
+
+
+def make_frame(n_rows, seed=42):
+    rng = np.random.default_rng(seed)
+    last = pd.Timestamp("2021-05-30") - pd.to_timedelta(rng.integers(0, 700, n_rows), unit="D")
+    return pd.DataFrame({"master_id": np.arange(n_rows).astype(str),
+                         "last_order_date": last,
+                         "total_number_of_purchases": rng.integers(2, 50, n_rows).astype(float),
+                         "total_price": rng.gamma(2.0, 400.0, n_rows)})
+
+
+def lambda_rfm(df):
+    rfm = df.groupby("master_id").agg({'last_order_date': lambda x: (today_date - x.max()).days,
+                                       "total_number_of_purchases": lambda y: y,
+                                       "total_price": lambda z: z})
+    rfm.columns = ["recency", "frequency", "monetary"]
+    return rfm
+
+
+def timeit(func, df):
+    start = time.perf_counter()
+    out = func(df)
+    return time.perf_counter() - start, out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[20_000, 200_000, 1_000_000, 5_000_000, 50_000_000])
+    parser.add_argument("--max-lambda-rows", type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    print(f"{'rows':>12} {'lambda_s':>10} {'vector_s':>10} {'speedup':>8}")
+    for n in args.sizes:
+        df = make_frame(n)
+        vec_s, vec = timeit(lambda d: compute_rfm(d, today_date), df)
+        if n <= args.max_lambda_rows:
+            lam_s, lam = timeit(lambda_rfm, df)
+            pd.testing.assert_frame_equal(vec, lam, check_dtype=False)
+            print(f"{n:>12} {lam_s:>10.3f} {vec_s:>10.3f} {lam_s / vec_s:>7.1f}x")
+        else:
+            print(f"{n:>12} {'-':>10} {vec_s:>10.3f} {'-':>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+###############################################################
+# Uçtan Uca, Aşama Bazında Benchmark
+###############################################################
+# FLO_RFM.py ve FLO_CLTV_Prediction.py'nin her aşamasını sentetik veri üzerinde ayrı ayrı
+# ölçer: load, preparation, outlier capping, RFM aggregation, qcut scoring, segmentation,
+# BG/NBD fit, Gamma-Gamma fit, CLTV scoring, export.
+# Kullanım:
+#   python benchmarks/bench_stages.py --sizes 10000 100000 1000000
+#   python benchmarks/bench_stages.py --sizes 1000000 --skip-fit --json results.jsonl
+# --json verilirse her (boyut, aşama) ölçümü bir JSON satırı olarak dosyanın sonuna eklenir;
+# sürümler arası gerilemeleri takip etmek için kullanılabilir.
+
+import argparse
+import datetime as dt
+import json
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cltv_model import fit_bgf, fit_ggf  # noqa: E402
+from cltv_scoring import score_customers  # noqa: E402
+from flo_cache import prepare_flo_data  # noqa: E402
+from flo_loader import load_flo_data  # noqa: E402
+from outliers import cap_outliers  # noqa: E402
+from rfm_metrics import compute_cltv_df, compute_rfm  # noqa: E402
+from rfm_segments import assign_segments, compile_seg_map  # noqa: E402
+from synthetic_data import write_flo_csv  # noqa: E402
+
+today_date = dt.datetime(2021, 6, 1)
+stage_names = ["load", "preparation", "outlier_capping", "rfm_aggregation", "qcut_scoring", "segmentation",
+               "bgnbd_fit", "gamma_gamma_fit", "cltv_scoring", "export"]
+
+
+def run_stages(path, out_dir, skip_fit=False):
+    timings = {}
+
+    def stage(name, func):
+        start = time.perf_counter()
+        result = func()
+        timings[name] = time.perf_counter() - start
+        return result
+
+    df = stage("load", lambda: load_flo_data(path))
+    df = stage("preparation", lambda: prepare_flo_data(df))
+    stage("outlier_capping", lambda: cap_outliers(df))
+    rfm = stage("rfm_aggregation", lambda: compute_rfm(df, today_date))
+
+    def qcut_scores():
+        rfm["recency_score"] = pd.qcut(rfm["recency"], 5, labels=[5, 4, 3, 2, 1])
+        rfm["frequency_score"] = pd.qcut(rfm["frequency"].rank(method="first"), 5, labels=[1, 2, 3, 4, 5])
+        rfm["monetary_score"] = pd.qcut(rfm["monetary"], 5, labels=[1, 2, 3, 4, 5])
+
+    stage("qcut_scoring", qcut_scores)
+    rfm["segment"] = stage("segmentation", lambda: assign_segments(rfm["recency_score"], rfm["frequency_score"],
+                                                                    compile_seg_map()))
+    if skip_fit:
+        return timings
+
+    cltv_df = compute_cltv_df(df, today_date)
+    bgf = stage("bgnbd_fit", lambda: fit_bgf(cltv_df["frequency"], cltv_df["recency_cltv_weekly"],
+                                             cltv_df["T_weekly"], penalizer_coef=0.001))
+    ggf = stage("gamma_gamma_fit", lambda: fit_ggf(cltv_df["frequency"], cltv_df["monetary_cltv_avg"],
+                                                   penalizer_coef=0.01))
+    cltv_final = stage("cltv_scoring", lambda: score_customers(cltv_df, bgf, ggf))
+
+    def export():
+        rfm.to_csv(os.path.join(out_dir, "rfm.csv"))
+        cltv_final.to_csv(os.path.join(out_dir, "cltv.csv"))
+
+    stage("export", export)
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--data", default=None, help="sentetik veri yerine bu CSV'yi kullan")
+    parser.add_argument("--skip-fit", action="store_true", help="BG/NBD, Gamma-Gamma ve sonrasını atla")
+    parser.add_argument("--json", default=None, help="sonuçları JSON satırları olarak bu dosyaya ekle")
+    args = parser.parse_args(argv)
+
+    print(f"{'rows':>10} " + " ".join(f"{name:>15}" for name in stage_names))
+    with tempfile.TemporaryDirectory() as tmp:
+        inputs = [(None, args.data)] if args.data else [(n, os.path.join(tmp, f"flo_{n}.csv")) for n in args.sizes]
+        for n_rows, path in inputs:
+            if n_rows is not None:
+                write_flo_csv(path, n_rows)
+            timings = run_stages(path, tmp, skip_fit=args.skip_fit)
+            if n_rows is not None:
+                rows = n_rows
+            else:
+                with open(path) as f:
+                    rows = sum(1 for _ in f) - 1
+            print(f"{rows:>10} " + " ".join(f"{timings[name]:>15.3f}" if name in timings else f"{'-':>15}"
+                                           for name in stage_names))
+            if args.json:
+                with open(args.json, "a") as f:
+                    for name, seconds in timings.items():
+                        f.write(json.dumps({"rows": rows, "stage": name, "seconds": seconds,
+                                            "timestamp": dt.datetime.now().isoformat()}) + "\n")
+            if n_rows is not None:
+                os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+###############################################################
+# Başlangıç (import) süresi karşılaştırması
+###############################################################
+# Script'lerin eski başlığı (pandas, numpy, matplotlib.pyplot, seaborn, lifetimes) ile
+# flo_cli.py'nin alt komutlarının yüklediği modüller ayrı Python süreçlerinde ölçülür.
+# Kullanım:
+#   python benchmarks/bench_startup.py --repeat 5
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+heavy = ["matplotlib", "matplotlib.pyplot", "seaborn", "lifetimes", "scipy"]
+cases = {
+    "script header": "import pandas, numpy, matplotlib.pyplot, seaborn, lifetimes, lifetimes.plotting",
+    "flo_cli --help": "import flo_cli",
+    "flo_cli rfm": "import flo_cli, pipelines",
+    "flo_cli cltv": "import flo_cli, pipelines, cltv_model, cltv_scoring",
+}
+
+
+def measure(code, repeat):
+    probe = code + "; import sys; print(','.join(m for m in %r if m in sys.modules))" % (heavy,)
+    times, loaded = [], ""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = subprocess.run([sys.executable, "-c", probe], cwd=root, capture_output=True, text=True, check=True)
+        times.append(time.perf_counter() - start)
+        loaded = out.stdout.strip()
+    return statistics.median(times), loaded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"{'case':<16} {'median_s':>9}  heavy modules loaded")
+    for name, code in cases.items():
+        try:
+            seconds, loaded = measure(code, args.repeat)
+        except subprocess.CalledProcessError as e:
+            print(f"{name:<16} {'-':>9}  {e.stderr.strip().splitlines()[-1]}")
+            continue
+        print(f"{name:<16} {seconds:>9.3f}  {loaded or '-'}")
+
+
+if __name__ == "__main__":
+    main()
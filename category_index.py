@@ -0,0 +1,88 @@
+###############################################################
+# interested_in_categories_12 için Kategori İndeksi
+###############################################################
+# Kampanya seçimlerinde her sorgu "[KADIN, ERKEK]" gibi string'leştirilmiş listeyi
+# baştan tarıyordu (apply(lambda x: "KADIN" in x), str.contains("ERKEK")).
+# Burada alan bir kere ayrıştırılır:
+#   - masks: her müşteri için bir bit maskesi (kategori başına bir bit)
+#   - postings(kategori): o kategoriyi içeren satırların sıralı dizisi (ters indeks)
+# Böylece "KADIN ve champions/loyal_customers" gibi VE/VEYA sorguları bit işlemi ya da
+# sıralı dizi kesişimi haline gelir. Eşleşme alt-string değil tam kategori adıyla yapılır,
+# yani "COCUK" sorgusu "AKTIFCOCUK" kategorisini yakalamaz.
+
+import numpy as np
+import pandas as pd
+
+
+def parse_categories(series):
+    # "[KADIN, ERKEK]" -> satır pozisyonu ve kategori adı çiftleri
+    tokens = (series.reset_index(drop=True).astype(str)
+              .str.strip("[]").str.split(",").explode().str.strip())
+    tokens = tokens[tokens.notna() & (tokens != "")]
+    return tokens.index.to_numpy(), tokens.to_numpy()
+
+
+class CategoryIndex:
+    def __init__(self, categories, masks):
+        if len(categories) > 64:
+            raise ValueError("en fazla 64 kategori desteklenir")
+        self.categories = list(categories)
+        self.masks = masks
+        self._bits = {cat: np.uint64(1) << np.uint64(i) for i, cat in enumerate(self.categories)}
+        self._postings = {}
+
+    @classmethod
+    def from_series(cls, series):
+        rows, names = parse_categories(series)
+        codes, categories = pd.factorize(names, sort=True)
+        masks = np.zeros(len(series), dtype=np.uint64)
+        np.bitwise_or.at(masks, rows, np.left_shift(np.uint64(1), codes.astype(np.uint64)))
+        return cls(categories, masks)
+
+    def __len__(self):
+        return len(self.masks)
+
+    def bits(self, categories):
+        if isinstance(categories, str):
+            categories = [categories]
+        unknown = [cat for cat in categories if cat not in self._bits]
+        if unknown:
+            raise KeyError(f"bilinmeyen kategori: {unknown}")
+        bits = np.uint64(0)
+        for cat in categories:
+            bits |= self._bits[cat]
+        return bits
+
+    def query(self, all_of=(), any_of=(), none_of=()):
+        # Çıktı: satır sayısı uzunluğunda boolean dizi
+        selected = np.ones(len(self.masks), dtype=bool)
+        if all_of:
+            bits = self.bits(all_of)
+            selected &= (self.masks & bits) == bits
+        if any_of:
+            selected &= (self.masks & self.bits(any_of)) != 0
+        if none_of:
+            selected &= (self.masks & self.bits(none_of)) == 0
+        return selected
+
+    def rows(self, all_of=(), any_of=(), none_of=()):
+        return np.flatnonzero(self.query(all_of, any_of, none_of))
+
+    def postings(self, category):
+        # ters indeks: kategori -> sıralı satır dizisi (ilk kullanımda oluşturulur)
+        if category not in self._postings:
+            self._postings[category] = np.flatnonzero(self.masks & self.bits(category))
+        return self._postings[category]
+
+
+def segment_rows(segments, names):
+    # segments: satır sırasıyla segment serisi, names: seçilecek segmentler
+    return np.flatnonzero(np.asarray(pd.Series(segments).isin(names)))
+
+
+def intersect_rows(*row_arrays):
+    # sıralı satır dizilerinin kesişimi
+    result = row_arrays[0]
+    for rows in row_arrays[1:]:
+        result = np.intersect1d(result, rows, assume_unique=True)
+    return result
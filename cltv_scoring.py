@@ -0,0 +1,162 @@
+###############################################################
+# BG/NBD + Gamma-Gamma ile Toplu (Batch) CLTV Skorlama
+###############################################################
+# FLO_CLTV_Prediction.py'de bgf.predict 3 ve 6 ay için ayrı ayrı çağrılıyor,
+# ggf.customer_lifetime_value her indirimli adım için beklenen satın almayı yeniden
+# hesaplıyor ve sonuç cltv_df.merge(cltv, on="master_id") ile geri birleştiriliyordu.
+# Burada fit edilmiş parametrelerle (lifetimes ile aynı formüller):
+#   - tüm ufuklar (exp_sales_3/6/12_month) ve CLTV'nin indirimli adımları için gereken
+#     bütün t değerleri tek bir (t, müşteri) matrisinde tek seferde hesaplanır
+#   - sonuçlar girdi tablosuna aynı sırayla sütun olarak eklenir, merge yoktur
+#   - müşteri tablosu sabit boyutlu partilere bölünür, partiler isteğe bağlı olarak
+#     process pool ile paralel skorlanır; aynı anda gönderilmiş parti sayısı sınırlıdır
+#     (max_in_flight), bellek kullanımı parti boyutu x max_in_flight ile sınırlıdır
+#   - iter_score_batches sonuçları parti parti verir (ör. diske yazarken tüm skor tablosunu
+#     bellekte tutmamak için); score_customers da onu kullanır
+# Parametreler fit edilmiş model (params_) ya da CLTVModelStore.params(...) sözlüğü
+# olarak verilebilir.
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.special import hyp2f1
+
+# ay -> hafta (script'teki 4*3 gibi)
+horizon_months = (3, 6, 12)
+# lifetimes customer_lifetime_value'daki periyot çarpanları (time parametresi ay cinsinden)
+period_factors = {"W": 4.345, "M": 1.0, "D": 30, "H": 30 * 24}
+
+
+def unpack_params(params, names):
+    # fit edilmiş model (params_) ya da parametre sözlüğü -> names sırasında float listesi
+    if hasattr(params, "params_"):
+        params = params.params_
+    return [float(params[name]) for name in names]
+
+
+def expected_purchases(bgf_params, t, frequency, recency, T):
+    # BG/NBD conditional_expected_number_of_purchases_up_to_time; t (k, 1) şeklinde verilirse
+    # (k, n) matris döner
+    r, alpha, a, b = unpack_params(bgf_params, ["r", "alpha", "a", "b"])
+    x = frequency
+    _a = r + x
+    _b = b + x
+    _c = a + b + x - 1
+    _z = t / (alpha + T + t)
+    with np.errstate(divide="ignore"):
+        ln_hyp_term = np.log(hyp2f1(_a, _b, _c, _z))
+        inf_mask = np.isinf(ln_hyp_term)
+        if inf_mask.any():
+            ln_hyp_term_alt = np.log(hyp2f1(_c - _a, _c - _b, _c, _z)) + (_c - _a - _b) * np.log(1 - _z)
+            ln_hyp_term = np.where(inf_mask, ln_hyp_term_alt, ln_hyp_term)
+    first_term = (a + b + x - 1) / (a - 1)
+    second_term = 1 - np.exp(ln_hyp_term + (r + x) * np.log((alpha + T) / (alpha + t + T)))
+
+    numerator = first_term * second_term
+    denominator = 1 + (x > 0) * (a / (b + x - 1)) * ((alpha + T) / (alpha + recency)) ** (r + x)
+    return numerator / denominator
+
+
+def expected_average_profit(ggf_params, frequency, monetary_value):
+    # Gamma-Gamma conditional_expected_average_profit
+    p, q, v = unpack_params(ggf_params, ["p", "q", "v"])
+    individual_weight = p * frequency / (p * frequency + q - 1)
+    population_mean = v * p / (q - 1)
+    return (1 - individual_weight) * population_mean + individual_weight * monetary_value
+
+
+def score_arrays(frequency, recency, T, monetary_value, bgf_params, ggf_params,
+                 months=horizon_months, clv_time=6 * 4, freq="W", discount_rate=0.01):
+    # Çıktı: {"exp_sales_3_month": ..., ..., "exp_average_value": ..., "clv": ...}
+    frequency = np.asarray(frequency, dtype=float)
+    recency = np.asarray(recency, dtype=float)
+    T = np.asarray(T, dtype=float)
+    monetary_value = np.asarray(monetary_value, dtype=float)
+
+    # ufuklar (hafta) ve CLTV adımları için gereken tüm t değerleri
+    factor = period_factors[freq]
+    clv_steps = np.arange(0, clv_time + 1) * factor
+    horizon_weeks = np.array([4 * m for m in months], dtype=float)
+    times, inverse = np.unique(np.concatenate([horizon_weeks, clv_steps]), return_inverse=True)
+    purchases = expected_purchases(bgf_params, times[:, None], frequency, recency, T)
+
+    scores = {f"exp_sales_{m}_month": purchases[inverse[i]] for i, m in enumerate(months)}
+    exp_average_value = expected_average_profit(ggf_params, frequency, monetary_value)
+    scores["exp_average_value"] = exp_average_value
+
+    # her adımda beklenen işlem sayısı (kümülatif farkı) x indirim çarpanı
+    cumulative = purchases[inverse[len(months):]]
+    discounts = 1 / (1 + discount_rate) ** (clv_steps[1:] / factor)
+    scores["clv"] = exp_average_value * (discounts @ np.diff(cumulative, axis=0))
+    return scores
+
+
+def _score_batch(args):
+    columns, bgf_params, ggf_params, kwargs = args
+    return score_arrays(*columns, bgf_params, ggf_params, **kwargs)
+
+
+def _batches(cltv_df, batch_size, bgf_params, ggf_params, kwargs, cols):
+    for start in range(0, len(cltv_df), batch_size):
+        batch = cltv_df.iloc[start:start + batch_size]
+        yield tuple(batch[col].to_numpy() for col in cols), bgf_params, ggf_params, kwargs
+
+
+def bounded_map(function, jobs, n_jobs=1, max_in_flight=None):
+    # executor.map tüm jobs üretecini baştan tüketip her partiyi kuyruğa koyuyor; burada en
+    # fazla max_in_flight (varsayılan 2 * n_jobs) parti aynı anda gönderilmiş olur, sonuçlar
+    # sırayla ve tek tek döner
+    if n_jobs == 1:
+        yield from map(function, jobs)
+        return
+    max_in_flight = 2 * (n_jobs or os.cpu_count() or 1) if max_in_flight is None else max_in_flight
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        pending = deque()
+        try:
+            for job in jobs:
+                if len(pending) >= max_in_flight:
+                    yield pending.popleft().result()
+                pending.append(executor.submit(function, job))
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def iter_score_batches(cltv_df, bgf, ggf, batch_size=250_000, n_jobs=1, max_in_flight=None,
+                       cols=("frequency", "recency_cltv_weekly", "T_weekly", "monetary_cltv_avg"),
+                       **kwargs):
+    # Çıktı: cltv_df sırasıyla parti parti skor tabloları (cltv_df index'li, sadece skor sütunları).
+    # Aynı anda bellekte en fazla max_in_flight parti (girdi + sonuç) bulunur.
+    bgf_params = dict(zip(["r", "alpha", "a", "b"], unpack_params(bgf, ["r", "alpha", "a", "b"])))
+    ggf_params = dict(zip(["p", "q", "v"], unpack_params(ggf, ["p", "q", "v"])))
+    jobs = _batches(cltv_df, batch_size, bgf_params, ggf_params, kwargs, cols)
+    results = bounded_map(_score_batch, jobs, n_jobs, max_in_flight)
+    for start, result in zip(range(0, len(cltv_df), batch_size), results):
+        yield pd.DataFrame(result, index=cltv_df.index[start:start + batch_size])
+
+
+def score_customers(cltv_df, bgf, ggf, batch_size=250_000, n_jobs=1, max_in_flight=None,
+                    cols=("frequency", "recency_cltv_weekly", "T_weekly", "monetary_cltv_avg"),
+                    **kwargs):
+    # cltv_df: compute_cltv_df çıktısı gibi bir tablo
+    # Çıktı: cltv_df'in kopyası + exp_sales_*_month, exp_average_value, clv sütunları
+    # kwargs: months, clv_time, freq, discount_rate (score_arrays'e aynen geçer)
+    # Partiler iter_score_batches'ten geldikçe önceden ayrılmış sonuç sütunlarına yazılır;
+    # parti sonuçları listede biriktirilip birleştirilmez.
+    scored = cltv_df.copy()
+    columns = None
+    start = 0
+    for batch in iter_score_batches(cltv_df, bgf, ggf, batch_size, n_jobs, max_in_flight, cols, **kwargs):
+        if columns is None:
+            columns = {name: np.empty(len(cltv_df)) for name in batch.columns}
+        for name, values in columns.items():
+            values[start:start + len(batch)] = batch[name].to_numpy()
+        start += len(batch)
+    for name, values in (columns or {}).items():
+        scored[name] = values
+    return scored
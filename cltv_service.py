@@ -0,0 +1,253 @@
+###############################################################
+# Skorlanmış CLTV Tablosu için Sorgu Servisi
+###############################################################
+# Toplu çalıştırmadan sonra cltv_final'i okumanın tek yolu script'i yeniden çalıştırıp
+# sort_values(...).head(20) çağırmaktı. Burada:
+#   - build_store: skorlanmış tablo bir klasöre .npy dizileri olarak yazılır
+#       ids.npy          master_id'ler, sıralı ve sabit genişlikli bayt dizisi
+#       <sütun>.npy      sayısal sütunlar (ids sırasında)
+#       <segment>.npy    segment kodları (cltv_segment, rfm segment); etiketler meta.json'da
+#       top_clv*.npy     tüm tablo ve her segment değeri için clv'ye göre azalan sıralı
+#                        satır numaraları
+#       meta.json        sütunlar, etiketler, model parametreleri ve skorlama ayarları
+#   - CLTVStore: dizileri memory-map ile açar (np.load(mmap_mode="r")), bellek kullanımı
+#     işletim sisteminin sayfa önbelleğine bırakılır, açılış tablo boyutundan bağımsızdır
+#       lookup(master_id)            ikili arama ile tek müşteri
+#       top(n, segment, by)          önceden sıralanmış indekslerden ilk n (tam sıralama yok)
+#       predict(f, r, T, monetary)   cltv_scoring.score_arrays ile anlık skor, LRU önbellekli
+#   - serve: aynı sorgular için küçük bir HTTP servisi (standart kütüphane, thread'li)
+#       GET /customer/<master_id>
+#       GET /top?n=20&segment=cltv_segment:A     (0 < n <= max_top, segment tam olarak sütun:etiket)
+#       GET /predict?frequency=5&recency=20.1&T=50.3&monetary=180.5
+#
+# Kullanım:
+#   build_store(cltv_final, "cltv_store", model_params="cltv_model_params.json", rfm=rfm)
+#   store = CLTVStore("cltv_store")
+#   store.lookup("cc294636-19f0-11eb-8d74-000d3a38a36f")
+#   store.top(20, segment=("cltv_segment", "A"))
+
+import json
+import os
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+import numpy as np
+import pandas as pd
+
+from cltv_model import CLTVModelStore
+from cltv_scoring import score_arrays
+
+value_cols = ["recency_cltv_weekly", "T_weekly", "frequency", "monetary_cltv_avg",
+              "exp_sales_3_month", "exp_sales_6_month", "exp_sales_12_month", "exp_average_value", "clv"]
+segment_cols = ["cltv_segment", "segment"]
+sort_cols = ["clv"]
+max_top = 10_000
+predict_params = ["frequency", "recency", "T", "monetary"]
+
+
+def _write_array(store_dir, name, values):
+    np.save(os.path.join(store_dir, f"{name}.npy"), np.ascontiguousarray(values))
+
+
+def build_store(cltv_final, store_dir, model_params=None, rfm=None, scoring=None):
+    # cltv_final: master_id index'li skor tablosu (score_customers + cltv_segment) ya da
+    #   backend="polars" akışının döndürdüğü, master_id'ye göre sıralı lazy tablo (diziler
+    #   tabloyu belleğe almadan parti parti yazılır, bkz. polars_engine.write_store_arrays)
+    # rfm: verilirse rfm["segment"] master_id üzerinden eklenir (cltv'de olmayan müşteriler atlanır)
+    # model_params: CLTVModelStore dosyası; verilirse predict için parametreler store'a kopyalanır
+    # scoring: predict'in kullanacağı score_arrays ayarları (clv_time, freq, discount_rate)
+    os.makedirs(store_dir, exist_ok=True)
+    if isinstance(cltv_final, pd.DataFrame):
+        meta = _write_arrays(cltv_final, store_dir, rfm)
+    else:
+        import polars_engine
+        if rfm is not None:
+            cltv_final = cltv_final.join(rfm.select("master_id", "segment"), on="master_id", how="left",
+                                         maintain_order="left")
+        meta = polars_engine.write_store_arrays(cltv_final, store_dir, value_cols, segment_cols, sort_cols)
+
+    if model_params is not None:
+        model_store = CLTVModelStore(model_params)
+        meta["params"] = {"bgf": model_store.params("bgf"), "ggf": model_store.params("ggf")}
+    meta["scoring"] = {"clv_time": 6 * 4, "freq": "W", "discount_rate": 0.01, **(scoring or {})}
+    meta["created_at"] = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+
+    tmp = os.path.join(store_dir, "meta.json.tmp")
+    with open(tmp, "w") as f:
+        json.dump(meta, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, os.path.join(store_dir, "meta.json"))
+    return store_dir
+
+
+def _write_arrays(cltv_final, store_dir, rfm=None):
+    table = cltv_final.sort_index()
+    if rfm is not None:
+        table = table.join(rfm[["segment"]], how="left")
+
+    ids = np.char.encode(table.index.to_numpy(dtype=str), "utf-8")
+    _write_array(store_dir, "ids", ids)
+    meta = {"rows": len(table), "columns": [], "segments": {}}
+    for col in value_cols:
+        if col in table.columns:
+            _write_array(store_dir, col, table[col].to_numpy(dtype=np.float64))
+            meta["columns"].append(col)
+
+    # tüm tablo ve her segment değeri için azalan sıralı satır numaraları
+    orders = {}
+    for by in sort_cols:
+        if by in table.columns:
+            orders[by] = np.argsort(-table[by].to_numpy(), kind="stable").astype(np.int32)
+            _write_array(store_dir, f"top_{by}", orders[by])
+    for col in segment_cols:
+        if col not in table.columns:
+            continue
+        segments = table[col].astype("category")
+        codes = segments.cat.codes.to_numpy().astype(np.int16)
+        _write_array(store_dir, col, codes)
+        labels = [str(label) for label in segments.cat.categories]
+        meta["segments"][col] = labels
+        for by, order in orders.items():
+            for code, label in enumerate(labels):
+                _write_array(store_dir, f"top_{by}_{col}_{label}", order[codes[order] == code])
+    return meta
+
+
+class CLTVStore:
+    def __init__(self, store_dir, cache_size=100_000):
+        self.store_dir = store_dir
+        with open(os.path.join(store_dir, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.ids = self._load("ids")
+        self.columns = {col: self._load(col) for col in self.meta["columns"]}
+        self.segments = {col: self._load(col) for col in self.meta["segments"]}
+        self._sorted = {}
+        self.predict = lru_cache(maxsize=cache_size)(self._predict)
+
+    def _load(self, name):
+        return np.load(os.path.join(self.store_dir, f"{name}.npy"), mmap_mode="r")
+
+    def __len__(self):
+        return len(self.ids)
+
+    def row(self, master_id):
+        # master_id -> satır numarası (yoksa None)
+        key = master_id.encode("utf-8")
+        position = int(np.searchsorted(self.ids, key))
+        if position < len(self.ids) and self.ids[position] == key:
+            return position
+        return None
+
+    def _record(self, position):
+        record = {"master_id": self.ids[position].decode("utf-8")}
+        for col, values in self.columns.items():
+            record[col] = float(values[position])
+        for col, codes in self.segments.items():
+            code = int(codes[position])
+            record[col] = self.meta["segments"][col][code] if code >= 0 else None
+        return record
+
+    def lookup(self, master_id):
+        position = self.row(master_id)
+        return None if position is None else self._record(position)
+
+    def _order(self, by, segment):
+        name = f"top_{by}" if segment is None else f"top_{by}_{segment[0]}_{segment[1]}"
+        if name not in self._sorted:
+            path = os.path.join(self.store_dir, f"{name}.npy")
+            if not os.path.exists(path):
+                raise KeyError(f"sıralı indeks yok: {by} / {segment}")
+            self._sorted[name] = self._load(name)
+        return self._sorted[name]
+
+    def top(self, n=20, segment=None, by="clv"):
+        # segment: None ya da (segment sütunu, etiket), ör. ("cltv_segment", "A") / ("segment", "champions")
+        if not 0 < n <= max_top:
+            raise ValueError(f"n 1 ile {max_top} arasında olmalı")
+        if segment is not None:
+            if len(segment) != 2 or segment[0] not in self.meta["segments"] or \
+                    segment[1] not in self.meta["segments"][segment[0]]:
+                raise KeyError(f"bilinmeyen segment: {segment} (sütun:etiket, ör. cltv_segment:A)")
+        if by not in sort_cols:
+            raise KeyError(f"sıralı indeks yok: {by}")
+        return [self._record(int(position)) for position in self._order(by, segment)[:n]]
+
+    def _predict(self, frequency, recency, T, monetary_value):
+        # tek bir (frequency, recency, T, monetary) için exp_sales_*_month, exp_average_value, clv
+        params = self.meta.get("params")
+        if not params or params["bgf"] is None or params["ggf"] is None:
+            raise ValueError("store'da model parametreleri yok (build_store(..., model_params=...))")
+        scores = score_arrays([frequency], [recency], [T], [monetary_value], params["bgf"], params["ggf"],
+                              **self.meta["scoring"])
+        return {name: float(values[0]) for name, values in scores.items()}
+
+
+def _predict_args(query):
+    missing = [name for name in predict_params if name not in query]
+    if missing:
+        raise ValueError(f"eksik parametre: {', '.join(missing)}")
+    args = []
+    for name in predict_params:
+        try:
+            args.append(float(query[name]))
+        except ValueError:
+            raise ValueError(f"{name} sayı olmalı: {query[name]!r}") from None
+    return args
+
+
+def _handler(store):
+    class Handler(BaseHTTPRequestHandler):
+        # keep-alive: istemci bağlantıyı her istekte yeniden açmasın; başlık ve gövde ayrı
+        # yazıldığı için Nagle kapatılır (yoksa her yanıt ~40 ms gecikmeli ACK bekler)
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def _send(self, status, body):
+            payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = {key: values[0] for key, values in parse_qs(url.query).items()}
+            try:
+                if url.path.startswith("/customer/"):
+                    record = store.lookup(unquote(url.path[len("/customer/"):]))
+                    if record is None:
+                        self._send(404, {"error": "müşteri bulunamadı"})
+                    else:
+                        self._send(200, record)
+                elif url.path == "/top":
+                    segment = None
+                    if "segment" in query:
+                        segment = tuple(query["segment"].split(":", 1))
+                        if len(segment) != 2:
+                            raise ValueError("segment sütun:etiket biçiminde olmalı, ör. cltv_segment:A")
+                    self._send(200, store.top(int(query.get("n", 20)), segment, query.get("by", "clv")))
+                elif url.path == "/predict":
+                    self._send(200, store.predict(*_predict_args(query)))
+                else:
+                    self._send(404, {"error": "bilinmeyen adres"})
+            except (KeyError, ValueError) as e:
+                # KeyError'ın str()'i mesajı tırnak içine alıyor
+                self._send(400, {"error": str(e.args[0]) if e.args else str(e)})
+            except Exception as e:  # beklenmeyen hata: bağlantıyı yanıtsız kapatma
+                self._send(500, {"error": str(e)})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(store_dir, host="127.0.0.1", port=8080):
+    server = ThreadingHTTPServer((host, port), _handler(CLTVStore(store_dir)))
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
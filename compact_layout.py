@@ -0,0 +1,162 @@
+###############################################################
+# Müşteri Tablosu için Kompakt Bellek Düzeni
+###############################################################
+# df'te master_id 36 karakterlik Python string nesneleri, kategori listesi
+# ("[KADIN, ERKEK]") yine string olarak tutuluyor; toplam sütunları ve CLTV sütunları
+# eklendikçe tablo daha da büyüyor. CompactTable isteğe bağlı sıkıştırılmış bir temsil:
+#   - master_id -> int32 satır kodu (sözlük kodlaması); kod -> master_id eşlemesi ayrı
+#     bir tabloda (ids), Python string nesneleri yerine sabit genişlikli bayt dizisi olarak
+#     tutulur (36 bayt / müşteri)
+#   - string / object sütunlar (kanallar, segmentler) kategorik olur
+#   - tamsayı değerli sayısal sütunlar (sipariş sayıları) aralığın izin verdiği en küçük
+#     tamsayı tipine (en az int16), diğerleri float32'ye. Küçültülmüş tipler sadece saklama
+#     içindir: iki int16 sütunun toplamı 32767'yi aşarsa sessizce taşar. total_* gibi
+#     türetmeler to_frame() (orijinal tiplere geri çevirir) ya da column() üzerinden yapılır.
+#   - tarih sütunları -> tablodaki en eski tarihten itibaren gün sayısı (int16, aralık
+#     yetmezse int32); date_base ile geri çevrilir
+#   - interested_in_categories_12 -> kategori bit maskesi (CategoryIndex ile aynı bitler;
+#     kategori sayısına göre uint8/16/32/64)
+# to_frame() eski düzene ve orijinal sayısal tiplere geri çevirir (kategori listesi
+# alfabetik sırayla yazılır).
+# memory_report() sütun bazında önceki ve sonraki bellek kullanımını verir.
+#
+# Kullanım:
+#   compact = CompactTable.from_frame(df)
+#   compact.memory_report()
+#   compact.category_index().rows(all_of=["KADIN"])
+#   compact.dates("last_order_date")
+#   compact.column("order_num_total_ever_online") + compact.column("order_num_total_ever_offline")
+
+import numpy as np
+import pandas as pd
+
+from category_index import CategoryIndex
+
+_mask_dtypes = [(8, np.uint8), (16, np.uint16), (32, np.uint32), (64, np.uint64)]
+
+
+def downcast_numeric(series, min_int=np.int16):
+    # tamsayı değerli ve eksiksiz sütunlar -> en küçük uygun tamsayı tipi (en az min_int),
+    # diğer float sütunlar -> float32
+    if pd.api.types.is_bool_dtype(series) or not pd.api.types.is_numeric_dtype(series):
+        return series
+    values = series.to_numpy()
+    if pd.api.types.is_integer_dtype(series) or (series.notna().all() and np.array_equal(values, np.round(values))):
+        downcast = pd.to_numeric(series.astype(np.int64), downcast="integer")
+        return downcast.astype(np.promote_types(downcast.dtype, min_int))
+    return series.astype(np.float32)
+
+
+def _mask_dtype(n_categories):
+    for bits, dtype in _mask_dtypes:
+        if n_categories <= bits:
+            return dtype
+    raise ValueError("en fazla 64 kategori desteklenir")
+
+
+class CompactTable:
+    def __init__(self, frame, ids, categories, date_base=None, date_cols=(), original_memory=None,
+                 id_col="master_id", category_col="interested_in_categories_12", dtypes=None):
+        self.frame = frame
+        self.ids = ids
+        self.categories = list(categories)
+        self.date_base = date_base
+        self.date_cols = list(date_cols)
+        self.original_memory = original_memory
+        self.id_col = id_col
+        self.category_col = category_col
+        # küçültülen sayısal sütunların orijinal tipleri
+        self.dtypes = dict(dtypes or {})
+        self._id_lookup = None
+
+    @classmethod
+    def from_frame(cls, dataframe, id_col="master_id", category_col="interested_in_categories_12"):
+        original_memory = dataframe.memory_usage(index=False, deep=True)
+        date_cols = [col for col in dataframe.columns
+                     if pd.api.types.is_datetime64_any_dtype(dataframe[col]) and dataframe[col].notna().all()]
+        date_base = min(dataframe[col].min() for col in date_cols).normalize() if date_cols else None
+        columns = {}
+        ids = np.empty(0, dtype="S1")
+        categories = []
+        dtypes = {}
+        for col in dataframe.columns:
+            series = dataframe[col]
+            if col == id_col:
+                codes, uniques = pd.factorize(series)
+                columns[col] = codes.astype(np.int32)
+                ids = np.char.encode(np.asarray(uniques, dtype=str), "utf-8")
+            elif col in date_cols:
+                columns[col] = downcast_numeric((series - date_base).dt.days)
+            elif col == category_col:
+                cat_index = CategoryIndex.from_series(series)
+                categories = cat_index.categories
+                columns["category_mask"] = cat_index.masks.astype(_mask_dtype(len(categories)))
+            elif isinstance(series.dtype, pd.CategoricalDtype):
+                columns[col] = series
+            elif pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+                columns[col] = series.astype("category")
+            elif pd.api.types.is_numeric_dtype(series):
+                columns[col] = downcast_numeric(series)
+                if columns[col].dtype != series.dtype:
+                    dtypes[col] = series.dtype
+            else:
+                columns[col] = series
+        frame = pd.DataFrame(columns, index=dataframe.index)
+        return cls(frame, ids, categories, date_base, date_cols, original_memory, id_col, category_col, dtypes)
+
+    def __len__(self):
+        return len(self.frame)
+
+    def decode_ids(self, codes):
+        # int32 kodlar -> master_id string'leri
+        return np.char.decode(self.ids[np.asarray(codes)], "utf-8").astype(object)
+
+    def encode_ids(self, master_ids):
+        # master_id -> kod (tabloda olmayanlar için -1); arama tablosu ilk kullanımda kurulur
+        if self._id_lookup is None:
+            self._id_lookup = pd.Index(self.decode_ids(np.arange(len(self.ids))))
+        return self._id_lookup.get_indexer(master_ids).astype(np.int32)
+
+    def dates(self, col):
+        return self.date_base + pd.to_timedelta(self.frame[col].astype(np.int64), unit="D")
+
+    def column(self, col):
+        # aritmetik için orijinal tipte sütun (int16 toplamları taşmasın)
+        series = self.frame[col]
+        return series.astype(self.dtypes[col]) if col in self.dtypes else series
+
+    def category_index(self):
+        return CategoryIndex(self.categories, self.frame["category_mask"].to_numpy().astype(np.uint64))
+
+    def to_frame(self):
+        # orijinal düzene (string master_id, string kategori listesi) geri çevirir
+        frame = self.frame.astype(self.dtypes)
+        frame[self.id_col] = self.decode_ids(frame[self.id_col])
+        for col in self.date_cols:
+            frame[col] = self.dates(col)
+        if "category_mask" in frame.columns:
+            masks = frame.pop("category_mask").to_numpy().astype(np.uint64)
+            lookup = {}
+            lists = []
+            for mask in masks:
+                if mask not in lookup:
+                    lookup[mask] = "[" + ", ".join(cat for i, cat in enumerate(self.categories)
+                                                   if int(mask) >> i & 1) + "]"
+                lists.append(lookup[mask])
+            frame[self.category_col] = lists
+        return frame
+
+    def memory_usage(self):
+        # sütun bazında bayt; kod -> master_id eşleme tablosu ayrı satır olarak
+        usage = self.frame.memory_usage(index=False, deep=True)
+        usage[f"{self.id_col} (eşleme tablosu)"] = self.ids.nbytes
+        return usage
+
+    def memory_report(self):
+        # Çıktı: sütun bazında before_mb / after_mb ve en altta toplam satırı (ratio: kaç kat küçüldü)
+        before = pd.Series(dtype=float) if self.original_memory is None else \
+            self.original_memory.rename({self.category_col: "category_mask"})
+        report = pd.DataFrame({"before_mb": before, "after_mb": self.memory_usage()}) / 2 ** 20
+        report.loc["total"] = report.sum()
+        report["ratio"] = report["before_mb"] / report["after_mb"]
+        return report
@@ -0,0 +1,67 @@
+###############################################################
+# İsteğe Bağlı Tanılama Çıktıları (dosyaya)
+###############################################################
+# Script'lerdeki df.describe().T, df.info(), plt.boxplot + plt.show() ve
+# plot_period_transactions(bgf) + plt.show(block=True) adımlarının toplu (headless)
+# çalıştırmadaki karşılıkları. Hiçbiri ekrana bir şey göstermez, sadece istenirse
+# verilen klasöre dosya yazar. matplotlib ve lifetimes.plotting sadece grafik
+# istendiğinde, fonksiyon içinde ve "Agg" backend'iyle yüklenir.
+
+import io
+import os
+
+import pandas as pd
+
+
+def _pyplot():
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def write_frame_summary(dataframe, out_dir, name):
+    # describe().T -> <name>_describe.csv, info() -> <name>_info.txt
+    # dataframe polars LazyFrame ise (backend="polars") describe tabloyu tarayarak hesaplanır,
+    # info yerine şema yazılır
+    os.makedirs(out_dir, exist_ok=True)
+    if not isinstance(dataframe, pd.DataFrame):
+        dataframe.describe().to_pandas().set_index("statistic").T.to_csv(
+            os.path.join(out_dir, f"{name}_describe.csv"))
+        with open(os.path.join(out_dir, f"{name}_info.txt"), "w") as f:
+            f.writelines(f"{col}: {dtype}\n" for col, dtype in dataframe.collect_schema().items())
+        return
+    dataframe.describe().T.to_csv(os.path.join(out_dir, f"{name}_describe.csv"))
+    buffer = io.StringIO()
+    dataframe.info(buf=buffer)
+    with open(os.path.join(out_dir, f"{name}_info.txt"), "w") as f:
+        f.write(buffer.getvalue())
+
+
+def write_memory_report(dataframe, out_dir, name):
+    # sütun bazında mevcut ve kompakt düzendeki bellek kullanımı -> <name>_memory.csv
+    from compact_layout import CompactTable
+    os.makedirs(out_dir, exist_ok=True)
+    CompactTable.from_frame(dataframe).memory_report().to_csv(os.path.join(out_dir, f"{name}_memory.csv"))
+
+
+def save_boxplots(dataframe, out_dir, cols=None):
+    # her sayısal sütun için <sütun>_boxplot.png
+    plt = _pyplot()
+    os.makedirs(out_dir, exist_ok=True)
+    cols = dataframe.select_dtypes("number").columns if cols is None else cols
+    for col in cols:
+        fig, ax = plt.subplots()
+        ax.boxplot(dataframe[col].dropna())
+        ax.set_title(col)
+        fig.savefig(os.path.join(out_dir, f"{col}_boxplot.png"))
+        plt.close(fig)
+
+
+def save_period_transactions(bgf, out_dir):
+    plt = _pyplot()
+    from lifetimes.plotting import plot_period_transactions
+    os.makedirs(out_dir, exist_ok=True)
+    ax = plot_period_transactions(bgf)
+    ax.figure.savefig(os.path.join(out_dir, "period_transactions.png"))
+    plt.close(ax.figure)
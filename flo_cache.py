@@ -0,0 +1,117 @@
+###############################################################
+# Hazırlanmış Müşteri Tablosu için Parquet Önbelleği
+###############################################################
+# preparation() (FLO_RFM.py) ve GÖREV 1 (FLO_CLTV_Prediction.py) her çalıştırmada CSV'yi
+# yeniden okuyup ayrıştırıyor, total_number_of_purchases / total_price sütunlarını
+# yeniden hesaplıyor ve aykırı değerleri yeniden baskılıyordu.
+# Hazırlanmış tablo burada kaynak dosyanın içerik özeti (sha256) ile anahtarlanan bir
+# Parquet dosyasına yazılır. Sonraki çalıştırmalar dosyayı memory-map ile açar ve sadece
+# ihtiyaç duydukları sütunları okur. İçerik özeti, dosyanın boyutu ve mtime'ı değişmedikçe
+# yeniden hesaplanmaz.
+#
+# Varyantlar:
+#   cap_outliers=False -> RFM için hazırlanmış tablo
+#   cap_outliers=True  -> CLTV için, outlier_cols sütunları baskılanmış tablo
+# İkisi de aynı ayrıştırma adımını (base önbellek) paylaşır.
+# Dosya adı: <kaynak adı>-<özet>-v<cache_version>-<varyant>.parquet; hazırlama ya da
+# baskılama mantığı (prepare_flo_data, outliers.py, flo_loader şeması) değiştiğinde
+# cache_version artırılır, eski önbellekler yeniden hesaplanır.
+# Parquet için pyarrow gereklidir.
+
+import hashlib
+import json
+import os
+import re
+
+import pandas as pd
+
+from flo_loader import load_flo_data
+from outliers import cap_outliers as _cap_outliers, save_thresholds
+
+cache_version = 2  # 1: sürüm alanı olmayan eski dosya adları
+
+
+def prepare_flo_data(dataframe, cap_outliers=False, thresholds=None):
+    # thresholds: önceki bir çalıştırmada kaydedilmiş limitler (verilmezse veriden hesaplanır)
+    if cap_outliers:
+        _cap_outliers(dataframe, thresholds)
+    dataframe["total_number_of_purchases"] = dataframe["order_num_total_ever_online"] + dataframe[
+        "order_num_total_ever_offline"]
+    dataframe["total_price"] = dataframe["customer_value_total_ever_offline"] + dataframe[
+        "customer_value_total_ever_online"]
+    return dataframe
+
+
+def default_cache_dir(path):
+    return os.path.join(os.path.dirname(os.path.abspath(path)), ".flo_cache")
+
+
+def file_fingerprint(path, cache_dir=None, block_size=1 << 20):
+    # sha256 özeti; (boyut, mtime) değişmediyse önceki hesaplanan özet kullanılır
+    cache_dir = default_cache_dir(path) if cache_dir is None else cache_dir
+    os.makedirs(cache_dir, exist_ok=True)
+    index_path = os.path.join(cache_dir, "fingerprints.json")
+    stat = os.stat(path)
+    key = os.path.abspath(path)
+
+    index = {}
+    if os.path.exists(index_path):
+        with open(index_path) as f:
+            index = json.load(f)
+    entry = index.get(key)
+    if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+        return entry["sha256"]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    index[key] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest.hexdigest()}
+    # aynı anda çalışan rfm / cltv süreçleri yarım yazılmış bir index görmesin
+    tmp = f"{index_path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp, index_path)
+    return index[key]["sha256"]
+
+
+def cache_path(path, cap_outliers=False, cache_dir=None):
+    cache_dir = default_cache_dir(path) if cache_dir is None else cache_dir
+    variant = "capped" if cap_outliers else "base"
+    stem = os.path.splitext(os.path.basename(path))[0]
+    digest = file_fingerprint(path, cache_dir)[:16]
+    return os.path.join(cache_dir, f"{stem}-{digest}-v{cache_version}-{variant}.parquet")
+
+
+def thresholds_path(target):
+    # baskılamada kullanılan limitler önbellek dosyasının yanında JSON olarak tutulur
+    return os.path.splitext(target)[0] + "-thresholds.json"
+
+
+def _write(dataframe, target):
+    # aynı kaynağın eski özetli / eski sürümlü önbelleklerini (ve limit dosyalarını) temizle;
+    # sadece tam olarak bu kaynak adı + özet deseni eşleşir ("flo" ve "flo-2021" birbirini silmez)
+    stem, digest, version, _ = os.path.basename(target).rsplit("-", 3)
+    pattern = re.compile(re.escape(stem) + r"-([0-9a-f]{16})(-v\d+)?-(base|capped)(-thresholds\.json|\.parquet)$")
+    for name in os.listdir(os.path.dirname(target)):
+        match = pattern.match(name)
+        if match and (match.group(1) != digest or match.group(2) != "-" + version):
+            os.remove(os.path.join(os.path.dirname(target), name))
+    tmp = f"{target}.{os.getpid()}.tmp"
+    dataframe.to_parquet(tmp, index=False)
+    os.replace(tmp, target)
+
+
+def load_prepared(path, columns=None, cap_outliers=False, cache_dir=None, refresh=False):
+    # Çıktı: hazırlanmış tablo (sadece istenen sütunlar)
+    target = cache_path(path, cap_outliers, cache_dir)
+    if refresh or not os.path.exists(target):
+        if cap_outliers:
+            dataframe = load_prepared(path, cache_dir=cache_dir, refresh=refresh)
+            thresholds = _cap_outliers(dataframe)
+            save_thresholds(thresholds, thresholds_path(target))
+            dataframe = prepare_flo_data(dataframe)
+        else:
+            dataframe = prepare_flo_data(load_flo_data(path))
+        _write(dataframe, target)
+    return pd.read_parquet(target, columns=columns, memory_map=True)
@@ -0,0 +1,150 @@
+###############################################################
+# Komut Satırı (headless batch)
+###############################################################
+# Kullanım:
+#   python flo_cli.py rfm  Flo_rfm_case/flo_data_20k.csv --output-dir out/
+#   python flo_cli.py cltv FLOCLTVPrediction/flo_data_20k.csv --output-dir out/ --analysis-date 2021-06-01
+#   python flo_cli.py cltv ... --diagnostics out/diagnostics   # describe/info çıktıları ve grafikler
+#   python flo_cli.py rfm ... --metrics-json - --prometheus /var/lib/node_exporter/flo.prom --profile-dir prof/
+#   python flo_cli.py cltv flo_data_big.csv --output-dir out/ --backend polars --work-dir work/
+#   python flo_cli.py summary Flo_rfm_case/flo_data_20k.csv --output-dir out/   # özet küpü + top listeler
+#   python flo_cli.py cltv ... --store-dir cltv_store/ && python flo_cli.py serve cltv_store/ --port 8080
+#   python flo_cli.py backtest orders.csv --output-dir out/ --n-cutoffs 6 --n-jobs 6   # sipariş geçmişiyle
+# Zamanlanmış çalıştırmalar hiçbir pencere açmaz; pandas dışındaki ağır modüller
+# (lifetimes, matplotlib) sadece ilgili alt komut / seçenek çalıştığında yüklenir.
+
+import argparse
+import sys
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="flo_cli.py", description="FLO RFM segmentasyonu ve CLTV tahmini")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_common(sub):
+        sub.add_argument("data", help="flo_data CSV dosyası")
+        sub.add_argument("--output-dir", default="output")
+        sub.add_argument("--analysis-date", default=None,
+                         help="YYYY-MM-DD (varsayılan: en son alışveriş tarihinden 2 gün sonrası)")
+        sub.add_argument("--diagnostics", default=None, metavar="DIR",
+                         help="tanılama çıktılarını (describe, info, grafikler) bu klasöre yaz")
+        sub.add_argument("--no-cache", action="store_true", help="Parquet önbelleğini kullanma")
+        sub.add_argument("--metrics-json", default=None, metavar="PATH",
+                         help='aşama metriklerini JSON satırları olarak yaz ("-" ise stderr)')
+        sub.add_argument("--prometheus", default=None, metavar="PATH",
+                         help="aşama metriklerini Prometheus textfile (.prom) olarak yaz")
+        sub.add_argument("--profile-dir", default=None, metavar="DIR",
+                         help="her aşamanın cProfile çıktısını bu klasöre yaz")
+        sub.add_argument("--backend", choices=["pandas", "polars"], default="pandas",
+                         help="polars: lazy/streaming motor (büyük dosyalar için, polars gerekli)")
+        sub.add_argument("--work-dir", default=None, metavar="DIR",
+                         help="polars backend'inde müşteri bazındaki ara tabloların Parquet klasörü")
+        sub.add_argument("--scoring", choices=["qcut", "sketch"], default="qcut",
+                         help="sketch: skorları birleştirilebilir quantile taslaklarıyla hesapla ve kesim "
+                              "noktalarını <output-dir>/*_scorers.json'a yaz (pandas backend'i)")
+
+    rfm = subparsers.add_parser("rfm", help="RFM metrikleri, skorları ve segmentleri")
+    add_common(rfm)
+    rfm.add_argument("--chunksize", type=int, default=None, metavar="ROWS",
+                     help="CSV'yi bu kadar satırlık parçalarla okuyup müşteri bazında topla (pandas backend'i, "
+                          "ham tablo belleğe alınmaz)")
+
+    cltv = subparsers.add_parser("cltv", help="BG/NBD + Gamma-Gamma ile CLTV tahmini")
+    add_common(cltv)
+    cltv.add_argument("--model-params", default=None,
+                      help="model parametre dosyası (varsayılan: <output-dir>/cltv_model_params.json)")
+    cltv.add_argument("--clv-time", type=int, default=6 * 4,
+                      help="customer_lifetime_value time parametresi (lifetimes'ta ay cinsinden)")
+    cltv.add_argument("--batch-size", type=int, default=250_000)
+    cltv.add_argument("--n-jobs", type=int, default=1)
+    cltv.add_argument("--chunksize", type=int, default=None, metavar="ROWS",
+                      help="CSV'yi bu kadar satırlık parçalarla oku; aykırı değer limitleri parçalar üzerinden "
+                           "quantile taslaklarıyla hesaplanır (pandas backend'i)")
+    cltv.add_argument("--store-dir", default=None, metavar="DIR",
+                      help="skor tablosunu sorgu servisi için bu klasöre yaz (bkz. serve)")
+    cltv.add_argument("--rfm", default=None, metavar="PATH",
+                      help="rfm çıktısı (rfm.csv ya da polars backend'inde rfm.parquet); RFM segmentleri "
+                           "store'a eklenir")
+    cltv.add_argument("--thresholds", default=None, metavar="PATH",
+                      help="aykırı değer limitlerini veriden hesaplamak yerine bu JSON'dan oku "
+                           "(ör. önceki çalıştırmanın <output-dir>/cltv_thresholds.json'u)")
+
+    summary = subparsers.add_parser("summary", help="rfm + cltv ve kanal x segment x cltv_segment özet küpü")
+    add_common(summary)
+    summary.add_argument("--top", type=int, default=10, help="top_<ölçü>.csv listelerindeki müşteri sayısı")
+    summary.add_argument("--store-dir", default=None, metavar="DIR",
+                         help="cltv skorlarını ve RFM segmentlerini sorgu servisi için bu klasöre yaz (bkz. serve)")
+
+    backtest = subparsers.add_parser("backtest", help="BG/NBD + Gamma-Gamma için geriye dönük test")
+    backtest.add_argument("data", help="sipariş geçmişi CSV dosyası (master_id, order_date, order_channel, "
+                                       "order_value)")
+    backtest.add_argument("--output-dir", default="output")
+    backtest.add_argument("--cutoffs", nargs="+", default=None, metavar="YYYY-MM-DD",
+                          help="kesim tarihleri (varsayılan: son siparişten geriye --n-cutoffs adet)")
+    backtest.add_argument("--n-cutoffs", type=int, default=4)
+    backtest.add_argument("--step-months", type=int, default=1)
+    backtest.add_argument("--penalizer", type=float, nargs="+", default=[0.001],
+                          help="BG/NBD penalizer_coef (birden fazla değer verilirse her biri denenir)")
+    backtest.add_argument("--ggf-penalizer", type=float, nargs="+", default=[0.01],
+                          help="Gamma-Gamma penalizer_coef (birden fazla değer verilirse her biri denenir)")
+    backtest.add_argument("--n-jobs", type=int, default=None)
+    backtest.add_argument("--no-cache", action="store_true", help="kalibrasyon tablolarını önbelleğe alma")
+    backtest.add_argument("--metrics-json", default=None, metavar="PATH",
+                          help='aşama metriklerini JSON satırları olarak yaz ("-" ise stderr)')
+
+    serve = subparsers.add_parser("serve", help="CLTV store'u için HTTP sorgu servisi")
+    serve.add_argument("store_dir", help="cltv --store-dir ile yazılmış klasör")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8080)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "serve":
+        from cltv_service import serve
+        print(f"serve: {args.store_dir} -> http://{args.host}:{args.port}")
+        serve(args.store_dir, args.host, args.port)
+        return 0
+
+    import pipelines
+    from stages import JsonLogHook, PrometheusTextfileHook, StageRecorder
+
+    hooks = []
+    if args.metrics_json:
+        hooks.append(JsonLogHook(args.metrics_json))
+    if args.command == "backtest":
+        results = pipelines.run_backtest(args.data, args.output_dir, cutoffs=args.cutoffs, n_cutoffs=args.n_cutoffs,
+                                         step_months=args.step_months, bgf_penalizer=args.penalizer,
+                                         ggf_penalizer=args.ggf_penalizer, n_jobs=args.n_jobs,
+                                         use_cache=not args.no_cache,
+                                         recorder=StageRecorder(args.command, hooks=hooks))
+        print(f"backtest: {len(results)} (penalizer, kesim tarihi) satırı -> {args.output_dir}")
+        return 0
+    if args.prometheus:
+        hooks.append(PrometheusTextfileHook(args.prometheus))
+    common = {"output_dir": args.output_dir,
+              "analysis_date": args.analysis_date,
+              "diagnostics_dir": args.diagnostics,
+              "use_cache": not args.no_cache,
+              "backend": args.backend,
+              "work_dir": args.work_dir,
+              "scoring": args.scoring,
+              "recorder": StageRecorder(args.command, hooks=hooks, profile_dir=args.profile_dir)}
+    if args.command == "rfm":
+        rfm = pipelines.run_rfm(args.data, chunksize=args.chunksize, **common)
+        print(f"rfm: {pipelines.count_rows(rfm)} müşteri -> {args.output_dir}")
+    elif args.command == "cltv":
+        cltv_final = pipelines.run_cltv(args.data, model_params=args.model_params, clv_time=args.clv_time,
+                                        batch_size=args.batch_size, n_jobs=args.n_jobs,
+                                        store_dir=args.store_dir, thresholds=args.thresholds,
+                                        chunksize=args.chunksize, rfm=args.rfm, **common)
+        print(f"cltv: {pipelines.count_rows(cltv_final)} müşteri -> {args.output_dir}")
+    elif args.command == "summary":
+        cube = pipelines.run_summary(args.data, top=args.top, store_dir=args.store_dir, **common)
+        print(f"summary: {len(cube)} hücre -> {args.output_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
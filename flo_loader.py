@@ -0,0 +1,126 @@
+###############################################################
+# Tipli Şema ile flo_data CSV Okuma (tam ve parça parça)
+###############################################################
+# pd.read_csv tipsiz okunduğunda tarih sütunları object kalıyor, kanallar uzun
+# string olarak tutuluyor, sayılar float64 oluyor. Şema burada bir kere tanımlanır:
+#   - tarih sütunları sabit "%Y-%m-%d" formatıyla okunma sırasında çevrilir
+#   - order_channel / last_order_channel kategorik
+#   - sipariş sayıları ve tutarlar float32
+# stream_customer_aggregates dosyayı parça parça okuyup her parçayı hemen müşteri bazında
+# toplar, böylece ham tablonun tamamı hiçbir zaman belleğe alınmaz (pipelines.run_rfm / run_cltv'nin
+# chunksize parametresi / flo_cli.py rfm|cltv --chunksize). Aykırı değer limitleri de
+# stream_outlier_thresholds ile ayrı bir geçişte parça parça hesaplanır.
+
+import sys
+import time
+
+import pandas as pd
+
+from outliers import cap_outliers, outlier_cols, streaming_outlier_thresholds
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+date_format = "%Y-%m-%d"
+date_cols = ["first_order_date", "last_order_date", "last_order_date_online", "last_order_date_offline"]
+
+flo_dtypes = {"master_id": "object",
+              "order_channel": "category",
+              "last_order_channel": "category",
+              "order_num_total_ever_online": "float32",
+              "order_num_total_ever_offline": "float32",
+              "customer_value_total_ever_offline": "float32",
+              "customer_value_total_ever_online": "float32",
+              "interested_in_categories_12": "object"}
+
+# müşteri bazındaki toplamlar için gereken sütunlar
+aggregate_cols = ["master_id", "first_order_date", "last_order_date",
+                  "order_num_total_ever_online", "order_num_total_ever_offline",
+                  "customer_value_total_ever_offline", "customer_value_total_ever_online"]
+
+
+def _read_csv(path, usecols=None, chunksize=None):
+    cols = flo_dtypes.keys() | set(date_cols) if usecols is None else usecols
+    return pd.read_csv(path,
+                       usecols=usecols,
+                       dtype={col: dtype for col, dtype in flo_dtypes.items() if col in cols},
+                       parse_dates=[col for col in date_cols if col in cols],
+                       date_format=date_format,
+                       chunksize=chunksize)
+
+
+def load_flo_data(path, usecols=None):
+    # Tüm dosyayı şemaya göre tek seferde okur (20k örnek veri gibi küçük dosyalar için)
+    return _read_csv(path, usecols=usecols)
+
+
+def peak_rss_mb():
+    if resource is None:
+        return float("nan")
+    # ru_maxrss linux'ta KB, macOS'ta byte cinsinden
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+
+def _reduce_chunk(chunk):
+    chunk = pd.DataFrame({"master_id": chunk["master_id"],
+                          "first_order_date": chunk["first_order_date"],
+                          "last_order_date": chunk["last_order_date"],
+                          "total_number_of_purchases": chunk["order_num_total_ever_online"] +
+                                                       chunk["order_num_total_ever_offline"],
+                          "total_price": chunk["customer_value_total_ever_offline"] +
+                                         chunk["customer_value_total_ever_online"]})
+    return _combine(chunk)
+
+
+def _combine(partials):
+    # aynı müşteri birden fazla parçada geçebilir: ilk tarih min, son tarih max, toplamlar sum
+    return partials.groupby("master_id", sort=False).agg(first_order_date=("first_order_date", "min"),
+                                                         last_order_date=("last_order_date", "max"),
+                                                         total_number_of_purchases=("total_number_of_purchases", "sum"),
+                                                         total_price=("total_price", "sum")).reset_index()
+
+
+def stream_outlier_thresholds(path, chunksize=1_000_000, cols=None):
+    # outliers.outlier_thresholds_frame'in parça parça okunan dosya için karşılığı
+    cols = outlier_cols if cols is None else list(cols)
+    return streaming_outlier_thresholds(_read_csv(path, usecols=cols, chunksize=chunksize), cols)
+
+
+def stream_customer_aggregates(path, chunksize=1_000_000, compact_every=8, verbose=False, thresholds=None):
+    # thresholds: verilirse ({sütun: [low_limit, up_limit]}) her parça toplanmadan önce
+    # outliers.cap_outliers ile baskılanır (FLO_CLTV_Prediction.py'deki sıra)
+    # Çıktı: (aggregates, stats)
+    #   aggregates: master_id başına first_order_date, last_order_date,
+    #               total_number_of_purchases, total_price
+    #               (rfm_metrics.compute_rfm / compute_cltv_df doğrudan kullanabilir)
+    #   stats: satır sayısı, süre, satır/sn ve tepe RSS (MB)
+    start = time.perf_counter()
+    n_rows = 0
+    partials = []
+    for i, chunk in enumerate(_read_csv(path, usecols=aggregate_cols, chunksize=chunksize), start=1):
+        n_rows += len(chunk)
+        if thresholds is not None:
+            cap_outliers(chunk, thresholds)
+        partials.append(_reduce_chunk(chunk))
+        # ara toplamları belli aralıklarla birleştirerek müşteri sayısıyla sınırlı tutuyoruz
+        if len(partials) >= compact_every:
+            partials = [_combine(pd.concat(partials, ignore_index=True))]
+        if verbose:
+            elapsed = time.perf_counter() - start
+            print(f"chunk {i}: {n_rows} satır, {n_rows / elapsed:,.0f} satır/sn, tepe RSS {peak_rss_mb():,.0f} MB")
+
+    if partials:
+        aggregates = _combine(pd.concat(partials, ignore_index=True))
+    else:
+        aggregates = pd.DataFrame(columns=["master_id", "first_order_date", "last_order_date",
+                                           "total_number_of_purchases", "total_price"])
+    elapsed = time.perf_counter() - start
+    stats = {"rows": n_rows,
+             "customers": len(aggregates),
+             "seconds": elapsed,
+             "rows_per_sec": n_rows / elapsed if elapsed > 0 else float("nan"),
+             "peak_rss_mb": peak_rss_mb()}
+    return aggregates, stats
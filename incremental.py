@@ -0,0 +1,194 @@
+###############################################################
+# Günlük Sipariş Değişimleriyle (delta) Artımlı RFM / CLTV Güncelleme
+###############################################################
+# rfm ve cltv_df'i tazelemenin tek yolu tüm müşteri dosyasını yeniden okuyup herkes için
+# recency, frequency, monetary, recency_cltv_weekly ve T_weekly'yi sabit bir today_date'e
+# göre yeniden hesaplamaktı. IncrementalState müşteri bazında bir durum tablosu tutar:
+#   - günün yeni siparişleri (delta) müşteri bazında toplanıp sadece o müşterilerin
+#     sayılarına, tutarlarına ve ilk/son tarihlerine eklenir (yeni müşteriler eklenir)
+#   - diğer tüm müşteriler için recency ve T tek bir vektörel kaydırma ile ileri alınır
+#   - recency/frequency/monetary skorları ve segment sadece değişen müşteriler için,
+#     son tam skorlamada kaydedilen kesim noktalarına (np.searchsorted) göre yeniden atanır;
+#     recency kesim noktaları da aynı gün farkı kadar kaydırılır, böylece değişmeyen
+#     müşterilerin skorları geçerli kalır
+# Kesim noktaları zamanla kayacağı için rescore() ile belli aralıklarla tam (pd.qcut)
+# skorlama yapılması önerilir. frequency_score tam skorlamada rank(method="first") ile
+# hesaplanıyor; artımlı güncellemede değer uzayındaki kesim noktaları kullanıldığı için
+# eşit frequency değerleri alt dilime düşer.
+#
+# Delta tablosu sütunları: master_id, order_date, order_channel, order_value
+# (isteğe bağlı order_num; yoksa her satır bir sipariş sayılır). order_channel == "Offline"
+# olan siparişler offline, diğerleri online sayılır.
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from rfm_segments import compile_seg_map, seg_map
+
+count_cols = ["order_num_total_ever_online", "order_num_total_ever_offline",
+              "customer_value_total_ever_offline", "customer_value_total_ever_online"]
+score_labels = {"recency": [5, 4, 3, 2, 1], "frequency": [1, 2, 3, 4, 5], "monetary": [1, 2, 3, 4, 5]}
+
+
+def _customer_totals(dataframe):
+    if dataframe["master_id"].is_unique:
+        state = dataframe.set_index("master_id")[["first_order_date", "last_order_date"] + count_cols]
+    else:
+        aggs = {"first_order_date": ("first_order_date", "min"), "last_order_date": ("last_order_date", "max")}
+        aggs.update({col: (col, "sum") for col in count_cols})
+        state = dataframe.groupby("master_id").agg(**aggs)
+    return state.astype({col: "float64" for col in count_cols})
+
+
+def delta_totals(delta):
+    offline = (delta["order_channel"] == "Offline").to_numpy()
+    num = delta["order_num"].to_numpy(dtype=float) if "order_num" in delta else np.ones(len(delta))
+    value = delta["order_value"].to_numpy(dtype=float)
+    frame = pd.DataFrame({"master_id": delta["master_id"].to_numpy(),
+                          "first_order_date": pd.to_datetime(delta["order_date"]).to_numpy(),
+                          "last_order_date": pd.to_datetime(delta["order_date"]).to_numpy(),
+                          "order_num_total_ever_online": np.where(offline, 0.0, num),
+                          "order_num_total_ever_offline": np.where(offline, num, 0.0),
+                          "customer_value_total_ever_offline": np.where(offline, value, 0.0),
+                          "customer_value_total_ever_online": np.where(offline, 0.0, value)})
+    return _customer_totals(frame) if len(frame) else frame.set_index("master_id")
+
+
+class IncrementalState:
+    def __init__(self, state, analysis_date, edges):
+        self.state = state
+        self.analysis_date = pd.Timestamp(analysis_date)
+        self.edges = edges
+        self.seg_table = compile_seg_map(seg_map)
+
+    @classmethod
+    def build(cls, dataframe, analysis_date):
+        # Tam hesaplama: hazırlanmış müşteri tablosundan (load_prepared çıktısı gibi)
+        state = _customer_totals(dataframe)
+        self = cls(state, analysis_date, {})
+        self._update_metrics()
+        self.rescore()
+        return self
+
+    def _update_metrics(self, rows=None):
+        # rows verilmezse tüm müşteriler için, verilirse sadece o satırlar için hesaplar
+        state = self.state
+        full = rows is None
+        rows = slice(None) if full else rows
+        analysis_date = np.datetime64(self.analysis_date, "ns")
+        counts = state[count_cols].to_numpy()[rows]
+        values = {"recency": (analysis_date - state["last_order_date"].to_numpy()[rows]) // np.timedelta64(1, "D"),
+                  "T": (analysis_date - state["first_order_date"].to_numpy()[rows]) // np.timedelta64(1, "D"),
+                  "frequency": counts[:, 0] + counts[:, 1],
+                  "monetary": counts[:, 2] + counts[:, 3]}
+        for col, value in values.items():
+            if full:
+                state[col] = value
+            else:
+                column = state[col].to_numpy().copy()
+                column[rows] = value
+                state[col] = column
+
+    def rescore(self):
+        # Tam skorlama (FLO_RFM.py ile aynı pd.qcut tanımları), kesim noktaları kaydedilir
+        state = self.state
+        _, recency_edges = pd.qcut(state["recency"], 5, retbins=True)
+        state["recency_score"] = pd.qcut(state["recency"], 5, labels=score_labels["recency"]).astype("int8")
+        state["frequency_score"] = pd.qcut(state["frequency"].rank(method="first"), 5,
+                                           labels=score_labels["frequency"]).astype("int8")
+        _, monetary_edges = pd.qcut(state["monetary"], 5, retbins=True)
+        state["monetary_score"] = pd.qcut(state["monetary"], 5, labels=score_labels["monetary"]).astype("int8")
+        self.edges = {"recency": recency_edges[1:-1].tolist(),
+                      "frequency": np.quantile(state["frequency"], [0.2, 0.4, 0.6, 0.8]).tolist(),
+                      "monetary": monetary_edges[1:-1].tolist()}
+        self._assign_segments(np.arange(len(state)))
+
+    def _score(self, metric, values):
+        bins = np.searchsorted(np.asarray(self.edges[metric]), values, side="left")
+        return np.asarray(score_labels[metric], dtype=np.int8)[bins]
+
+    def _assign_segments(self, rows):
+        table, labels = self.seg_table
+        state = self.state
+        codes = table[state["recency_score"].to_numpy()[rows] - 1, state["frequency_score"].to_numpy()[rows] - 1]
+        if "segment" in state:
+            segment = state["segment"].cat.codes.to_numpy().copy()
+            segment[rows] = codes
+        else:
+            segment = codes
+        state["segment"] = pd.Categorical.from_codes(segment, categories=labels)
+
+    def apply_delta(self, delta, analysis_date):
+        # Çıktı: değişen (yeni ya da güncellenen) müşterilerin master_id'leri
+        analysis_date = pd.Timestamp(analysis_date)
+        shift = (analysis_date - self.analysis_date).days
+
+        # herkes için tek vektörel kaydırma
+        state = self.state
+        state["recency"] += shift
+        state["T"] += shift
+        self.edges["recency"] = [edge + shift for edge in self.edges["recency"]]
+        self.analysis_date = analysis_date
+
+        totals = delta_totals(delta)
+        if len(totals) == 0:
+            return totals.index
+
+        positions = state.index.get_indexer(totals.index)
+        known = positions >= 0
+        if known.any():
+            rows, updates = positions[known], totals[known]
+            counts = state[count_cols].to_numpy()
+            counts[rows] += updates[count_cols].to_numpy()
+            state[count_cols] = counts
+            first = state["first_order_date"].to_numpy().copy()
+            last = state["last_order_date"].to_numpy().copy()
+            first[rows] = np.minimum(first[rows], updates["first_order_date"].to_numpy())
+            last[rows] = np.maximum(last[rows], updates["last_order_date"].to_numpy())
+            state["first_order_date"], state["last_order_date"] = first, last
+        if (~known).any():
+            # yeni müşteriler; türetilen sütunlar aşağıda dokunulan satırlar için hesaplanıyor
+            new = totals[~known].reindex(columns=state.columns)
+            derived = [col for col in state.columns if col not in totals.columns and col != "segment"]
+            new = new.fillna({col: 0 for col in derived}).astype(state.dtypes.to_dict())
+            self.state = pd.concat([state, new])
+
+        touched = self.state.index.get_indexer(totals.index)
+        self._update_metrics(touched)
+        for metric in ("recency", "frequency", "monetary"):
+            scores = self.state[f"{metric}_score"].to_numpy().copy()
+            scores[touched] = self._score(metric, self.state[metric].to_numpy()[touched])
+            self.state[f"{metric}_score"] = scores.astype(np.int8)
+        self.state = self.state.astype({"recency": "int64", "T": "int64"})
+        self._assign_segments(touched)
+        return totals.index
+
+    def rfm(self):
+        # FLO_RFM.py'deki rfm tablosunun karşılığı
+        return self.state[["recency", "frequency", "monetary",
+                           "recency_score", "frequency_score", "monetary_score", "segment"]]
+
+    def cltv_df(self):
+        # rfm_metrics.compute_cltv_df çıktısının karşılığı
+        state = self.state[self.state["frequency"] > 1]
+        return pd.DataFrame({"recency_cltv_weekly": (state["last_order_date"] - state["first_order_date"]).dt.days / 7,
+                             "T_weekly": state["T"] / 7,
+                             "frequency": state["frequency"].astype(int),
+                             "monetary_cltv_avg": state["monetary"] / state["frequency"]})
+
+    def save(self, path):
+        # path: durum tablosu için .parquet; kesim noktaları ve analiz tarihi yanında .json
+        tmp = path + ".tmp"
+        self.state.to_parquet(tmp)
+        os.replace(tmp, path)
+        with open(os.path.splitext(path)[0] + ".json", "w") as f:
+            json.dump({"analysis_date": self.analysis_date.isoformat(), "edges": self.edges}, f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(os.path.splitext(path)[0] + ".json") as f:
+            meta = json.load(f)
+        return cls(pd.read_parquet(path), meta["analysis_date"], meta["edges"])
@@ -0,0 +1,102 @@
+###############################################################
+# Aykırı Değerlerin Baskılanması
+###############################################################
+# Not: cltv hesaplanırken frequency değerleri integer olması gerekmektedir.
+# Bu nedenle alt ve üst limitler round() ile yuvarlanıyor.
+
+import json
+
+import numpy as np
+
+from quantile_sketch import QuantileSketch
+
+outlier_cols = ["order_num_total_ever_online", "order_num_total_ever_offline",
+                "customer_value_total_ever_offline", "customer_value_total_ever_online"]
+
+
+def outlier_thresholds(dataframe, variable):
+    quartile1 = dataframe[variable].quantile(0.01)
+    quartile3 = dataframe[variable].quantile(0.99)
+    interquantile_range = quartile3 - quartile1
+    up_limit = quartile3 + 1.5 * interquantile_range
+    low_limit = quartile1 - 1.5 * interquantile_range
+    return low_limit, up_limit
+
+
+def replace_with_thresholds(dataframe, variable):
+    low_limit, up_limit = outlier_thresholds(dataframe, variable)
+    dataframe.loc[(dataframe[variable] < low_limit), variable] = round(low_limit)
+    dataframe.loc[(dataframe[variable] > up_limit), variable] = round(up_limit)
+
+
+###############################################################
+# Tek Geçişte Çok Sütunlu Baskılama
+###############################################################
+# replace_with_thresholds her sütun için quantile'ı iki kez ayrı ayrı hesaplayıp iki
+# .loc yazması yapıyor. Aşağıdaki fonksiyonlar tüm sütunların 1%/99% quantile'larını
+# tek çağrıda hesaplar ve tüm sütunları tek bir vektörel işlemle baskılar.
+# Kullanılan limitler sözlük olarak döner ({sütun: [low_limit, up_limit]}), JSON'a
+# kaydedilip sonraki skorlama partilerinde aynen kullanılabilir (pipelines.run_cltv her
+# çalıştırmada output_dir/cltv_thresholds.json yazar, flo_cli.py cltv --thresholds ile okunur).
+# Parça parça okunan büyük dosyalar için streaming_outlier_thresholds limitleri parçalar
+# üzerinden birleştirilebilir quantile taslaklarıyla hesaplar (flo_loader.stream_outlier_thresholds,
+# flo_cli.py cltv --chunksize); polars backend'i polars_engine.outlier_thresholds ile tam hesaplar.
+
+
+def iqr_limits(quartile1, quartile3):
+    # outlier_thresholds ile aynı formül: quartile'lar arası farkın 1.5 katı kadar dışarısı
+    interquantile_range = quartile3 - quartile1
+    return quartile1 - 1.5 * interquantile_range, quartile3 + 1.5 * interquantile_range
+
+
+def outlier_thresholds_frame(dataframe, cols=None, q1=0.01, q3=0.99):
+    cols = outlier_cols if cols is None else list(cols)
+    quantiles = dataframe[cols].quantile([q1, q3])
+    low_limits, up_limits = iqr_limits(quantiles.loc[q1].to_numpy(), quantiles.loc[q3].to_numpy())
+    return {col: [float(low), float(up)] for col, low, up in zip(cols, low_limits, up_limits)}
+
+
+def streaming_outlier_thresholds(chunks, cols=None, q1=0.01, q3=0.99, compression=500, max_exact=50_000):
+    # Parça parça gelen veri için (ör. pd.read_csv(..., chunksize=...)) limitler; sütunlar hiçbir
+    # zaman tamamen sıralanmaz. Farklı değer sayısı max_exact'i geçmeyen sütunlarda (sipariş
+    # sayıları gibi) sonuç outlier_thresholds_frame ile aynıdır. Geçen sütunlarda t-digest
+    # merkezleri kuyruklarda küçük tutulduğu için 1% / 99% quantile'larının sıra (rank) hatası
+    # 1e-4'ün altında kalır.
+    cols = outlier_cols if cols is None else list(cols)
+    sketches = {col: QuantileSketch(compression, max_exact) for col in cols}
+    for chunk in chunks:
+        for col in cols:
+            sketches[col].update(chunk[col].to_numpy())
+    thresholds = {}
+    for col, sketch in sketches.items():
+        quartile1, quartile3 = sketch.quantile([q1, q3])
+        low, up = iqr_limits(quartile1, quartile3)
+        thresholds[col] = [float(low), float(up)]
+    return thresholds
+
+
+def cap_outliers(dataframe, thresholds=None, cols=None):
+    # thresholds verilmezse veriden hesaplanır; verilirse (ör. load_thresholds ile) aynen kullanılır.
+    # replace_with_thresholds ile aynı sonuç: limit dışındaki değerler round(limit) olur.
+    if thresholds is None:
+        thresholds = outlier_thresholds_frame(dataframe, cols)
+    cols = list(thresholds)
+    limits = np.array([thresholds[col] for col in cols])
+    low_limits, up_limits = limits[:, 0], limits[:, 1]
+
+    values = dataframe[cols].to_numpy()
+    capped = np.where(values < low_limits, np.round(low_limits),
+                      np.where(values > up_limits, np.round(up_limits), values))
+    for i, col in enumerate(cols):
+        dataframe[col] = capped[:, i].astype(dataframe[col].dtype, copy=False)
+    return thresholds
+
+
+def save_thresholds(thresholds, path):
+    with open(path, "w") as f:
+        json.dump(thresholds, f, indent=2)
+
+
+def load_thresholds(path):
+    with open(path) as f:
+        return json.load(f)
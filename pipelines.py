@@ -0,0 +1,424 @@
+###############################################################
+# RFM ve CLTV Toplu (Batch) Akışları
+###############################################################
+# FLO_RFM.py ve FLO_CLTV_Prediction.py'nin sonuç üreten adımlarının fonksiyon hali.
+# Keşif amaçlı ifadeler (head, describe, info, sort_values(...).head()) ve grafikler
+# burada yoktur; tanılama çıktıları sadece diagnostics_dir verilirse dosyaya yazılır.
+# flo_cli.py bu fonksiyonları "rfm", "cltv", "summary" ve "backtest" alt komutlarıyla çalıştırır.
+
+import os
+import tempfile
+from contextlib import contextmanager
+
+import pandas as pd
+
+from flo_cache import cache_path, default_cache_dir, load_prepared, prepare_flo_data, thresholds_path
+from flo_loader import load_flo_data, stream_customer_aggregates, stream_outlier_thresholds
+from outliers import cap_outliers as _cap_outliers, load_thresholds, save_thresholds
+from rfm_metrics import compute_rfm, compute_cltv_df
+from rfm_segments import assign_segments, compile_seg_map, seg_map
+from stages import StageRecorder
+
+rfm_score_labels = {"recency_score": [5, 4, 3, 2, 1],
+                    "frequency_score": [1, 2, 3, 4, 5],
+                    "monetary_score": [1, 2, 3, 4, 5]}
+cltv_segment_labels = ["D", "C", "B", "A"]
+
+
+def load_customers(path, cap_outliers=False, use_cache=True):
+    if use_cache:
+        return load_prepared(path, cap_outliers=cap_outliers)
+    return prepare_flo_data(load_flo_data(path), cap_outliers=cap_outliers)
+
+
+def count_rows(table):
+    # pandas tablosu ya da backend="polars" akışlarının döndürdüğü LazyFrame
+    if isinstance(table, pd.DataFrame):
+        return len(table)
+    import polars_engine as pe
+    return pe.count_rows(table)
+
+
+def default_analysis_date(dataframe):
+    # Veri setindeki en son alışverişin yapıldığı tarihten 2 gün sonrası
+    return dataframe["last_order_date"].max() + pd.Timedelta(days=2)
+
+
+def _row_partitions(dataframe, rows=250_000):
+    return [dataframe.iloc[start:start + rows] for start in range(0, len(dataframe), rows)]
+
+
+def _check_scoring(scoring):
+    # polars backend'i kesim noktalarını zaten plan içinde tam quantile'larla hesaplıyor
+    if scoring != "qcut":
+        raise ValueError(f"scoring={scoring!r} sadece pandas backend'inde kullanılabilir")
+
+
+def _pandas_rfm(path, analysis_date, use_cache, recorder, chunksize=None, scoring="qcut"):
+    with recorder.stage("preparation") as stage:
+        if chunksize is None:
+            df = load_customers(path, use_cache=use_cache)
+        else:
+            df, stats = stream_customer_aggregates(path, chunksize=chunksize)
+            stage.rows_in = stats["rows"]
+        stage.rows_out = len(df)
+    analysis_date = default_analysis_date(df) if analysis_date is None else pd.Timestamp(analysis_date)
+
+    with recorder.stage("groupby_aggregation", rows_in=len(df)) as stage:
+        rfm = compute_rfm(df, analysis_date)
+        stage.rows_out = len(rfm)
+    scorers = None
+    with recorder.stage("qcut_scoring", rows_in=len(rfm)) as stage:
+        if scoring == "sketch":
+            from quantile_scoring import fit_scorers, rfm_score_specs, score_frame
+            scorers = fit_scorers(_row_partitions(rfm), rfm_score_specs)
+            rfm = score_frame(rfm, scorers)
+        else:
+            rfm["recency_score"] = pd.qcut(rfm["recency"], 5, labels=rfm_score_labels["recency_score"])
+            rfm["frequency_score"] = pd.qcut(rfm["frequency"].rank(method="first"), 5,
+                                             labels=rfm_score_labels["frequency_score"])
+            rfm["monetary_score"] = pd.qcut(rfm["monetary"], 5, labels=rfm_score_labels["monetary_score"])
+        stage.rows_out = len(rfm)
+    return df, rfm, scorers
+
+
+@contextmanager
+def _polars_work_dir(work_dir, output_dir):
+    # polars backend'inin ara Parquet tabloları: work_dir verilmezse output_dir içinde geçici
+    # bir klasör (sistemin /tmp'si bellek üzerinde olabilir), iş bitince silinir
+    if work_dir is not None:
+        yield work_dir
+        return
+    os.makedirs(output_dir, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix=".polars-work-", dir=output_dir) as tmp:
+        yield tmp
+
+
+def _polars_rfm(path, output_dir, analysis_date, work_dir, recorder):
+    # polars_engine: CSV sadece gereken sütunlarıyla okunur, her ara tablo Parquet'e akıtılır;
+    # sonuç output_dir/rfm.parquet, CSV'ler oradan parti parti yazılır
+    import polars_engine as pe
+    with _polars_work_dir(work_dir, output_dir) as work_dir:
+        with recorder.stage("preparation"):
+            lf = pe.prepare(pe.scan_flo(path, pe.rfm_cols))
+        analysis_date = pe.default_analysis_date(lf) if analysis_date is None else pd.Timestamp(analysis_date)
+
+        with recorder.stage("groupby_aggregation") as stage:
+            rfm = pe.materialize(pe.rfm_plan(lf, analysis_date), work_dir, "rfm")
+            stage.rows_out = pe.count_rows(rfm)
+        with recorder.stage("qcut_scoring", rows_in=stage.rows_out) as stage:
+            rfm = pe.materialize(pe.score_rfm(rfm, rfm_score_labels), work_dir, "rfm_scored")
+            stage.rows_out = pe.count_rows(rfm)
+        with recorder.stage("seg_map_segmentation", rows_in=stage.rows_out) as stage:
+            rfm = pe.materialize(pe.segment_rfm(rfm, compile_seg_map(seg_map)), output_dir, "rfm")
+            stage.rows_out = pe.count_rows(rfm)
+
+    with recorder.stage("csv_export", rows_in=stage.rows_out):
+        pe.write_csv(rfm, os.path.join(output_dir, "rfm.csv"))
+        pe.group_means(rfm, "segment", ["recency", "frequency", "monetary"]).to_csv(
+            os.path.join(output_dir, "rfm_segment_summary.csv"))
+    return rfm
+
+
+def run_rfm(path, output_dir, analysis_date=None, diagnostics_dir=None, use_cache=True, recorder=None,
+            backend="pandas", work_dir=None, chunksize=None, scoring="qcut"):
+    # Çıktı: rfm tablosu; output_dir/rfm.csv ve output_dir/rfm_segment_summary.csv yazılır
+    # recorder: stages.StageRecorder (aşama süreleri / metrikleri için)
+    # chunksize: verilirse (pandas) CSV bu kadar satırlık parçalarla okunup her parça hemen
+    # müşteri bazında toplanır (flo_loader.stream_customer_aggregates); önbellek kullanılmaz.
+    # Aynı müşteri birden fazla satırda geçiyorsa toplamları birleştirilir.
+    # scoring="sketch" (pandas): skorlar pd.qcut yerine parça bazında birleştirilebilir quantile
+    # taslaklarıyla (quantile_scoring) hesaplanır, sonuç pd.qcut ile aynıdır; kesim noktaları
+    # yeni müşterileri skorlamak için output_dir/rfm_scorers.json'a yazılır.
+    # backend="polars": hazırlık, toplama, skorlama ve segmentasyon polars_engine ile, tablolar
+    # bellek yerine Parquet'te (Parquet önbelleği kullanılmaz; work_dir verilirse ara tablolar
+    # orada kalır). Çıktı output_dir/rfm.parquet'i okuyan polars LazyFrame'dir.
+    recorder = StageRecorder("rfm") if recorder is None else recorder
+    scorers = None
+    if backend == "polars":
+        _check_scoring(scoring)
+        df, rfm = None, _polars_rfm(path, output_dir, analysis_date, work_dir, recorder)
+    elif backend == "pandas":
+        df, rfm, scorers = _pandas_rfm(path, analysis_date, use_cache, recorder, chunksize, scoring)
+        with recorder.stage("seg_map_segmentation", rows_in=len(rfm)) as stage:
+            rfm["segment"] = assign_segments(rfm["recency_score"], rfm["frequency_score"],
+                                             compile_seg_map(seg_map))
+            stage.rows_out = len(rfm)
+
+        with recorder.stage("csv_export", rows_in=len(rfm)) as stage:
+            os.makedirs(output_dir, exist_ok=True)
+            rfm.to_csv(os.path.join(output_dir, "rfm.csv"))
+            summary = rfm.groupby("segment", observed=True).agg({"recency": "mean",
+                                                                 "frequency": "mean",
+                                                                 "monetary": "mean"})
+            summary.to_csv(os.path.join(output_dir, "rfm_segment_summary.csv"))
+            if scorers is not None:
+                from quantile_scoring import save_scorers
+                save_scorers(scorers, os.path.join(output_dir, "rfm_scorers.json"))
+            stage.rows_out = len(rfm)
+    else:
+        raise ValueError(f"bilinmeyen backend: {backend}")
+
+    if diagnostics_dir is not None:
+        from diagnostics import write_frame_summary, write_memory_report
+        if df is not None:
+            write_frame_summary(df, diagnostics_dir, "customers")
+            write_memory_report(df, diagnostics_dir, "customers")
+        write_frame_summary(rfm, diagnostics_dir, "rfm")
+    return rfm
+
+
+def _pandas_cltv_df(path, analysis_date, use_cache, recorder, thresholds=None, chunksize=None):
+    # thresholds verilirse baskılanmış önbellek yerine baskılanmamış tablo bu limitlerle baskılanır
+    # chunksize verilirse limitler bir geçişte parça parça hesaplanır, ikinci geçişte her parça
+    # baskılanıp müşteri bazında toplanır (önbellek kullanılmaz)
+    capped_cache = use_cache and thresholds is None and chunksize is None
+    if chunksize is not None:
+        if thresholds is None:
+            with recorder.stage("replace_with_thresholds"):
+                thresholds = stream_outlier_thresholds(path, chunksize)
+        with recorder.stage("preparation") as stage:
+            df, stats = stream_customer_aggregates(path, chunksize=chunksize, thresholds=thresholds)
+            stage.rows_in = stats["rows"]
+            stage.rows_out = len(df)
+    else:
+        with recorder.stage("preparation") as stage:
+            df = load_customers(path, cap_outliers=capped_cache, use_cache=use_cache)
+            stage.rows_out = len(df)
+        if capped_cache:
+            thresholds = load_thresholds(thresholds_path(cache_path(path, cap_outliers=True)))
+        else:
+            with recorder.stage("replace_with_thresholds", rows_in=len(df)) as stage:
+                thresholds = _cap_outliers(df, thresholds)
+                df = prepare_flo_data(df)
+                stage.rows_out = len(df)
+    analysis_date = default_analysis_date(df) if analysis_date is None else pd.Timestamp(analysis_date)
+
+    with recorder.stage("groupby_aggregation", rows_in=len(df)) as stage:
+        cltv_df = compute_cltv_df(df, analysis_date)
+        stage.rows_out = len(cltv_df)
+    return df, cltv_df, thresholds
+
+
+def _rfm_segments(rfm, backend):
+    # build_store'un beklediği biçim: pandas'ta master_id index'li, polars'ta LazyFrame.
+    # CSV'den okunan segmentler seg_map sırasındaki etiketlere çevrilir (run_rfm çıktısıyla aynı)
+    if not isinstance(rfm, (str, os.PathLike)):
+        return rfm
+    parquet = str(rfm).endswith(".parquet")
+    labels = compile_seg_map(seg_map)[1]
+    if backend == "polars":
+        import polars as pl
+        if parquet:
+            return pl.scan_parquet(rfm).select("master_id", "segment")
+        return pl.scan_csv(rfm).select("master_id", pl.col("segment").cast(pl.Enum(labels)))
+    if parquet:
+        return pd.read_parquet(rfm, columns=["master_id", "segment"]).set_index("master_id")
+    return pd.read_csv(rfm, usecols=["master_id", "segment"], index_col="master_id",
+                       dtype={"segment": pd.CategoricalDtype(labels)})
+
+
+def _fit_models(model_store, cltv_df, recorder):
+    with recorder.stage("bgf_fit", rows_in=len(cltv_df)):
+        bgf = model_store.fit_bgf(cltv_df["frequency"], cltv_df["recency_cltv_weekly"], cltv_df["T_weekly"],
+                                  penalizer_coef=0.001)
+    with recorder.stage("ggf_fit", rows_in=len(cltv_df)):
+        ggf = model_store.fit_ggf(cltv_df["frequency"], cltv_df["monetary_cltv_avg"], penalizer_coef=0.01)
+    return bgf, ggf
+
+
+def _polars_cltv(path, output_dir, analysis_date, model_store, clv_time, work_dir, recorder, thresholds=None):
+    # müşteri tablosu Parquet'te kalır; belleğe sadece fit için gereken dört sütun alınır.
+    # Sonuç output_dir/cltv.parquet, CSV'ler oradan parti parti yazılır.
+    import polars_engine as pe
+    with _polars_work_dir(work_dir, output_dir) as work_dir:
+        with recorder.stage("preparation"):
+            lf = pe.scan_flo(path, pe.cltv_cols)
+        with recorder.stage("replace_with_thresholds"):
+            thresholds = pe.outlier_thresholds(lf) if thresholds is None else thresholds
+            lf = pe.prepare(lf, thresholds)
+        analysis_date = pe.default_analysis_date(lf) if analysis_date is None else pd.Timestamp(analysis_date)
+
+        with recorder.stage("groupby_aggregation") as stage:
+            customers = pe.materialize(pe.cltv_plan(lf, analysis_date), work_dir, "cltv")
+            fit_df = pe.fit_columns(customers)
+            stage.rows_out = len(fit_df)
+        bgf, ggf = _fit_models(model_store, fit_df, recorder)
+        rows = len(fit_df)
+        del fit_df
+
+        with recorder.stage("customer_lifetime_value", rows_in=rows) as stage:
+            scored = pe.materialize(pe.score_cltv(customers, bgf, ggf, clv_time=clv_time, freq="W",
+                                                  discount_rate=0.01), work_dir, "cltv_scored")
+            stage.rows_out = rows
+        with recorder.stage("qcut_scoring", rows_in=rows) as stage:
+            cltv_final = pe.materialize(pe.segment_cltv(scored, cltv_segment_labels), output_dir, "cltv")
+            stage.rows_out = rows
+
+    with recorder.stage("csv_export", rows_in=rows) as stage:
+        pe.write_csv(cltv_final, os.path.join(output_dir, "cltv.csv"))
+        pe.group_means(cltv_final, "cltv_segment", ["recency_cltv_weekly", "frequency", "monetary_cltv_avg"]
+                       ).to_csv(os.path.join(output_dir, "cltv_segment_summary.csv"))
+        stage.rows_out = rows
+    return cltv_final, bgf, thresholds
+
+
+def run_cltv(path, output_dir, analysis_date=None, model_params=None, diagnostics_dir=None,
+             use_cache=True, clv_time=6 * 4, batch_size=250_000, n_jobs=1, recorder=None,
+             backend="pandas", work_dir=None, store_dir=None, thresholds=None, scoring="qcut", chunksize=None,
+             rfm=None):
+    # Çıktı: cltv_final tablosu; output_dir/cltv.csv ve output_dir/cltv_segment_summary.csv yazılır
+    # model_params: CLTVModelStore dosyası (varsayılan output_dir/cltv_model_params.json)
+    # Önbellek kullanılıyorsa aykırı değerler önbellekte baskılanmış olarak geldiği için
+    # replace_with_thresholds ayrı bir aşama olarak görünmez.
+    # backend="polars": hazırlık, baskılama, toplama, skorlama ve segmentasyon polars_engine ile,
+    # tablolar Parquet'te; modeller CLTVModelStore ile sadece fit sütunları üzerinde fit edilir.
+    # Çıktı output_dir/cltv.parquet'i okuyan polars LazyFrame'dir.
+    # store_dir: verilirse skor tablosu cltv_service.CLTVStore'un açabileceği biçimde yazılır
+    # rfm: run_rfm çıktısı ya da rfm.csv / rfm.parquet yolu; verilirse RFM segmentleri de store'a
+    # eklenir (/top?segment=segment:champions)
+    # thresholds: aykırı değer limitleri JSON dosyası (ör. önceki bir çalıştırmanın
+    # output_dir/cltv_thresholds.json'u); verilmezse veriden hesaplanır. Kullanılan limitler her
+    # çalıştırmada output_dir/cltv_thresholds.json'a yazılır, böylece sonraki skorlama partileri
+    # aynı limitlerle baskılanabilir.
+    # chunksize (pandas): CSV parça parça okunur; aykırı değer limitleri parçalar üzerinden
+    # quantile taslaklarıyla hesaplanır (outliers.streaming_outlier_thresholds), ham tablo
+    # belleğe alınmaz.
+    # scoring="sketch" (pandas): cltv_segment pd.qcut yerine quantile_scoring ile (skor partileri
+    # üzerinden n_jobs işçiyle) hesaplanır; kesim noktaları output_dir/cltv_scorers.json'a yazılır.
+    from cltv_model import CLTVModelStore
+    from cltv_scoring import score_customers
+
+    recorder = StageRecorder("cltv") if recorder is None else recorder
+    os.makedirs(output_dir, exist_ok=True)
+    model_params = os.path.join(output_dir, "cltv_model_params.json") if model_params is None else model_params
+    model_store = CLTVModelStore(model_params)
+    thresholds = None if thresholds is None else load_thresholds(thresholds)
+    if backend == "polars":
+        _check_scoring(scoring)
+        df = None
+        cltv_final, bgf, thresholds = _polars_cltv(path, output_dir, analysis_date, model_store, clv_time,
+                                                   work_dir, recorder, thresholds)
+    elif backend == "pandas":
+        df, cltv_df, thresholds = _pandas_cltv_df(path, analysis_date, use_cache, recorder, thresholds,
+                                                  chunksize)
+        bgf, ggf = _fit_models(model_store, cltv_df, recorder)
+        with recorder.stage("customer_lifetime_value", rows_in=len(cltv_df)) as stage:
+            cltv_final = score_customers(cltv_df, bgf, ggf, batch_size=batch_size, n_jobs=n_jobs,
+                                         clv_time=clv_time, freq="W", discount_rate=0.01)
+            stage.rows_out = len(cltv_final)
+        with recorder.stage("qcut_scoring", rows_in=len(cltv_final)) as stage:
+            if scoring == "sketch":
+                from quantile_scoring import cltv_score_specs, fit_scorers, save_scorers, score_frame
+                scorers = fit_scorers(_row_partitions(cltv_final, batch_size), cltv_score_specs, n_jobs=n_jobs)
+                cltv_final = score_frame(cltv_final, scorers)
+                save_scorers(scorers, os.path.join(output_dir, "cltv_scorers.json"))
+            else:
+                cltv_final["cltv_segment"] = pd.qcut(cltv_final["clv"], 4, labels=cltv_segment_labels)
+            stage.rows_out = len(cltv_final)
+
+        with recorder.stage("csv_export", rows_in=len(cltv_final)) as stage:
+            cltv_final.to_csv(os.path.join(output_dir, "cltv.csv"))
+            summary = cltv_final.groupby("cltv_segment", observed=True).agg({"recency_cltv_weekly": "mean",
+                                                                             "frequency": "mean",
+                                                                             "monetary_cltv_avg": "mean"})
+            summary.to_csv(os.path.join(output_dir, "cltv_segment_summary.csv"))
+            stage.rows_out = len(cltv_final)
+    else:
+        raise ValueError(f"bilinmeyen backend: {backend}")
+    save_thresholds(thresholds, os.path.join(output_dir, "cltv_thresholds.json"))
+
+    if store_dir is not None:
+        from cltv_service import build_store
+        with recorder.stage("store_export") as stage:
+            build_store(cltv_final, store_dir, model_params=model_params, rfm=_rfm_segments(rfm, backend),
+                        scoring={"clv_time": clv_time})
+            stage.rows_out = count_rows(cltv_final)
+
+    if diagnostics_dir is not None:
+        from diagnostics import save_boxplots, save_period_transactions, write_frame_summary, write_memory_report
+        if df is not None:
+            write_frame_summary(df, diagnostics_dir, "customers")
+            write_memory_report(df, diagnostics_dir, "customers")
+            save_boxplots(df, diagnostics_dir)
+        write_frame_summary(cltv_final, diagnostics_dir, "cltv")
+        save_period_transactions(bgf, diagnostics_dir)
+    return cltv_final
+
+
+def run_summary(path, output_dir, analysis_date=None, diagnostics_dir=None, use_cache=True, recorder=None,
+                backend="pandas", work_dir=None, top=10, scoring="qcut", **cltv_kwargs):
+    # rfm ve cltv akışlarını çalıştırır, ardından kanal x segment x cltv_segment özet küpünü
+    # output_dir/summary_cube.parquet ve ilk `top` müşteri listelerini top_<ölçü>.csv olarak yazar
+    # cltv_kwargs: run_cltv'nin diğer parametreleri (model_params, clv_time, store_dir, ...); store_dir
+    # verilirse store'a RFM segmentleri de eklenir
+    # backend="polars": küp ve top listeleri Parquet'teki rfm / cltv tablolarından lazy hesaplanır
+    from summary_cube import build_cube, cube_dims, cube_measures, save_cube, top_k
+
+    recorder = StageRecorder("summary") if recorder is None else recorder
+
+    def sub_recorder(pipeline):
+        # rfm / cltv aşamaları kendi pipeline isimleriyle aynı hook'lara gider
+        return StageRecorder(pipeline, hooks=recorder.hooks, profile_dir=recorder.profile_dir,
+                             sample_interval=recorder.sample_interval)
+
+    common = {"analysis_date": analysis_date, "diagnostics_dir": diagnostics_dir, "use_cache": use_cache,
+              "backend": backend, "work_dir": work_dir, "scoring": scoring}
+    rfm = run_rfm(path, output_dir, recorder=sub_recorder("rfm"), **common)
+    cltv_final = run_cltv(path, output_dir, recorder=sub_recorder("cltv"), rfm=rfm, **common, **cltv_kwargs)
+
+    if backend == "polars":
+        import polars_engine as pe
+        with recorder.stage("summary_cube") as stage:
+            customers = (rfm.join(cltv_final.select("master_id", "clv", "cltv_segment"), on="master_id",
+                                  how="left", maintain_order="left")
+                         .join(pe.customer_channels(path), on="master_id", how="left", maintain_order="left"))
+            cube = pe.build_cube(customers, cube_dims, cube_measures)
+            save_cube(cube, os.path.join(output_dir, "summary_cube.parquet"))
+            stage.rows_out = len(cube)
+        with recorder.stage("top_k") as stage:
+            for col in ["clv", "monetary", "frequency"]:
+                pe.top_k(customers, col, top).to_csv(os.path.join(output_dir, f"top_{col}.csv"))
+            stage.rows_out = top
+        return cube
+
+    with recorder.stage("summary_cube", rows_in=len(rfm)) as stage:
+        if use_cache:
+            channels = load_prepared(path, columns=["master_id", "order_channel"])
+        else:
+            channels = load_flo_data(path, usecols=["master_id", "order_channel"])
+        customers = rfm.join(cltv_final[["clv", "cltv_segment"]], how="left")
+        customers = customers.join(channels.groupby("master_id", observed=True)["order_channel"].first(),
+                                   how="left")
+        cube = build_cube(customers)
+        save_cube(cube, os.path.join(output_dir, "summary_cube.parquet"))
+        stage.rows_out = len(cube)
+    with recorder.stage("top_k", rows_in=len(customers)) as stage:
+        for col in ["clv", "monetary", "frequency"]:
+            top_k(customers, col, top).to_csv(os.path.join(output_dir, f"top_{col}.csv"))
+        stage.rows_out = top
+    return cube
+
+
+def run_backtest(path, output_dir, cutoffs=None, n_cutoffs=4, step_months=1, bgf_penalizer=0.001,
+                 ggf_penalizer=0.01, n_jobs=None, use_cache=True, recorder=None):
+    # path: sipariş geçmişi CSV'si (master_id, order_date, order_channel, order_value)
+    # cutoffs verilmezse son siparişten geriye n_cutoffs kesim tarihi (bkz. backtesting.rolling_cutoffs)
+    # bgf_penalizer / ggf_penalizer: tek değer ya da liste (her kombinasyon her cutoff'ta fit edilir)
+    # Çıktı: (penalizer çifti, cutoff) başına metrikler, output_dir/backtest.csv olarak da yazılır
+    from backtesting import backtest, load_orders, rolling_cutoffs
+
+    recorder = StageRecorder("backtest") if recorder is None else recorder
+    with recorder.stage("preparation") as stage:
+        orders = load_orders(path)
+        stage.rows_out = len(orders)
+    if cutoffs is None:
+        cutoffs = rolling_cutoffs(orders, n_cutoffs=n_cutoffs, step_months=step_months)
+    with recorder.stage("backtest_fits", rows_in=len(orders)) as stage:
+        results = backtest(orders, cutoffs, bgf_penalizer=bgf_penalizer, ggf_penalizer=ggf_penalizer,
+                           n_jobs=n_jobs, cache_dir=default_cache_dir(path) if use_cache else None)
+        stage.rows_out = len(results)
+    with recorder.stage("csv_export", rows_in=len(results)):
+        os.makedirs(output_dir, exist_ok=True)
+        results.to_csv(os.path.join(output_dir, "backtest.csv"), index=False)
+    return results
@@ -0,0 +1,378 @@
+###############################################################
+# Polars Lazy (streaming) Motoru
+###############################################################
+# pipelines.py'deki pandas akışı CSV'nin tamamını belleğe okuyor ve ara kopyalar
+# üretiyor (df_.copy(), reset_index, merge). FLO'da her müşteri tek satır olduğu için
+# müşteri bazındaki tablolar da girdi kadar büyük; bu motorda hiçbir tablo bütün halinde
+# belleğe alınmaz:
+#   - scan_csv + select: sadece gereken sütunlar okunur (projection pushdown)
+#   - hazırlık (toplam sütunları), aykırı değer baskılama, müşteri bazında group_by ve
+#     recency / T / frequency / monetary tek bir lazy planda hesaplanır
+#   - her ara tablo streaming motoruyla Parquet'e akıtılır (materialize -> sink_parquet)
+#     ve sonraki adım oradan okur; sonuç tabloları da Parquet olarak kalır
+#   - qcut sınırları plan içinde quantile ile hesaplanır (pandas'ın quantile'ıyla aynı
+#     doğrusal interpolasyon); skorlar, etiketler ve RFM segmentleri plan içinde atanır
+#   - BG/NBD + Gamma-Gamma skorları cltv_scoring.score_arrays ile parti parti (map_batches)
+#   - CSV, CLTV store ve top listeleri Parquet'ten chunk_rows'luk partilerle yazılır
+#   - belleğe alınan tek tablo model fit'inin gerektirdiği dört sütundur (fit_columns)
+# Sonuçlar pandas akışıyla aynıdır (compute_rfm, compute_cltv_df, pd.qcut, seg_map,
+# score_customers); özet küpünün toplamları toplama sırası farkıyla son basamakta
+# ayrışabilir.
+# polars isteğe bağlıdır; sadece backend="polars" seçildiğinde yüklenir.
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from cltv_scoring import score_arrays, unpack_params
+from flo_loader import date_cols, flo_dtypes
+from outliers import iqr_limits, outlier_cols
+
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+rfm_cols = ["master_id", "last_order_date"] + outlier_cols
+cltv_cols = ["master_id", "first_order_date", "last_order_date"] + outlier_cols
+fit_cols = ["frequency", "recency_cltv_weekly", "T_weekly", "monetary_cltv_avg"]
+
+
+def _require_polars():
+    if pl is None:
+        raise ImportError("polars backend'i için polars gerekli: pip install polars")
+
+
+def _schema():
+    dtypes = {"object": pl.String, "category": pl.Categorical, "float32": pl.Float32}
+    schema = {col: dtypes[dtype] for col, dtype in flo_dtypes.items()}
+    schema.update({col: pl.Date for col in date_cols})
+    return schema
+
+
+def scan_flo(path, columns=None):
+    # flo_loader ile aynı şema; columns verilirse sadece o sütunlar okunur
+    _require_polars()
+    lf = pl.scan_csv(path, schema_overrides=_schema())
+    return lf if columns is None else lf.select(columns)
+
+
+def _collect(plan):
+    return plan.collect(engine="streaming")
+
+
+def _batches(lf, chunk_rows):
+    return lf.collect_batches(chunk_size=chunk_rows, engine="streaming")
+
+
+def default_analysis_date(lf):
+    # Veri setindeki en son alışverişin yapıldığı tarihten 2 gün sonrası
+    last = _collect(lf.select(pl.col("last_order_date").max())).item()
+    return pd.Timestamp(last) + pd.Timedelta(days=2)
+
+
+def outlier_thresholds(lf, cols=None, q1=0.01, q3=0.99):
+    # outliers.outlier_thresholds_frame'in lazy karşılığı: tüm sütunların quantile'ları tek geçişte
+    cols = outlier_cols if cols is None else list(cols)
+    quantiles = _collect(lf.select([pl.col(col).cast(pl.Float64).quantile(q, interpolation="linear")
+                                    .alias(f"{col}_{i}") for col in cols for i, q in enumerate((q1, q3))]))
+    thresholds = {}
+    for col in cols:
+        low, up = iqr_limits(quantiles[f"{col}_0"].item(), quantiles[f"{col}_1"].item())
+        thresholds[col] = [float(low), float(up)]
+    return thresholds
+
+
+def prepare(lf, thresholds=None):
+    # flo_cache.prepare_flo_data'nın lazy karşılığı; thresholds verilirse limit dışındaki
+    # değerler round(limit) olur (outliers.cap_outliers ile aynı)
+    if thresholds:
+        capped = []
+        for col, (low, up) in thresholds.items():
+            value = pl.col(col).cast(pl.Float64)
+            capped.append(pl.when(value < low).then(pl.lit(round(low), dtype=pl.Float32))
+                          .when(value > up).then(pl.lit(round(up), dtype=pl.Float32))
+                          .otherwise(pl.col(col)).alias(col))
+        lf = lf.with_columns(capped)
+    return lf.with_columns(
+        (pl.col("order_num_total_ever_online") + pl.col("order_num_total_ever_offline"))
+        .alias("total_number_of_purchases"),
+        (pl.col("customer_value_total_ever_offline") + pl.col("customer_value_total_ever_online"))
+        .alias("total_price"))
+
+
+def _days_until(analysis_date, col):
+    return (pl.lit(pd.Timestamp(analysis_date).date()) - pl.col(col)).dt.total_days()
+
+
+def _weeks(col):
+    # gün -> hafta. polars sabite bölmeyi tersiyle çarpmaya çevirdiği için sonuç pandas'tan
+    # 1 ulp farklı çıkabiliyor; bölme numpy ile parti parti yapılır
+    return pl.col(col).map_batches(lambda days: pl.Series(days.to_numpy() / 7), return_dtype=pl.Float64,
+                                   is_elementwise=True)
+
+
+def rfm_plan(lf, analysis_date):
+    # rfm_metrics.compute_rfm'in lazy karşılığı (master_id sırasına göre)
+    return (lf.group_by("master_id")
+            .agg(pl.col("last_order_date").max(),
+                 pl.col("total_number_of_purchases").sum().alias("frequency"),
+                 pl.col("total_price").sum().alias("monetary"))
+            .select("master_id",
+                    _days_until(analysis_date, "last_order_date").alias("recency"),
+                    "frequency", "monetary")
+            .sort("master_id"))
+
+
+def cltv_plan(lf, analysis_date):
+    # rfm_metrics.compute_cltv_df'in lazy karşılığı: frequency > 1 filtresi ve haftalığa çevirme dahil
+    grouped = (lf.group_by("master_id")
+               .agg(pl.col("first_order_date").min(),
+                    pl.col("last_order_date").max(),
+                    pl.col("total_number_of_purchases").sum().cast(pl.Int64).alias("frequency"),
+                    pl.col("total_price").sum().cast(pl.Float64).alias("monetary")))
+    return (grouped
+            .select("master_id",
+                    (pl.col("last_order_date") - pl.col("first_order_date")).dt.total_days()
+                    .alias("recency_cltv_weekly"),
+                    _days_until(analysis_date, "first_order_date").alias("T_weekly"),
+                    "frequency",
+                    (pl.col("monetary") / pl.col("frequency")).alias("monetary_cltv_avg"))
+            .filter(pl.col("frequency") > 1)
+            .with_columns(_weeks("recency_cltv_weekly"), _weeks("T_weekly"))
+            .sort("master_id"))
+
+
+def materialize(plan, directory, name):
+    # plan streaming motoruyla directory/<name>.parquet'e akıtılır, sonraki adımlar oradan okur
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name}.parquet")
+    plan.sink_parquet(path)
+    return pl.scan_parquet(path)
+
+
+def count_rows(lf):
+    return _collect(lf.select(pl.len())).item()
+
+
+def qcut_edges(lf, exprs, q):
+    # exprs: {isim: ifade}; Çıktı: {isim: pd.qcut ile aynı sınırlar}, hepsi tek geçişte.
+    # Quantile'lar plan içinde hesaplanır (pandas ile aynı doğrusal interpolasyon, eksik
+    # değerler atlanır); pd.qcut'taki "Bin edges must be unique" hatası da aynen verilir.
+    probs = np.linspace(0, 1, q + 1)
+    row = _collect(lf.select([expr.cast(pl.Float64).fill_nan(None).quantile(float(p), interpolation="linear")
+                              .alias(f"{name}_{i}") for name, expr in exprs.items()
+                              for i, p in enumerate(probs)])).row(0, named=True)
+    edges = {}
+    for name in exprs:
+        edges[name] = np.array([row[f"{name}_{i}"] for i in range(len(probs))], dtype=float)
+        if len(np.unique(edges[name])) != len(edges[name]):
+            raise ValueError(f"Bin edges must be unique: {edges[name]!r}.")
+    return edges
+
+
+def qcut_codes(expr, edges):
+    # pd.qcut kodlarıyla aynı: [e0, e1] -> 0, (e1, e2] -> 1, ... (karşılaştırmalar float64'te)
+    value = expr.cast(pl.Float64)
+    return pl.sum_horizontal([(value > pl.lit(float(edge), dtype=pl.Float64)).cast(pl.Int8)
+                              for edge in edges[1:-1]]).cast(pl.Int8)
+
+
+def _labels(codes, labels):
+    # kod -> etiket; string etiketler sıralı Enum olur (pd.qcut'un sıralı kategoriği gibi)
+    dtype = pl.Enum(labels) if isinstance(labels[0], str) else pl.Int64
+    return codes.replace_strict(list(range(len(labels))), labels, return_dtype=dtype)
+
+
+def score_rfm(rfm, labels, q=5):
+    # pipelines.run_rfm'deki üç pd.qcut'ın lazy karşılığı; frequency önce rank(method="first")
+    # (master_id sırasında eşitlikler geliş sırasına göre) ile sıralanır
+    frequency_rank = pl.col("frequency").rank("ordinal")
+    edges = qcut_edges(rfm, {"recency_score": pl.col("recency"),
+                             "frequency_score": frequency_rank,
+                             "monetary_score": pl.col("monetary")}, q)
+    return rfm.with_columns(
+        _labels(qcut_codes(pl.col("recency"), edges["recency_score"]), labels["recency_score"])
+        .alias("recency_score"),
+        _labels(qcut_codes(frequency_rank, edges["frequency_score"]), labels["frequency_score"])
+        .alias("frequency_score"),
+        _labels(qcut_codes(pl.col("monetary"), edges["monetary_score"]), labels["monetary_score"])
+        .alias("monetary_score"))
+
+
+def segment_rfm(scored, compiled):
+    # rfm_segments.assign_segments'in lazy karşılığı: (recency_score, frequency_score) -> 5x5 tablo
+    table, labels = compiled
+    cell = (pl.col("recency_score") - 1) * table.shape[1] + (pl.col("frequency_score") - 1)
+    return scored.with_columns(cell.replace_strict(list(range(table.size)),
+                                                   [labels[code] for code in table.ravel()],
+                                                   return_dtype=pl.Enum(labels)).alias("segment"))
+
+
+def fit_columns(lf, cols=fit_cols):
+    # model fit'i için gereken sütunlar (sadece bunlar belleğe alınır)
+    return _collect(lf.select(cols)).to_pandas()
+
+
+def score_cltv(cltv, bgf, ggf, **kwargs):
+    # cltv_scoring.score_customers'ın lazy karşılığı: her parti score_arrays ile skorlanır
+    # kwargs: months, clv_time, freq, discount_rate
+    bgf_params = dict(zip(["r", "alpha", "a", "b"], unpack_params(bgf, ["r", "alpha", "a", "b"])))
+    ggf_params = dict(zip(["p", "q", "v"], unpack_params(ggf, ["p", "q", "v"])))
+    names = list(score_arrays(np.ones(1), np.ones(1), np.ones(1), np.ones(1),
+                              bgf_params, ggf_params, **kwargs))
+
+    def score_batch(batch):
+        scores = score_arrays(batch.struct.field("frequency").to_numpy(),
+                              batch.struct.field("recency_cltv_weekly").to_numpy(),
+                              batch.struct.field("T_weekly").to_numpy(),
+                              batch.struct.field("monetary_cltv_avg").to_numpy(),
+                              bgf_params, ggf_params, **kwargs)
+        return pl.DataFrame(scores).to_struct("scores")
+
+    scores = (pl.struct(*fit_cols)
+              .map_batches(score_batch, return_dtype=pl.Struct({name: pl.Float64 for name in names}),
+                           is_elementwise=True)
+              .alias("scores"))
+    return cltv.with_columns(scores).unnest("scores")
+
+
+def segment_cltv(scored, labels, q=4):
+    # pd.qcut(cltv_final["clv"], 4, labels=...) karşılığı
+    edges = qcut_edges(scored, {"clv": pl.col("clv")}, q)["clv"]
+    return scored.with_columns(_labels(qcut_codes(pl.col("clv"), edges), labels).alias("cltv_segment"))
+
+
+def _to_pandas(frame, index_col="master_id"):
+    # polars parti -> master_id index'li pandas tablosu (Enum sütunları kategorik olur)
+    frame = frame.to_pandas()
+    return frame.set_index(pd.Index(frame.pop(index_col).to_numpy(dtype=object), name=index_col))
+
+
+def write_csv(lf, path, chunk_rows=250_000, index_col="master_id"):
+    # pandas akışındaki to_csv ile aynı biçim; tablo chunk_rows'luk partiler halinde yazılır
+    with open(path, "w", newline="") as f:
+        header = True
+        for batch in _batches(lf, chunk_rows):
+            _to_pandas(batch, index_col).to_csv(f, header=header)
+            header = False
+        if header:
+            _to_pandas(_collect(lf.head(0)), index_col).to_csv(f)
+    return path
+
+
+def group_means(lf, by, cols):
+    # dataframe.groupby(by, observed=True).agg({sütun: "mean"}) karşılığı (küçük sonuç tablosu)
+    means = _collect(lf.filter(pl.col(by).is_not_null())
+                     .group_by(by).agg([pl.col(col).mean() for col in cols]).sort(by)).to_pandas()
+    return means.set_index(by)
+
+
+def top_k(lf, col, k=10):
+    # summary_cube.top_k karşılığı: sadece ilk k satır toplanır (eksik değerler en sonda)
+    ranked = lf.sort(pl.col(col).cast(pl.Float64).fill_nan(None), descending=True, nulls_last=True,
+                     maintain_order=True)
+    return _to_pandas(_collect(ranked.head(k)))
+
+
+def customer_channels(path):
+    # müşteri başına order_channel (summary küpünün kanal boyutu)
+    return (scan_flo(path, ["master_id", "order_channel"])
+            .group_by("master_id").agg(pl.col("order_channel").first().cast(pl.String)))
+
+
+def build_cube(lf, dims, measures):
+    # summary_cube.build_cube'un lazy karşılığı (aynı sütunlar, aynı satır sırası): hücre başına
+    # sayım ve toplamlar group_by ile; Enum boyutlar Enum sırasına, diğerleri alfabetik sıraya
+    # göre, eksik değerler en sonda
+    from summary_cube import add_means
+
+    schema = lf.collect_schema()
+    dims = [dim for dim in dims if dim in schema]
+    measures = [col for col in measures if col in schema]
+    keys = [pl.col(dim) if isinstance(schema[dim], pl.Enum) else pl.col(dim).cast(pl.String) for dim in dims]
+    aggs = [pl.len().cast(pl.Int64).alias("customers")]
+    for col in measures:
+        value = pl.col(col).cast(pl.Float64).fill_nan(None)
+        aggs += [value.count().cast(pl.Int64).alias(f"{col}_count"), value.sum().alias(f"{col}_sum")]
+    cube = _collect(lf.group_by(keys).agg(aggs).sort(dims, nulls_last=True)).to_pandas()
+    for dim in dims:
+        cube[dim] = cube[dim].astype(object).where(cube[dim].notna(), None)
+    return add_means(cube, measures)
+
+
+def _open_array(store_dir, name, dtype, rows):
+    if rows == 0:
+        # boş dizi memory-map ile açılamıyor
+        np.save(os.path.join(store_dir, f"{name}.npy"), np.empty(0, dtype=dtype))
+        return np.empty(0, dtype=dtype)
+    return np.lib.format.open_memmap(os.path.join(store_dir, f"{name}.npy"), mode="w+", dtype=dtype,
+                                     shape=(rows,))
+
+
+def _fill(array, lf, col, chunk_rows):
+    if len(array) == 0:
+        return
+    start = 0
+    for batch in _batches(lf.select(col), chunk_rows):
+        array[start:start + len(batch)] = batch[col].to_numpy()
+        start += len(batch)
+    array.flush()
+
+
+def write_store_arrays(lf, store_dir, value_cols, segment_cols, sort_cols, chunk_rows=250_000):
+    # cltv_service.build_store'un lazy tablo karşılığı: aynı .npy dosyaları, diskte açılan
+    # dizilere (open_memmap) partiler halinde yazılır. lf master_id'ye göre sıralı olmalı.
+    # Çıktı: meta.json'ın rows / columns / segments alanları
+    schema = lf.collect_schema()
+    columns = [col for col in value_cols if col in schema]
+    segments = [col for col in segment_cols if col in schema]
+    for col in segments:
+        if not isinstance(schema[col], pl.Enum):
+            # string segment sütunu: etiketler alfabetik (pandas astype("category") gibi)
+            values = _collect(lf.select(pl.col(col).cast(pl.String).drop_nulls().unique()))[col].to_list()
+            lf = lf.with_columns(pl.col(col).cast(pl.String).cast(pl.Enum(sorted(values))))
+    labels = {col: list(lf.collect_schema()[col].categories) for col in segments}
+
+    stats = _collect(lf.select(pl.len().alias("rows"),
+                               pl.col("master_id").str.len_bytes().max().alias("width"),
+                               (pl.col("master_id") > pl.col("master_id").shift(1)).all().alias("sorted"))
+                     ).row(0, named=True)
+    if not stats["sorted"]:
+        raise ValueError("tablo master_id'ye göre sıralı olmalı")
+    rows = stats["rows"]
+
+    arrays = {"ids": _open_array(store_dir, "ids", f"S{max(stats['width'] or 1, 1)}", rows)}
+    arrays.update({col: _open_array(store_dir, col, np.float64, rows) for col in columns})
+    arrays.update({col: _open_array(store_dir, col, np.int16, rows) for col in segments})
+    start = 0
+    for batch in _batches(lf.select(["master_id"] + columns + segments), chunk_rows):
+        stop = start + len(batch)
+        arrays["ids"][start:stop] = np.char.encode(batch["master_id"].to_numpy().astype(str), "utf-8")
+        for col in columns:
+            arrays[col][start:stop] = batch[col].cast(pl.Float64).to_numpy()
+        for col in segments:
+            arrays[col][start:stop] = batch[col].to_physical().cast(pl.Int16).fill_null(-1).to_numpy()
+        start = stop
+    for array in arrays.values():
+        array.flush()
+
+    # clv'ye göre azalan sıralı satır numaraları (np.argsort(-clv, kind="stable") ile aynı sıra);
+    # sıralı (satır, segment kodları) tablosu bir kere Parquet'e yazılır, segment listeleri
+    # oradan filtrelenir
+    for by in [col for col in sort_cols if col in schema]:
+        order = materialize(lf.select(pl.int_range(pl.len(), dtype=pl.Int32).alias("row"), by,
+                                      *[pl.col(col).to_physical().alias(col) for col in segments])
+                            .sort(pl.col(by).fill_nan(None), descending=True, nulls_last=True,
+                                  maintain_order=True),
+                            store_dir, f"_order_{by}")
+        _fill(_open_array(store_dir, f"top_{by}", np.int32, rows), order, "row", chunk_rows)
+        for col in segments:
+            counts = dict(_collect(order.group_by(col).len()).iter_rows())
+            for code, label in enumerate(labels[col]):
+                part = order.filter(pl.col(col) == code)
+                _fill(_open_array(store_dir, f"top_{by}_{col}_{label}", np.int32, counts.get(code, 0)),
+                      part, "row", chunk_rows)
+        os.remove(os.path.join(store_dir, f"_order_{by}.parquet"))
+    return {"rows": rows, "columns": columns, "segments": labels}
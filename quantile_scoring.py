@@ -0,0 +1,275 @@
+###############################################################
+# Birleştirilebilir Quantile Skorlama (pd.qcut yerine)
+###############################################################
+# recency_score, frequency_score, monetary_score ve cltv_segment pd.qcut ile hesaplanıyor;
+# pd.qcut sütunun tamamını tek bir süreçte sıralamayı gerektiriyor.
+# QuantileScorer:
+#   - her parça / işçi için bir QuantileSketch oluşturur (partial_fit), taslaklar merge()
+#     ile birleştirilir
+#   - birleşik taslaktan kesim noktaları çıkarılır ve her müşteri np.searchsorted ile
+#     dilimlenir (pd.qcut gibi sağdan kapalı aralıklar; eğitimdeki aralığın dışındaki yeni
+#     değerler ilk / son dilime düşer)
+#   - kesim noktaları to_dict / from_dict ile saklanabilir; dünün kesim noktalarıyla yeni
+#     müşteriler anında skorlanabilir
+# Farklı değer sayısı QuantileSketch.max_exact'i geçmeyen sütunlarda (sipariş sayıları, gün
+# cinsinden recency) kesim noktaları pd.qcut'ınkilerle birebir aynıdır; daha fazla farklı
+# değer varsa t-digest yaklaşıktır (sadece kesim noktalarına çok yakın müşteriler etkilenir).
+#
+# frequency_score: pd.qcut(rank(method="first")) eşit değerleri satır sırasıyla ayırır;
+# pipelines'taki rfm tablosu master_id'ye göre sıralı olduğu için bu (frequency, master_id)
+# sıralamasıdır. tie_break=True bu sıralamayı satır sırasından ve parçalamadan bağımsız
+# olarak global bir rank hesaplamadan kurar:
+#   1. geçiş: birleşik (kayıpsız) taslaktan her kesimin düştüğü değer ve o değere eşit
+#      müşteriler içindeki sırası bulunur
+#   2. geçiş(ler): o değere eşit müşteriler içinde bu sıradaki master_id parçalar üzerinden
+#      seçilir (aday sayısı tie_collect_limit'i geçiyorsa önce master_id'nin ilk 8 baytına
+#      göre sıralamayı koruyan bir histogramla daraltılır, her tur bir geçiş)
+# Kesim noktası (değer, master_id) çiftidir: değere eşit müşterilerden master_id'si bu
+# eşikten büyük olanlar üst dilime gider. Sonuç pipelines'taki pd.qcut ile aynıdır.
+# Bu yüzden tie_break'li sütunlar için partitions birden fazla kez okunabilmelidir (liste
+# ya da parçaları her çağrıda yeniden üreten bir fonksiyon). Taslak kayıpsız moddan
+# çıkarsa (çok sayıda farklı değer, yani az eşitlik) kesimler sadece değere göre yapılır.
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from cltv_scoring import bounded_map
+from quantile_sketch import QuantileSketch, lerp
+
+rfm_score_specs = {"recency": {"n_bins": 5, "labels": [5, 4, 3, 2, 1]},
+                   "frequency": {"n_bins": 5, "labels": [1, 2, 3, 4, 5], "tie_break": True},
+                   "monetary": {"n_bins": 5, "labels": [1, 2, 3, 4, 5]}}
+cltv_score_specs = {"clv": {"n_bins": 4, "labels": ["D", "C", "B", "A"]}}
+
+tie_collect_limit = 200_000
+_hist_bins = 1 << 16
+_key_space = 1 << 64
+
+
+def id_keys(ids):
+    # master_id -> ilk 8 UTF-8 baytı (big-endian uint64); string sıralamasını korur
+    encoded = np.char.encode(np.asarray(ids, dtype=str), "utf-8").astype("S8")
+    return np.frombuffer(encoded.tobytes(), dtype=">u8").astype(np.uint64)
+
+
+def _edge_quantiles(n_bins):
+    return np.linspace(0, 1, n_bins + 1)
+
+
+def _rank_cuts(n, n_bins):
+    # pd.qcut(rank, n_bins) kesimleri: rank'ı (1..n) kesime eşit ya da küçük olanlar alt dilimde;
+    # çıktı her kesim için alt tarafta kalan müşteri sayısı. Kesimler 1..n dizisinin quantile'ları
+    # (QuantileSketch._exact_quantile ile aynı hesap, dizi oluşturulmadan)
+    virtual = (n - 1) * np.true_divide(_edge_quantiles(n_bins) * 100.0, 100)
+    previous = np.floor(virtual)
+    edges = lerp(previous + 1, np.minimum(previous + 1, n - 1) + 1, virtual - previous)
+    if len(np.unique(edges)) < len(edges):
+        raise ValueError(f"Bin edges must be unique: {edges.tolist()}")
+    return np.floor(edges[1:-1]).astype(np.int64)
+
+
+class QuantileScorer:
+    def __init__(self, n_bins, labels, tie_break=False, compression=500, max_exact=50_000):
+        self.n_bins = n_bins
+        self.labels = list(labels)
+        self.tie_break = tie_break
+        self.sketch = QuantileSketch(compression, max_exact)
+        self.cut_points = None
+        self.tie_ids = None
+
+    def partial_fit(self, values):
+        self.sketch.update(values)
+        self.cut_points = self.tie_ids = None
+        return self
+
+    def merge(self, other):
+        self.sketch.merge(other.sketch)
+        self.cut_points = self.tie_ids = None
+        return self
+
+    def _needs_ids(self):
+        return self.tie_break and self.sketch.exact
+
+    def tie_requests(self):
+        # Çıktı: (değer, değere eşit müşteriler içindeki 0 tabanlı sıra) listesi; o sıradaki
+        # master_id kesimin eşiğidir (None: değere eşit müşterilerin hepsi alt dilimde)
+        values, counts = self.sketch.means, self.sketch.weights.astype(np.int64)
+        ends = np.cumsum(counts)
+        requests = []
+        for lower in _rank_cuts(int(ends[-1]), self.n_bins):
+            i = np.searchsorted(ends, lower - 1, side="right")
+            position = lower - 1 - (ends[i] - counts[i])
+            requests.append((float(values[i]), None if position == counts[i] - 1 else int(position)))
+        return requests
+
+    def fit_cut_points(self, tie_ids=None):
+        if self._needs_ids():
+            requests = self.tie_requests()
+            self.cut_points = np.array([value for value, _ in requests])
+            self.tie_ids = list(tie_ids) if tie_ids is not None else [None] * len(requests)
+            return self.cut_points
+        edges = np.asarray(self.sketch.quantile(_edge_quantiles(self.n_bins)), dtype=float)
+        if len(np.unique(edges)) < len(edges):
+            raise ValueError(f"Bin edges must be unique: {edges.tolist()}")
+        self.cut_points = edges[1:-1]
+        self.tie_ids = None
+        return self.cut_points
+
+    def transform(self, values, ids=None):
+        if self.cut_points is None:
+            self.fit_cut_points()
+        index = values.index if isinstance(values, pd.Series) else None
+        values = np.asarray(values, dtype=float)
+        bins = np.searchsorted(self.cut_points, values, side="left")
+        if self.tie_ids is not None and any(tie_id is not None for tie_id in self.tie_ids):
+            if ids is None:
+                raise ValueError("tie_break=True için ids (master_id) gerekli")
+            ids = np.asarray(ids, dtype=object)
+            for cut, tie_id in zip(self.cut_points, self.tie_ids):
+                if tie_id is not None:
+                    tied = values == cut
+                    bins[tied] += ids[tied] > tie_id
+        return pd.Series(pd.Categorical.from_codes(bins, categories=self.labels, ordered=True), index=index)
+
+    def to_dict(self):
+        if self.cut_points is None:
+            self.fit_cut_points()
+        return {"n_bins": self.n_bins, "labels": self.labels, "tie_break": self.tie_break,
+                "cut_points": self.cut_points.tolist(), "tie_ids": self.tie_ids,
+                "sketch": self.sketch.to_dict()}
+
+    @classmethod
+    def from_dict(cls, state):
+        scorer = cls(state["n_bins"], state["labels"], state["tie_break"], state["sketch"]["compression"],
+                     state["sketch"]["max_exact"])
+        scorer.sketch = QuantileSketch.from_dict(state["sketch"])
+        scorer.cut_points = np.asarray(state["cut_points"], dtype=float)
+        scorer.tie_ids = state["tie_ids"]
+        return scorer
+
+
+def _ids(partition, id_col):
+    return (partition[id_col] if id_col in partition.columns else partition.index).to_numpy()
+
+
+def _partition_scorers(args):
+    partition, specs = args
+    return {col: QuantileScorer(**spec).partial_fit(partition[col].to_numpy()) for col, spec in specs.items()}
+
+
+def _partition_ties(args):
+    # her istek için: "collect" -> aralıktaki master_id'ler, "hist" -> aralığın histogramı
+    partition, id_col, requests = args
+    ids = None
+    results = []
+    for col, value, mode, low, high in requests:
+        tied = partition[col].to_numpy(dtype=float) == value
+        ids = _ids(partition, id_col) if ids is None else ids
+        tied_ids = ids[tied]
+        keys = id_keys(tied_ids)
+        inside = keys >= np.uint64(low)
+        if high < _key_space:
+            inside &= keys < np.uint64(high)
+        if mode == "collect":
+            results.append(tied_ids[inside])
+        else:
+            width = np.uint64(-(-(high - low) // _hist_bins))
+            results.append(np.bincount(((keys[inside] - np.uint64(low)) // width).astype(np.int64),
+                                       minlength=_hist_bins))
+    return results
+
+
+def _iterate(partitions):
+    return partitions() if callable(partitions) else iter(partitions)
+
+
+def _resolve_ties(partitions, scorers, id_col, n_jobs):
+    # her tie_break kesimi için eşik master_id'yi parçalar üzerinden tam olarak seçer
+    pending = {}
+    for col, scorer in scorers.items():
+        if scorer._needs_ids():
+            for j, (value, position) in enumerate(scorer.tie_requests()):
+                if position is not None:
+                    count = int(scorer.sketch.weights[np.searchsorted(scorer.sketch.means, value)])
+                    pending[(col, j)] = {"value": value, "rank": position, "low": 0, "high": _key_space,
+                                         "count": count}
+    resolved = {}
+    while pending:
+        keys = list(pending)
+        requests = []
+        for key in keys:
+            state = pending[key]
+            collect = state["count"] <= tie_collect_limit or state["high"] - state["low"] <= _hist_bins
+            state["mode"] = "collect" if collect else "hist"
+            requests.append((key[0], state["value"], state["mode"], state["low"], state["high"]))
+        jobs = ((partition, id_col, requests) for partition in _iterate(partitions))
+        merged = [None] * len(keys)
+        for results in bounded_map(_partition_ties, jobs, n_jobs):
+            for i, result in enumerate(results):
+                if merged[i] is None:
+                    merged[i] = [result] if pending[keys[i]]["mode"] == "collect" else result
+                elif pending[keys[i]]["mode"] == "collect":
+                    merged[i].append(result)
+                else:
+                    merged[i] += result
+        for key, result in zip(keys, merged):
+            state = pending.pop(key)
+            if state["mode"] == "collect":
+                resolved[key] = np.sort(np.concatenate(result))[state["rank"]]
+                continue
+            ends = np.cumsum(result)
+            bucket = int(np.searchsorted(ends, state["rank"], side="right"))
+            width = -(-(state["high"] - state["low"]) // _hist_bins)
+            state["rank"] -= int(ends[bucket] - result[bucket])
+            state["low"] += bucket * width
+            state["high"] = min(state["low"] + width, state["high"])
+            state["count"] = int(result[bucket])
+            pending[key] = state
+    for col, scorer in scorers.items():
+        if scorer._needs_ids():
+            scorer.fit_cut_points([resolved.get((col, j)) for j in range(scorer.n_bins - 1)])
+
+
+def fit_scorers(partitions, specs=None, id_col="master_id", n_jobs=1):
+    # partitions: DataFrame listesi (ör. pd.read_parquet parçaları) ya da her çağrıda parçaları
+    # yeniden üreten bir fonksiyon (ör. lambda: pd.read_csv(path, chunksize=...)); tie_break'li
+    # sütun yoksa tek seferlik bir iterator da olabilir.
+    # id_col (master_id) sütunda ya da index'te olabilir.
+    # Her parça için taslaklar (isteğe bağlı olarak process pool ile) oluşturulup birleştirilir.
+    specs = rfm_score_specs if specs is None else specs
+    if any(spec.get("tie_break") for spec in specs.values()) and not callable(partitions) \
+            and iter(partitions) is partitions:
+        raise ValueError("tie_break için partitions birden fazla kez okunabilmeli "
+                         "(liste ya da parçaları yeniden üreten fonksiyon)")
+    merged = {col: QuantileScorer(**spec) for col, spec in specs.items()}
+    jobs = ((partition, specs) for partition in _iterate(partitions))
+    for scorers in bounded_map(_partition_scorers, jobs, n_jobs):
+        for col, scorer in scorers.items():
+            merged[col].merge(scorer)
+    for scorer in merged.values():
+        scorer.fit_cut_points()
+    _resolve_ties(partitions, merged, id_col, n_jobs)
+    return merged
+
+
+def score_frame(dataframe, scorers, id_col="master_id", suffix="_score"):
+    # Her scorer için <sütun>_score (clv için cltv_segment) sütunu eklenmiş kopya
+    # id_col index'te de olabilir (rfm gibi master_id index'li tablolar için)
+    scored = dataframe.copy()
+    for col, scorer in scorers.items():
+        name = "cltv_segment" if col == "clv" else col + suffix
+        ids = _ids(dataframe, id_col) if scorer.tie_break else None
+        scored[name] = scorer.transform(dataframe[col], ids).to_numpy()
+    return scored
+
+
+def save_scorers(scorers, path):
+    with open(path, "w") as f:
+        json.dump({col: scorer.to_dict() for col, scorer in scorers.items()}, f)
+
+
+def load_scorers(path):
+    with open(path) as f:
+        return {col: QuantileScorer.from_dict(state) for col, state in json.load(f).items()}
@@ -0,0 +1,91 @@
+###############################################################
+# RFM ve CLTV Metriklerinin Vektörel Hesaplanması
+###############################################################
+# FLO_RFM.py ve FLO_CLTV_Prediction.py içindeki
+#   df.groupby("master_id").agg({... lambda x: ...})
+# kalıbı her müşteri için Python seviyesinde bir lambda çağırıyor.
+# Buradaki fonksiyonlar aynı tabloyu pandas'ın Cython tabanlı
+# toplama fonksiyonlarıyla (max, min, sum) ya da master_id zaten eşsizse
+# hiç groupby yapmadan, doğrudan sütun işlemleriyle üretir.
+# Girdi tablosu değiştirilmez: tarih çevirme ve toplam sütunları yerel Series'lerle yapılır.
+
+import pandas as pd
+
+date_cols = ["first_order_date", "last_order_date", "last_order_date_online", "last_order_date_offline"]
+
+
+def _customer_columns(dataframe, dates):
+    # fonksiyonların kullandığı sütunlar, çağıranın tablosu değiştirilmeden: tarih sütunları
+    # henüz datetime değilse çevrilir, toplam sütunları yoksa hesaplanır (yerel Series'ler)
+    columns = {"master_id": dataframe["master_id"]}
+    for col in dates:
+        values = dataframe[col]
+        columns[col] = values if pd.api.types.is_datetime64_any_dtype(values) else pd.to_datetime(values)
+    if "total_number_of_purchases" in dataframe.columns:
+        columns["total_number_of_purchases"] = dataframe["total_number_of_purchases"]
+    else:
+        columns["total_number_of_purchases"] = dataframe["order_num_total_ever_online"] + dataframe[
+            "order_num_total_ever_offline"]
+    if "total_price" in dataframe.columns:
+        columns["total_price"] = dataframe["total_price"]
+    else:
+        columns["total_price"] = dataframe["customer_value_total_ever_offline"] + dataframe[
+            "customer_value_total_ever_online"]
+    return pd.DataFrame(columns)
+
+
+def compute_rfm(dataframe, analysis_date):
+    # Çıktı: master_id index'li recency, frequency, monetary tablosu
+    # (eski lambda'lı groupby ile aynı sıralama ve değerler)
+    dataframe = _customer_columns(dataframe, ["last_order_date"])
+    analysis_date = pd.Timestamp(analysis_date)
+
+    if dataframe["master_id"].is_unique:
+        # her satır zaten bir müşteri: groupby'a gerek yok
+        rfm = pd.DataFrame({"recency": (analysis_date - dataframe["last_order_date"]).dt.days.to_numpy(),
+                            "frequency": dataframe["total_number_of_purchases"].to_numpy(),
+                            "monetary": dataframe["total_price"].to_numpy()},
+                           index=pd.Index(dataframe["master_id"].to_numpy(), name="master_id"))
+        return rfm.sort_index()
+
+    # aynı müşteri birden fazla satırda geçiyorsa isimli toplama ile tek geçiş
+    rfm = dataframe.groupby("master_id").agg(last_order_date=("last_order_date", "max"),
+                                             frequency=("total_number_of_purchases", "sum"),
+                                             monetary=("total_price", "sum"))
+    rfm.insert(0, "recency", (analysis_date - rfm.pop("last_order_date")).dt.days)
+    return rfm
+
+
+def compute_cltv_df(dataframe, analysis_date):
+    # Çıktı: master_id index'li recency_cltv_weekly, T_weekly, frequency, monetary_cltv_avg
+    # tablosu. frequency > 1 filtresi ve haftalığa çevirme (/ 7) dahil.
+    dataframe = _customer_columns(dataframe, ["first_order_date", "last_order_date"])
+    analysis_date = pd.Timestamp(analysis_date)
+
+    if dataframe["master_id"].is_unique:
+        cltv_df = pd.DataFrame({"recency_cltv_weekly": (dataframe["last_order_date"] -
+                                                        dataframe["first_order_date"]).dt.days.to_numpy(),
+                                "T_weekly": (analysis_date - dataframe["first_order_date"]).dt.days.to_numpy(),
+                                "frequency": dataframe["total_number_of_purchases"].to_numpy().astype(int),
+                                "monetary_cltv_avg": dataframe["total_price"].to_numpy()},
+                               index=pd.Index(dataframe["master_id"].to_numpy(), name="master_id"))
+        cltv_df = cltv_df.sort_index()
+    else:
+        grouped = dataframe.groupby("master_id").agg(first_order_date=("first_order_date", "min"),
+                                                     last_order_date=("last_order_date", "max"),
+                                                     frequency=("total_number_of_purchases", "sum"),
+                                                     monetary_cltv_avg=("total_price", "sum"))
+        cltv_df = pd.DataFrame({"recency_cltv_weekly": (grouped["last_order_date"] -
+                                                        grouped["first_order_date"]).dt.days,
+                                "T_weekly": (analysis_date - grouped["first_order_date"]).dt.days,
+                                "frequency": grouped["frequency"].astype(int),
+                                "monetary_cltv_avg": grouped["monetary_cltv_avg"]})
+
+    # satın alma başına ortalama kazanç
+    cltv_df["monetary_cltv_avg"] = cltv_df["monetary_cltv_avg"] / cltv_df["frequency"]
+    cltv_df = cltv_df[(cltv_df["frequency"] > 1)].copy()
+
+    # gün -> hafta
+    cltv_df["recency_cltv_weekly"] = cltv_df["recency_cltv_weekly"] / 7
+    cltv_df["T_weekly"] = cltv_df["T_weekly"] / 7
+    return cltv_df
@@ -0,0 +1,58 @@
+###############################################################
+# seg_map'in 5x5 Segment Tablosuna Derlenmesi
+###############################################################
+# rfm["RF_SCORE"].replace(seg_map, regex=True) her satır için önce bir string
+# oluşturup ardından on regex'i tek tek deniyor. Oysa (recency_score, frequency_score)
+# için sadece 25 olası ikili var. seg_map bir kere 5x5'lik bir tamsayı tablosuna
+# derlenir ve segmentler iki skor dizisiyle doğrudan indekslenerek atanır.
+
+import re
+
+import numpy as np
+import pandas as pd
+
+seg_map = {
+    r'[1-2][1-2]': 'hibernating',
+    r'[1-2][3-4]': 'at_Risk',
+    r'[1-2]5': 'cant_loose',
+    r'3[1-2]': 'about_to_sleep',
+    r'33': 'need_attention',
+    r'[3-4][4-5]': 'loyal_customers',
+    r'41': 'promising',
+    r'51': 'new_customers',
+    r'[4-5][2-3]': 'potential_loyalists',
+    r'5[4-5]': 'champions'}
+
+
+def compile_seg_map(segment_map=None, n_scores=5):
+    # Çıktı: (table, labels)
+    #   table[recency_score - 1, frequency_score - 1] -> labels içindeki segment kodu
+    # Her hücre tam olarak bir desenle eşleşmeli, aksi halde ValueError.
+    segment_map = seg_map if segment_map is None else segment_map
+    labels = list(dict.fromkeys(segment_map.values()))
+    codes = {label: i for i, label in enumerate(labels)}
+    patterns = [(re.compile(pattern), codes[label]) for pattern, label in segment_map.items()]
+
+    table = np.full((n_scores, n_scores), -1, dtype=np.int8)
+    for r in range(1, n_scores + 1):
+        for f in range(1, n_scores + 1):
+            rf_score = f"{r}{f}"
+            matched = [(p.pattern, code) for p, code in patterns if p.fullmatch(rf_score)]
+            if not matched:
+                raise ValueError(f"seg_map RF_SCORE={rf_score} hücresini kapsamıyor")
+            if len(matched) > 1:
+                raise ValueError(f"seg_map RF_SCORE={rf_score} için birden fazla desen eşleşiyor: "
+                                 f"{[p for p, _ in matched]}")
+            table[r - 1, f - 1] = matched[0][1]
+    return table, labels
+
+
+def assign_segments(recency_score, frequency_score, compiled=None):
+    # recency_score / frequency_score: 1..5 arası skorlar (qcut çıktısı kategorik olabilir)
+    # Çıktı: aynı index'e sahip kategorik segment serisi
+    table, labels = compile_seg_map() if compiled is None else compiled
+    r = np.asarray(recency_score, dtype=np.intp) - 1
+    f = np.asarray(frequency_score, dtype=np.intp) - 1
+    index = recency_score.index if isinstance(recency_score, pd.Series) else None
+    return pd.Series(pd.Categorical.from_codes(table[r, f], categories=labels),
+                     index=index, name="segment")
@@ -0,0 +1,213 @@
+###############################################################
+# Aşama (stage) Bazında Süre / Bellek Ölçümü ve Metrik Çıktıları
+###############################################################
+# RFM ve CLTV akışlarının adımları (preparation, replace_with_thresholds, groupby
+# aggregation, qcut scoring, seg_map segmentation, bgf.fit, ggf.fit,
+# customer_lifetime_value, csv export) isimli aşamalar olarak ölçülür.
+# Her aşama için: duvar saati süresi, CPU süresi, aşama içindeki tepe RSS ve satır sayıları.
+# Tepe RSS, aşama süresince arka planda bir thread'in anlık RSS'i (linux'ta /proc/self/statm,
+# diğer platformlarda psutil kuruluysa) sample_interval aralıklarla örneklemesiyle bulunur;
+# ru_maxrss süreç ömrü boyunca bir üst sınır (high-water mark) olduğu için daha önceki bir
+# aşamada ulaşılan tepenin altında kalan aşamalar onunla ölçülemez. Örnekleme aralığından
+# kısa süren bellek sıçramaları kaçabilir. Anlık RSS okunamıyorsa alanlar None kalır.
+#   rss_start_mb       aşama başındaki RSS
+#   peak_rss_mb        aşama içinde görülen en yüksek RSS
+#   peak_rss_delta_mb  peak_rss_mb - rss_start_mb (aşamanın kendi tepe bellek artışı)
+# Ölçümler takılabilir hook'lara gönderilir:
+#   - JsonLogHook: her aşama için bir JSON satırı (dosya ya da stderr)
+#   - PrometheusTextfileHook: node_exporter textfile collector'ın okuyabileceği .prom dosyası
+# profile_dir verilirse her aşama cProfile ile ayrıca profillenir ve <pipeline>_<stage>.prof
+# olarak yazılır (snakeviz / pstats ile açılabilir). Aşama başlangıçları da loglandığı için
+# (pid ve zaman damgasıyla) py-spy kayıtları aşamalarla eşleştirilebilir.
+#
+# Kullanım:
+#   recorder = StageRecorder("rfm", hooks=[JsonLogHook("metrics.jsonl")])
+#   with recorder.stage("groupby_aggregation", rows_in=len(df)) as s:
+#       rfm = compute_rfm(df, today_date)
+#       s.rows_out = len(rfm)
+
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+_page_mb = os.sysconf("SC_PAGE_SIZE") / 2 ** 20 if hasattr(os, "sysconf") else None
+
+
+def current_rss_mb():
+    # anlık (o andaki) RSS; okunamıyorsa None
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _page_mb
+    except (OSError, TypeError):
+        pass
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / 2 ** 20
+    return None
+
+
+class RSSSampler:
+    # with bloğu boyunca anlık RSS'i ayrı bir thread'de örnekler, en yüksek değeri tutar
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.start_mb = None
+        self.peak_mb = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak_mb = max(self.peak_mb, current_rss_mb())
+
+    def __enter__(self):
+        self.start_mb = self.peak_mb = current_rss_mb()
+        if self.start_mb is not None:
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self.peak_mb = max(self.peak_mb, current_rss_mb())
+        return False
+
+
+class StageMetrics:
+    def __init__(self, pipeline, name, rows_in=None):
+        self.pipeline = pipeline
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.wall_seconds = None
+        self.cpu_seconds = None
+        self.rss_start_mb = None
+        self.peak_rss_mb = None
+        self.peak_rss_delta_mb = None
+        self.started_at = None
+
+    def to_dict(self):
+        return {"pipeline": self.pipeline,
+                "stage": self.name,
+                "started_at": self.started_at,
+                "wall_seconds": self.wall_seconds,
+                "cpu_seconds": self.cpu_seconds,
+                "rss_start_mb": self.rss_start_mb,
+                "peak_rss_mb": self.peak_rss_mb,
+                "peak_rss_delta_mb": self.peak_rss_delta_mb,
+                "rows_in": self.rows_in,
+                "rows_out": self.rows_out,
+                "pid": os.getpid()}
+
+
+class StageRecorder:
+    def __init__(self, pipeline, hooks=(), profile_dir=None, sample_interval=0.01):
+        self.pipeline = pipeline
+        self.hooks = list(hooks)
+        self.profile_dir = profile_dir
+        self.sample_interval = sample_interval
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        metrics = StageMetrics(self.pipeline, name, rows_in)
+        metrics.started_at = time.time()
+        for hook in self.hooks:
+            hook.stage_started(metrics)
+
+        profiler = cProfile.Profile() if self.profile_dir else None
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            with RSSSampler(self.sample_interval) as sampler:
+                if profiler:
+                    profiler.enable()
+                try:
+                    yield metrics
+                finally:
+                    if profiler:
+                        profiler.disable()
+        finally:
+            metrics.wall_seconds = time.perf_counter() - wall_start
+            metrics.cpu_seconds = time.process_time() - cpu_start
+            if sampler.start_mb is not None:
+                metrics.rss_start_mb = sampler.start_mb
+                metrics.peak_rss_mb = sampler.peak_mb
+                metrics.peak_rss_delta_mb = sampler.peak_mb - sampler.start_mb
+            if profiler:
+                os.makedirs(self.profile_dir, exist_ok=True)
+                profiler.dump_stats(os.path.join(self.profile_dir, f"{self.pipeline}_{name}.prof"))
+            self.stages.append(metrics)
+            for hook in self.hooks:
+                hook.stage_finished(metrics)
+
+
+class JsonLogHook:
+    # path None ya da "-" ise stderr'e yazar
+    def __init__(self, path=None):
+        self.path = None if path in (None, "-") else path
+
+    def _write(self, record):
+        line = json.dumps(record, default=str)
+        if self.path is None:
+            print(line, file=sys.stderr)
+        else:
+            with open(self.path, "a") as f:
+                f.write(line + "\n")
+
+    def stage_started(self, metrics):
+        self._write({"event": "stage_started", "pipeline": metrics.pipeline, "stage": metrics.name,
+                     "started_at": metrics.started_at, "pid": os.getpid()})
+
+    def stage_finished(self, metrics):
+        self._write({"event": "stage_finished", **metrics.to_dict()})
+
+
+class PrometheusTextfileHook:
+    # Her aşama bitiminde dosya atomik olarak yeniden yazılır (tmp + rename)
+    gauges = {"wall_seconds": "Wall time of the last run of the stage.",
+              "cpu_seconds": "CPU time of the last run of the stage.",
+              "rss_start_mb": "Resident set size at the start of the stage, in MB.",
+              "peak_rss_mb": "Highest sampled resident set size during the stage, in MB.",
+              "peak_rss_delta_mb": "Highest sampled resident set size during the stage minus the size at its "
+                                   "start, in MB.",
+              "rows_in": "Input rows of the stage.",
+              "rows_out": "Output rows of the stage."}
+
+    def __init__(self, path):
+        self.path = path
+        self.latest = {}
+
+    def stage_started(self, metrics):
+        pass
+
+    def stage_finished(self, metrics):
+        self.latest[(metrics.pipeline, metrics.name)] = metrics
+        lines = []
+        for field, help_text in self.gauges.items():
+            lines.append(f"# HELP flo_stage_{field} {help_text}")
+            lines.append(f"# TYPE flo_stage_{field} gauge")
+            for (pipeline, stage), stage_metrics in self.latest.items():
+                value = getattr(stage_metrics, field)
+                if value is not None:
+                    lines.append(f'flo_stage_{field}{{pipeline="{pipeline}",stage="{stage}"}} {value}')
+        lines.append("# HELP flo_stage_last_finished_timestamp_seconds Unix time the stage last finished.")
+        lines.append("# TYPE flo_stage_last_finished_timestamp_seconds gauge")
+        for (pipeline, stage), stage_metrics in self.latest.items():
+            finished = stage_metrics.started_at + stage_metrics.wall_seconds
+            lines.append(f'flo_stage_last_finished_timestamp_seconds{{pipeline="{pipeline}",stage="{stage}"}} '
+                         f'{finished}')
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp, self.path)
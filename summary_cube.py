@@ -0,0 +1,126 @@
+###############################################################
+# Kanal x RFM Segmenti x CLTV Segmenti Özet Küpü
+###############################################################
+# Script'lerde df.groupby("order_channel"), rfm.groupby("segment") ve
+# cltv_final.groupby("cltv_segment") ayrı ayrı, her biri tüm tabloyu tarayarak
+# hesaplanıyor; ilk 10 listeleri için de tüm tablo sort_values ile sıralanıyor.
+# build_cube tüm boyut kombinasyonlarını tek geçişte hesaplar:
+#   - her boyut kategorik koda çevrilir (eksik değerler kendi hücresine, etiket None)
+#   - kodlar tek bir hücre numarasında birleştirilir, sayım ve toplamlar np.bincount ile
+#   - ölçüler için count (eksik olmayan), sum ve mean sütunları
+# slice_cube küpü istenen boyutlara toplar (ör. sadece "segment"); ortalamalar toplam /
+# sayımdan yeniden hesaplandığı için müşteri bazındaki veriye dönmek gerekmez.
+# top_k: np.partition ile k. değer bulunur, sadece ona eşit ya da büyük satırlar sıralanır.
+# Küp save_cube ile Parquet olarak yazılır; dashboard'lar load_cube + slice_cube ile okur.
+
+import numpy as np
+import pandas as pd
+
+cube_dims = ["order_channel", "segment", "cltv_segment"]
+cube_measures = ["recency", "frequency", "monetary", "clv"]
+
+
+def _codes(series):
+    categorical = series.astype("category")
+    return categorical.cat.codes.to_numpy().astype(np.int64), list(categorical.cat.categories)
+
+
+def build_cube(customers, dims=None, measures=None):
+    # customers: müşteri bazında tablo (boyut ve ölçü sütunları; eksik olanlar atlanır)
+    # Çıktı: boş olmayan her hücre için bir satır: boyutlar, customers, <ölçü>_count/_sum/_mean
+    dims = [dim for dim in (cube_dims if dims is None else dims) if dim in customers.columns]
+    measures = [col for col in (cube_measures if measures is None else measures) if col in customers.columns]
+
+    cell = np.zeros(len(customers), dtype=np.int64)
+    levels = []
+    for dim in dims:
+        codes, labels = _codes(customers[dim])
+        # eksik değer (-1) -> son seviye
+        codes = np.where(codes < 0, len(labels), codes)
+        levels.append(labels + [None])
+        cell = cell * len(levels[-1]) + codes
+    n_cells = int(np.prod([len(level) for level in levels])) if levels else 1
+
+    counts = np.bincount(cell, minlength=n_cells)
+    columns = {"customers": counts}
+    for col in measures:
+        values = customers[col].to_numpy(dtype=np.float64)
+        present = ~np.isnan(values)
+        columns[f"{col}_count"] = np.bincount(cell[present], minlength=n_cells)
+        columns[f"{col}_sum"] = np.bincount(cell[present], weights=values[present], minlength=n_cells)
+
+    occupied = np.flatnonzero(counts)
+    cube = pd.DataFrame({name: values[occupied] for name, values in columns.items()})
+    # hücre numarası -> boyut etiketleri
+    remainder = occupied
+    labels = {}
+    for dim, level in zip(reversed(dims), reversed(levels)):
+        labels[dim] = np.asarray(level, dtype=object)[remainder % len(level)]
+        remainder = remainder // len(level)
+    for i, dim in enumerate(dims):
+        cube.insert(i, dim, labels[dim])
+    return add_means(cube, measures)
+
+
+def add_means(cube, measures):
+    # <ölçü>_mean = <ölçü>_sum / <ölçü>_count (sayım 0 ise NaN); polars_engine.build_cube de kullanır
+    for col in measures:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cube[f"{col}_mean"] = cube[f"{col}_sum"] / cube[f"{col}_count"].where(cube[f"{col}_count"] > 0)
+    return cube
+
+
+def cube_measure_cols(cube):
+    return [col[:-len("_sum")] for col in cube.columns if col.endswith("_sum")]
+
+
+def slice_cube(cube, dims, where=None):
+    # dims: tutulacak boyutlar, where: {boyut: değer ya da değer listesi} filtresi
+    # ör. slice_cube(cube, ["segment"]) -> rfm.groupby("segment") sayım / toplam / ortalamaları
+    if where:
+        mask = np.ones(len(cube), dtype=bool)
+        for dim, values in where.items():
+            values = [values] if isinstance(values, str) or values is None else list(values)
+            mask &= cube[dim].isin(values).to_numpy()
+        cube = cube[mask]
+    measures = cube_measure_cols(cube)
+    additive = ["customers"] + [f"{col}_{part}" for col in measures for part in ("count", "sum")]
+    if dims:
+        sliced = cube.groupby(list(dims), dropna=False, sort=True)[additive].sum().reset_index()
+    else:
+        sliced = pd.DataFrame({col: [cube[col].sum()] for col in additive})
+    return add_means(sliced, measures)
+
+
+def top_k(dataframe, col, k=10):
+    # dataframe.sort_values(col, ascending=False, kind="stable").head(k) ile aynı satırlar ve
+    # aynı sıra (eşitlikler satır sırasıyla, eksik değerler en sonda; polars_engine.top_k ile
+    # aynı). k. değere eşit ya da büyük satırlar seçilir, sadece onlar sıralanır.
+    values = dataframe[col].to_numpy(dtype=np.float64)
+    missing = np.isnan(values)
+    values = np.where(missing, -np.inf, values)
+    k = min(k, len(values))
+    if k == 0:
+        return dataframe.iloc[:0]
+    kth = -np.partition(-values, k - 1)[k - 1]
+    candidates = np.flatnonzero(values >= kth)
+    order = np.lexsort((candidates, missing[candidates], -values[candidates]))
+    return dataframe.iloc[candidates[order[:k]]]
+
+
+def save_cube(cube, path):
+    # boyut sütunları kategorik olarak yazılır
+    cube = cube.copy()
+    for dim in cube.columns:
+        if cube[dim].dtype == object:
+            cube[dim] = cube[dim].astype("category")
+    cube.to_parquet(path, index=False)
+    return path
+
+
+def load_cube(path):
+    cube = pd.read_parquet(path)
+    for dim in cube.columns:
+        if isinstance(cube[dim].dtype, pd.CategoricalDtype):
+            cube[dim] = cube[dim].astype(object).where(cube[dim].notna(), None)
+    return cube
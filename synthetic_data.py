@@ -0,0 +1,135 @@
+###############################################################
+# flo_data_20k Şemasında Sentetik Veri Üretici
+###############################################################
+# Depoda sadece 20k satırlık flo_data_20k.csv var. Benchmark ve ölçek testleri için aynı
+# şemada (master_id, kanal sütunları, dört tarih sütunu, online/offline sipariş sayıları ve
+# tutarları, interested_in_categories_12 listeleri) istenen boyutta veri üretir.
+# Tüm sütunlar numpy ile vektörel üretilir; büyük dosyalar write_flo_csv ile parça parça
+# yazılır, böylece 100M satır bile belleğe sığmak zorunda değildir.
+# generate_orders: backtesting.py için sipariş bazında geçmiş (incremental.py delta biçimi);
+# her müşterinin bir alışveriş hızı (Gamma) ve üstel dağılımlı bir aktif kalma süresi var,
+# yani BG/NBD'nin varsaydığı süreç.
+#
+# Kullanım:
+#   python synthetic_data.py flo_data_1m.csv --rows 1000000
+#   python synthetic_data.py orders.csv --rows 50000 --orders    (--rows: müşteri sayısı)
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+channels = np.array(["Android App", "Mobile", "Ios App", "Desktop", "Offline"], dtype=object)
+channel_probs = [0.48, 0.15, 0.14, 0.14, 0.09]
+categories = ["KADIN", "ERKEK", "COCUK", "AKTIFCOCUK", "AKTIFSPOR"]
+category_probs = [0.6, 0.35, 0.25, 0.2, 0.2]
+first_possible_date = pd.Timestamp("2013-01-14")
+last_possible_date = pd.Timestamp("2021-05-30")
+
+_hex = np.array(list("0123456789abcdef"))
+
+
+def _uuid_strings(rng, n_rows):
+    # rastgele 16 bayt -> "xxxxxxxx-xxxx-xxxx-xxxx-xxxxxxxxxxxx"
+    nibbles = rng.integers(0, 16, (n_rows, 32))
+    chars = np.full((n_rows, 36), "-", dtype="<U1")
+    positions = [i for i in range(36) if i not in (8, 13, 18, 23)]
+    chars[:, positions] = _hex[nibbles]
+    return chars.view("<U36").ravel().astype(object)
+
+
+def _category_strings(rng, n_rows):
+    # her kategori bağımsız olarak seçilir; 32 olası küme önceden string'e çevrilir
+    bits = (rng.random((n_rows, len(categories))) < category_probs) @ (1 << np.arange(len(categories)))
+    lookup = np.array(["[" + ", ".join(cat for i, cat in enumerate(categories) if mask >> i & 1) + "]"
+                       for mask in range(1 << len(categories))], dtype=object)
+    return lookup[bits]
+
+
+def generate_flo_data(n_rows, seed=42):
+    rng = np.random.default_rng(seed)
+    day = np.timedelta64(1, "D")
+    last_span = 365
+    last = np.datetime64(last_possible_date, "D") - rng.integers(0, last_span, n_rows) * day
+    max_tenure = (last - np.datetime64(first_possible_date, "D")) // day
+    first = last - (rng.random(n_rows) ** 2 * max_tenure).astype(np.int64) * day
+
+    # omnichannel: her müşteri hem online hem offline en az bir alışveriş yapmış
+    online_num = 1 + rng.negative_binomial(1, 0.35, n_rows)
+    offline_num = 1 + rng.negative_binomial(1, 0.6, n_rows)
+    online_value = np.round(online_num * rng.gamma(2.0, 110.0, n_rows), 2)
+    offline_value = np.round(offline_num * rng.gamma(2.0, 90.0, n_rows), 2)
+
+    # son alışveriş ya online ya offline kanaldan; diğer kanalın son tarihi daha eski
+    tenure = (last - first) // day
+    other = last - (rng.random(n_rows) * tenure).astype(np.int64) * day
+    last_is_online = rng.random(n_rows) < 0.6
+    last_online = np.where(last_is_online, last, other)
+    last_offline = np.where(last_is_online, other, last)
+
+    order_channel = channels[rng.choice(len(channels), n_rows, p=channel_probs)]
+    online_channel = np.where(order_channel == "Offline", channels[rng.integers(0, 4, n_rows)], order_channel)
+    last_order_channel = np.where(last_is_online, online_channel, "Offline")
+
+    return pd.DataFrame({"master_id": _uuid_strings(rng, n_rows),
+                         "order_channel": order_channel,
+                         "last_order_channel": last_order_channel,
+                         "first_order_date": first,
+                         "last_order_date": last,
+                         "last_order_date_online": last_online,
+                         "last_order_date_offline": last_offline,
+                         "order_num_total_ever_online": online_num.astype(float),
+                         "order_num_total_ever_offline": offline_num.astype(float),
+                         "customer_value_total_ever_offline": offline_value,
+                         "customer_value_total_ever_online": online_value,
+                         "interested_in_categories_12": _category_strings(rng, n_rows)})
+
+
+def generate_orders(n_customers, start="2019-01-01", end=last_possible_date, seed=42):
+    rng = np.random.default_rng(seed)
+    day = np.timedelta64(1, "D")
+    start = np.datetime64(pd.Timestamp(start), "D")
+    span = (np.datetime64(pd.Timestamp(end), "D") - start) // day
+    birth = rng.integers(0, span, n_customers)
+    # günlük alışveriş hızı ve aktif kalma süresi (gün); ilk siparişten sonra tekrar sayısı Poisson
+    rate = rng.gamma(0.8, 1 / 30, n_customers)
+    active = np.minimum(rng.exponential(365, n_customers), span - birth)
+    n_orders = 1 + rng.poisson(rate * active)
+
+    customer = np.repeat(np.arange(n_customers), n_orders)
+    is_first = np.ones(len(customer), dtype=bool)
+    is_first[1:] = customer[1:] != customer[:-1]
+    offset = np.where(is_first, 0, (rng.random(len(customer)) * active[customer]).astype(np.int64))
+    spend = rng.gamma(4.0, 50.0, n_customers)
+
+    orders = pd.DataFrame({"master_id": _uuid_strings(rng, n_customers)[customer],
+                           "order_date": start + (birth[customer] + offset) * day,
+                           "order_channel": channels[rng.choice(len(channels), len(customer), p=channel_probs)],
+                           "order_value": np.round(rng.gamma(4.0, spend[customer] / 4.0), 2)})
+    return orders.sort_values("order_date", kind="stable", ignore_index=True)
+
+
+def write_flo_csv(path, n_rows, chunksize=1_000_000, seed=42):
+    # flo_data_20k.csv ile aynı biçimde (tarihler YYYY-MM-DD) parça parça yazar
+    for i, start in enumerate(range(0, n_rows, chunksize)):
+        chunk = generate_flo_data(min(chunksize, n_rows - start), seed=seed + i)
+        chunk.to_csv(path, mode="w" if i == 0 else "a", header=i == 0, index=False, date_format="%Y-%m-%d")
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path")
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--chunksize", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--orders", action="store_true", help="müşteri tablosu yerine sipariş geçmişi")
+    args = parser.parse_args(argv)
+    if args.orders:
+        generate_orders(args.rows, seed=args.seed).to_csv(args.path, index=False, date_format="%Y-%m-%d")
+    else:
+        write_flo_csv(args.path, args.rows, args.chunksize, args.seed)
+
+
+if __name__ == "__main__":
+    main()
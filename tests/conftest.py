@@ -0,0 +1,5 @@
+import os
+import sys
+
+# modüller depo kökünde; testler kökten ya da tests/ içinden çalıştırılabilsin
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,102 @@
+import gzip
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import audience_export
+from audience_export import export_audiences, resolve_audiences, write_ids
+from category_index import CategoryIndex
+
+audiences = {"yeni_marka": {"segments": ["champions", "loyal_customers"], "all_of": ["KADIN"]},
+             "indirim": {"segments": ["cant_loose", "new_customers"], "any_of": ["ERKEK", "COCUK"]},
+             "kadin_disi": {"none_of": ["KADIN"]},
+             "herkes": {},
+             "bos": {"segments": ["yok"]}}
+
+
+@pytest.fixture(scope="module")
+def customers():
+    rng = np.random.default_rng(4)
+    n = 3000
+    categories = np.array(["KADIN", "ERKEK", "COCUK", "AKTIFCOCUK", "AKTIFSPOR"])
+    interests = ["[" + ", ".join(categories[rng.random(len(categories)) < 0.35]) + "]" for _ in range(n)]
+    segments = rng.choice(["champions", "loyal_customers", "cant_loose", "new_customers", "hibernating"], n)
+    return pd.DataFrame({"master_id": [f"id-{i:05d}" for i in range(n)],
+                         "segment": segments,
+                         "interested_in_categories_12": interests})
+
+
+def _expected_rows(customers, spec):
+    # FLO_RFM.py'deki string taramalı seçimin tam kategori adıyla eşleşen hali
+    interests = customers["interested_in_categories_12"].str.strip("[]").str.split(", ").apply(set)
+    mask = np.ones(len(customers), dtype=bool)
+    if spec.get("segments"):
+        mask &= customers["segment"].isin(spec["segments"]).to_numpy()
+    for category in spec.get("all_of", ()):
+        mask &= interests.apply(lambda x: category in x).to_numpy()
+    if spec.get("any_of"):
+        mask &= interests.apply(lambda x: bool(x & set(spec["any_of"]))).to_numpy()
+    for category in spec.get("none_of", ()):
+        mask &= ~interests.apply(lambda x: category in x).to_numpy()
+    return np.flatnonzero(mask)
+
+
+def test_resolve_audiences(customers):
+    cat_index = CategoryIndex.from_series(customers["interested_in_categories_12"])
+    resolved = resolve_audiences(customers["segment"], cat_index, audiences)
+    assert list(resolved) == list(audiences)
+    for name, spec in audiences.items():
+        np.testing.assert_array_equal(resolved[name], _expected_rows(customers, spec), err_msg=name)
+
+
+def _read_ids(path, fmt):
+    if fmt == "parquet":
+        return pd.read_parquet(path)["master_id"].tolist()
+    return pd.read_csv(path, compression="gzip" if fmt == "csv.gz" else None)["master_id"].tolist()
+
+
+@pytest.mark.parametrize("fmt", ["csv", "csv.gz", "parquet"])
+def test_manifest(customers, tmp_path, fmt):
+    cat_index = CategoryIndex.from_series(customers["interested_in_categories_12"])
+    manifest = export_audiences(customers["master_id"], customers["segment"], cat_index, audiences,
+                                str(tmp_path), fmt=fmt, n_jobs=3)
+    with open(tmp_path / "manifest.json") as f:
+        assert json.load(f) == manifest
+    assert manifest["format"] == fmt
+    assert [entry["name"] for entry in manifest["audiences"]] == list(audiences)
+    for entry in manifest["audiences"]:
+        path = tmp_path / entry["path"]
+        expected = customers["master_id"].to_numpy()[_expected_rows(customers, audiences[entry["name"]])]
+        assert entry["rows"] == len(expected)
+        assert _read_ids(path, fmt) == expected.tolist()
+        assert entry["bytes"] == path.stat().st_size
+        assert entry["sha256"] == hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def test_manifest_is_reproducible(customers, tmp_path):
+    # csv.gz başlığında zaman yok: aynı liste aynı özeti verir
+    cat_index = CategoryIndex.from_series(customers["interested_in_categories_12"])
+    first, second = (export_audiences(customers["master_id"], customers["segment"], cat_index, audiences,
+                                      str(tmp_path / run), fmt="csv.gz")["audiences"] for run in ("a", "b"))
+    assert [entry["sha256"] for entry in first] == [entry["sha256"] for entry in second]
+
+
+@pytest.mark.parametrize("ids", [["a-1", "b-2"], ["a,1", 'b"2', "c"], []])
+def test_csv_matches_to_csv(tmp_path, ids, monkeypatch):
+    expected = pd.DataFrame({"master_id": ids}).to_csv(index=False).encode("utf-8")
+    write_ids(np.array(ids, dtype=object), tmp_path / "ids.csv", "csv")
+    assert (tmp_path / "ids.csv").read_bytes() == expected
+    write_ids(np.array(ids, dtype=object), tmp_path / "ids.csv.gz", "csv.gz")
+    assert gzip.decompress((tmp_path / "ids.csv.gz").read_bytes()) == expected
+    # pyarrow olmadan da aynı çıktı
+    monkeypatch.setattr(audience_export, "pa", None)
+    write_ids(np.array(ids, dtype=object), tmp_path / "ids_pandas.csv", "csv")
+    assert (tmp_path / "ids_pandas.csv").read_bytes() == expected
+
+
+def test_unknown_format(customers, tmp_path):
+    with pytest.raises(ValueError):
+        export_audiences(customers["master_id"], customers["segment"], None, audiences, str(tmp_path), fmt="xlsx")
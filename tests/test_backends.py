@@ -0,0 +1,63 @@
+import filecmp
+import warnings
+
+import pandas as pd
+import pytest
+
+import pipelines
+from synthetic_data import write_flo_csv
+
+pytest.importorskip("polars")
+
+backends = ["pandas", "polars"]
+
+
+@pytest.fixture(scope="module")
+def data(tmp_path_factory):
+    path = tmp_path_factory.mktemp("flo") / "flo.csv"
+    write_flo_csv(str(path), 3000, seed=21)
+    return str(path)
+
+
+@pytest.fixture(scope="module")
+def outputs(data, tmp_path_factory):
+    # her backend için rfm, cltv ve summary ayrı klasörlere
+    dirs = {}
+    for backend in backends:
+        out = tmp_path_factory.mktemp(backend)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            rows = {"rfm": pipelines.count_rows(pipelines.run_rfm(data, str(out / "rfm"), use_cache=False,
+                                                                  backend=backend)),
+                    "cltv": pipelines.count_rows(pipelines.run_cltv(data, str(out / "cltv"), use_cache=False,
+                                                                    backend=backend))}
+            pipelines.run_summary(data, str(out / "summary"), use_cache=False, backend=backend)
+        dirs[backend] = (out, rows)
+    return dirs
+
+
+def _paths(outputs, name):
+    return [str(outputs[backend][0] / name) for backend in backends]
+
+
+@pytest.mark.parametrize("name", ["rfm/rfm.csv", "cltv/cltv.csv", "summary/rfm.csv", "summary/cltv.csv",
+                                  "summary/top_clv.csv", "summary/top_monetary.csv",
+                                  "summary/top_frequency.csv"])
+def test_customer_tables_identical(outputs, name):
+    assert filecmp.cmp(*_paths(outputs, name), shallow=False)
+
+
+def test_row_counts(outputs):
+    assert outputs["pandas"][1] == outputs["polars"][1]
+
+
+@pytest.mark.parametrize("name", ["rfm/rfm_segment_summary.csv", "cltv/cltv_segment_summary.csv"])
+def test_segment_summaries(outputs, name):
+    # float32 tutarların ortalamaları toplama sırasına göre son basamakta ayrışabilir
+    pandas_summary, polars_summary = (pd.read_csv(path, index_col=0) for path in _paths(outputs, name))
+    pd.testing.assert_frame_equal(pandas_summary, polars_summary, rtol=1e-6)
+
+
+def test_summary_cube(outputs):
+    pandas_cube, polars_cube = (pd.read_parquet(path) for path in _paths(outputs, "summary/summary_cube.parquet"))
+    pd.testing.assert_frame_equal(pandas_cube, polars_cube, check_categorical=False, rtol=1e-6)
@@ -0,0 +1,51 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtesting import backtest, rolling_cutoffs
+from synthetic_data import generate_orders
+
+metric_cols = ["customers", "mae_purchases_3m", "mae_purchases_6m", "clv_rank_corr", "segment_agreement",
+               "segment_stability", "r", "alpha", "a", "b", "p", "q", "v"]
+
+
+@pytest.fixture(scope="module")
+def orders():
+    return generate_orders(1500, start="2019-06-01", end="2021-06-01", seed=3)
+
+
+def _run(orders, **kwargs):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return backtest(orders, rolling_cutoffs(orders, n_cutoffs=3), **kwargs)
+
+
+@pytest.fixture(scope="module")
+def grid(orders):
+    return _run(orders, bgf_penalizer=[0.001, 0.1], ggf_penalizer=[0.01, 0.1], n_jobs=2)
+
+
+def test_grid_covers_every_cutoff_and_penalizer_pair(orders, grid):
+    assert len(grid) == 3 * 2 * 2
+    assert "error" not in grid.columns
+    counts = grid.groupby(["bgf_penalizer", "ggf_penalizer"]).size()
+    assert counts.tolist() == [3, 3, 3, 3]
+    assert sorted(grid["cutoff"].unique()) == [pd.Timestamp(c) for c in rolling_cutoffs(orders, n_cutoffs=3)]
+
+
+@pytest.mark.parametrize("bgf_penalizer, ggf_penalizer", [(0.001, 0.01), (0.1, 0.1)])
+def test_grid_rows_match_single_penalizer_runs(orders, grid, bgf_penalizer, ggf_penalizer):
+    # process pool'daki kombinasyonlar tek penalizer'lı seri çalıştırmayla aynı sonucu vermeli;
+    # segment_stability de aynı penalizer çiftinin önceki cutoff'una göre hesaplanmalı
+    single = _run(orders, bgf_penalizer=bgf_penalizer, ggf_penalizer=ggf_penalizer, n_jobs=1)
+    rows = grid[(grid["bgf_penalizer"] == bgf_penalizer) & (grid["ggf_penalizer"] == ggf_penalizer)]
+    assert np.isnan(rows["segment_stability"].iloc[0])
+    pd.testing.assert_frame_equal(rows[metric_cols].reset_index(drop=True),
+                                  single[metric_cols].reset_index(drop=True))
+
+
+def test_penalizer_changes_fit(grid):
+    params = grid.groupby("bgf_penalizer")["r"].mean()
+    assert params[0.001] != params[0.1]
@@ -0,0 +1,59 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cltv_model import fit_bgf, fit_ggf
+from cltv_scoring import score_customers
+from flo_cache import prepare_flo_data
+from flo_loader import load_flo_data
+from outliers import cap_outliers
+from rfm_metrics import compute_cltv_df
+from synthetic_data import write_flo_csv
+
+
+@pytest.fixture(scope="module")
+def fitted(tmp_path_factory):
+    path = tmp_path_factory.mktemp("flo") / "flo.csv"
+    write_flo_csv(str(path), 3000, seed=5)
+    df = load_flo_data(str(path))
+    cap_outliers(df)
+    cltv_df = compute_cltv_df(prepare_flo_data(df), pd.Timestamp("2021-06-01"))
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        bgf = fit_bgf(cltv_df["frequency"], cltv_df["recency_cltv_weekly"], cltv_df["T_weekly"],
+                      penalizer_coef=0.001)
+        ggf = fit_ggf(cltv_df["frequency"], cltv_df["monetary_cltv_avg"], penalizer_coef=0.01)
+    return cltv_df, bgf, ggf
+
+
+def _baseline(cltv_df, bgf, ggf):
+    # FLO_CLTV_Prediction.py'deki lifetimes çağrıları
+    args = (cltv_df["frequency"], cltv_df["recency_cltv_weekly"], cltv_df["T_weekly"])
+    return {"exp_sales_3_month": bgf.predict(4 * 3, *args),
+            "exp_sales_6_month": bgf.predict(4 * 6, *args),
+            "exp_sales_12_month": bgf.predict(4 * 12, *args),
+            "exp_average_value": ggf.conditional_expected_average_profit(cltv_df["frequency"],
+                                                                         cltv_df["monetary_cltv_avg"]),
+            "clv": ggf.customer_lifetime_value(bgf, *args, cltv_df["monetary_cltv_avg"],
+                                               time=6 * 4, freq="W", discount_rate=0.01)}
+
+
+@pytest.mark.parametrize("batch_size, n_jobs", [(250_000, 1), (700, 1), (700, 2)])
+def test_score_customers_matches_lifetimes(fitted, batch_size, n_jobs):
+    cltv_df, bgf, ggf = fitted
+    scored = score_customers(cltv_df, bgf, ggf, batch_size=batch_size, n_jobs=n_jobs,
+                             clv_time=6 * 4, freq="W", discount_rate=0.01)
+    pd.testing.assert_index_equal(scored.index, cltv_df.index)
+    pd.testing.assert_frame_equal(scored[cltv_df.columns], cltv_df)
+    for col, expected in _baseline(cltv_df, bgf, ggf).items():
+        np.testing.assert_allclose(scored[col].to_numpy(), np.asarray(expected, dtype=float), rtol=1e-9,
+                                   err_msg=col)
+
+
+def test_batching_does_not_change_scores(fitted):
+    cltv_df, bgf, ggf = fitted
+    serial = score_customers(cltv_df, bgf, ggf, batch_size=700, n_jobs=1)
+    parallel = score_customers(cltv_df, bgf, ggf, batch_size=700, n_jobs=2, max_in_flight=1)
+    pd.testing.assert_frame_equal(serial, parallel)
@@ -0,0 +1,126 @@
+import json
+import threading
+import warnings
+from http.server import ThreadingHTTPServer
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import pipelines
+from cltv_service import CLTVStore, _handler
+from synthetic_data import write_flo_csv
+
+
+@pytest.fixture(scope="module")
+def run(tmp_path_factory):
+    # run_summary -> cltv skorları + RFM segmentleri aynı store'da
+    tmp = tmp_path_factory.mktemp("service")
+    path = tmp / "flo.csv"
+    write_flo_csv(str(path), 2000, seed=9)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        pipelines.run_summary(str(path), str(tmp / "out"), use_cache=False, store_dir=str(tmp / "store"))
+    cltv_final = pd.read_csv(tmp / "out" / "cltv.csv", index_col="master_id")
+    rfm = pd.read_csv(tmp / "out" / "rfm.csv", index_col="master_id")
+    return CLTVStore(str(tmp / "store")), cltv_final, rfm
+
+
+@pytest.fixture(scope="module")
+def server(run):
+    store = run[0]
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _handler(store))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}", store
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _get(url):
+    try:
+        with urlopen(url) as response:
+            return response.status, json.load(response)
+    except HTTPError as e:
+        return e.code, json.load(e)
+
+
+def test_lookup(run):
+    store, cltv_final, rfm = run
+    master_id = cltv_final.index[17]
+    record = store.lookup(master_id)
+    assert record["segment"] == rfm.loc[master_id, "segment"]
+    assert record["cltv_segment"] == cltv_final.loc[master_id, "cltv_segment"]
+    assert record["clv"] == pytest.approx(cltv_final.loc[master_id, "clv"])
+    assert store.lookup("yok") is None
+
+
+def test_top(run):
+    store, cltv_final, rfm = run
+    expected = cltv_final.sort_values("clv", ascending=False, kind="stable").head(5).index.tolist()
+    assert [record["master_id"] for record in store.top(5)] == expected
+
+    champions = store.top(50, segment=("segment", "champions"))
+    assert champions and all(record["segment"] == "champions" for record in champions)
+    clv = [record["clv"] for record in champions]
+    assert clv == sorted(clv, reverse=True)
+    in_segment = cltv_final.join(rfm["segment"])
+    assert len(champions) == min(50, int((in_segment["segment"] == "champions").sum()))
+
+    with pytest.raises(KeyError):
+        store.top(5, segment=("segment", "yok"))
+    with pytest.raises(ValueError):
+        store.top(0)
+
+
+def test_predict_matches_batch_scores(run):
+    store, cltv_final, _ = run
+    row = cltv_final.iloc[3]
+    scores = store.predict(row["frequency"], row["recency_cltv_weekly"], row["T_weekly"], row["monetary_cltv_avg"])
+    for col in ["exp_sales_3_month", "exp_sales_6_month", "exp_average_value", "clv"]:
+        assert scores[col] == pytest.approx(row[col], rel=1e-9)
+
+
+def test_http_ok(server):
+    url, store = server
+    status, body = _get(f"{url}/top?n=3&segment=segment:champions")
+    assert status == 200
+    assert body == store.top(3, segment=("segment", "champions"))
+    status, body = _get(f"{url}/customer/{body[0]['master_id']}")
+    assert status == 200 and body["segment"] == "champions"
+
+
+@pytest.mark.parametrize("query, message", [
+    ("/predict?frequency=5&recency=20&T=50", "eksik parametre: monetary"),
+    ("/predict?frequency=5", "eksik parametre: recency, T, monetary"),
+    ("/predict?frequency=x&recency=20&T=50&monetary=10", "frequency sayı olmalı"),
+    ("/top?segment=segment:yok", "bilinmeyen segment"),
+    ("/top?segment=champions", "sütun:etiket"),
+    ("/top?n=0", "n 1 ile"),
+])
+def test_http_bad_request(server, query, message):
+    url, _ = server
+    status, body = _get(url + query)
+    assert status == 400
+    assert message in body["error"]
+
+
+def test_http_not_found(server):
+    url, _ = server
+    assert _get(f"{url}/customer/yok")[0] == 404
+    assert _get(f"{url}/yok")[0] == 404
+
+
+def test_http_internal_error(server, monkeypatch):
+    url, store = server
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("mmap okunamadı")
+
+    monkeypatch.setattr(store, "top", broken)
+    status, body = _get(f"{url}/top?n=3")
+    assert status == 500
+    assert body == {"error": "mmap okunamadı"}
+    assert np.isfinite(_get(f"{url}/predict?frequency=5&recency=20&T=50&monetary=10")[1]["clv"])
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from incremental import IncrementalState, count_cols, delta_totals
+from rfm_segments import compile_seg_map, seg_map
+from synthetic_data import generate_orders
+
+metric_cols = ["first_order_date", "last_order_date"] + count_cols + ["recency", "T", "frequency", "monetary"]
+
+
+@pytest.fixture(scope="module")
+def orders():
+    return generate_orders(2000, start="2020-01-01", end="2021-06-01", seed=7)
+
+
+def _split(orders, cutoff, days=7):
+    cutoff = pd.Timestamp(cutoff)
+    analysis_date = cutoff + pd.Timedelta(days=days)
+    base = orders[orders["order_date"] < cutoff]
+    delta = orders[(orders["order_date"] >= cutoff) & (orders["order_date"] < analysis_date)]
+    return base, delta, cutoff, analysis_date
+
+
+def _as_ns(frame):
+    # Parquet tarihleri farklı bir birimle (ör. [s] -> [ms]) geri okuyabilir; değerler karşılaştırılır
+    return frame.astype({col: "datetime64[ns]" for col in ["first_order_date", "last_order_date"]})
+
+
+def _build(orders, analysis_date):
+    return IncrementalState.build(delta_totals(orders).reset_index(), analysis_date)
+
+
+def test_apply_delta_matches_full_rebuild(orders):
+    base, delta, cutoff, analysis_date = _split(orders, "2021-03-01")
+    state = _build(base, cutoff)
+    changed = state.apply_delta(delta, analysis_date)
+    full = _build(pd.concat([base, delta]), analysis_date)
+
+    assert set(changed) == set(delta["master_id"])
+    assert not delta["master_id"].isin(base["master_id"]).all()  # yeni müşteriler de var
+    pd.testing.assert_frame_equal(state.state[metric_cols].sort_index(), full.state[metric_cols].sort_index(),
+                                  check_freq=False)
+
+
+def test_apply_delta_rescores_only_changed_customers(orders):
+    base, delta, cutoff, analysis_date = _split(orders, "2021-03-01")
+    state = _build(base, cutoff)
+    before = state.state.copy()
+    changed = state.apply_delta(delta, analysis_date)
+
+    # değişmeyen müşterilerin skorları kaydırılan kesim noktalarıyla aynı kalır
+    unchanged = before.index.difference(changed)
+    score_cols = ["recency_score", "frequency_score", "monetary_score", "segment"]
+    pd.testing.assert_frame_equal(state.state.loc[unchanged, score_cols], before.loc[unchanged, score_cols])
+
+    # değişenler kayıtlı kesim noktalarına göre skorlanır
+    touched = state.state.loc[changed]
+    for metric in ("recency", "frequency", "monetary"):
+        expected = state._score(metric, touched[metric].to_numpy())
+        np.testing.assert_array_equal(touched[f"{metric}_score"].to_numpy(), expected)
+
+    table, labels = compile_seg_map(seg_map)
+    codes = table[state.state["recency_score"].to_numpy() - 1, state.state["frequency_score"].to_numpy() - 1]
+    np.testing.assert_array_equal(np.asarray(labels)[codes], state.state["segment"].astype(str).to_numpy())
+
+
+def test_empty_delta_only_shifts_recency_and_t(orders):
+    base, _, cutoff, _ = _split(orders, "2021-03-01")
+    state = _build(base, cutoff)
+    before = state.state.copy()
+    changed = state.apply_delta(orders.iloc[:0], cutoff + pd.Timedelta(days=3))
+
+    assert len(changed) == 0
+    np.testing.assert_array_equal(state.state["recency"].to_numpy(), before["recency"].to_numpy() + 3)
+    np.testing.assert_array_equal(state.state["T"].to_numpy(), before["T"].to_numpy() + 3)
+    pd.testing.assert_frame_equal(state.state.drop(columns=["recency", "T"]), before.drop(columns=["recency", "T"]))
+
+
+def test_save_load_round_trip(orders, tmp_path):
+    base, delta, cutoff, analysis_date = _split(orders, "2021-03-01")
+    state = _build(base, cutoff)
+    path = str(tmp_path / "state.parquet")
+    state.save(path)
+    loaded = IncrementalState.load(path)
+
+    assert loaded.analysis_date == state.analysis_date
+    assert loaded.edges == state.edges
+    pd.testing.assert_frame_equal(_as_ns(loaded.state), _as_ns(state.state), check_freq=False)
+
+    state.apply_delta(delta, analysis_date)
+    loaded.apply_delta(delta, analysis_date)
+    pd.testing.assert_frame_equal(_as_ns(loaded.state), _as_ns(state.state), check_freq=False)
+    pd.testing.assert_frame_equal(loaded.rfm(), state.rfm(), check_freq=False)
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from flo_loader import load_flo_data, stream_outlier_thresholds
+from outliers import outlier_cols, outlier_thresholds_frame, streaming_outlier_thresholds
+from synthetic_data import write_flo_csv
+
+
+@pytest.fixture(scope="module")
+def values():
+    rng = np.random.default_rng(11)
+    n = 200_000
+    return pd.DataFrame({"order_num": 1 + rng.poisson(2.0, n).astype(float),
+                         "value": rng.lognormal(5.0, 1.2, n)})
+
+
+def _chunks(frame, n_chunks):
+    return [frame.iloc[part] for part in np.array_split(np.arange(len(frame)), n_chunks)]
+
+
+def test_integer_columns_are_exact(values):
+    chunks = _chunks(values.sample(frac=1, random_state=0), 9)
+    expected = outlier_thresholds_frame(values, ["order_num"])
+    assert streaming_outlier_thresholds(chunks, ["order_num"]) == expected
+
+
+@pytest.mark.parametrize("compression", [200, 500])
+def test_continuous_columns_error_bound(values, compression):
+    # farklı değer sayısı max_exact'i geçince t-digest'e geçilir; kuyruk quantile'larının
+    # sıra hatası ve limitlerin (up - low)'a göre hatası küçük kalmalı
+    chunks = _chunks(values, 13)
+    expected = outlier_thresholds_frame(values, ["value"])["value"]
+    low, up = streaming_outlier_thresholds(chunks, ["value"], compression=compression, max_exact=1000)["value"]
+    np.testing.assert_allclose([low, up], expected, atol=1e-3 * (expected[1] - expected[0]))
+
+    # limitlerden geri çözülen 1% / 99% quantile'larının sıra hatası
+    iqr = (up - low) / 4.0
+    ranks = np.searchsorted(np.sort(values["value"].to_numpy()), [low + 1.5 * iqr, up - 1.5 * iqr]) / len(values)
+    np.testing.assert_allclose(ranks, [0.01, 0.99], atol=1e-4)
+
+
+def test_stream_outlier_thresholds_matches_full_read(tmp_path):
+    path = tmp_path / "flo.csv"
+    write_flo_csv(str(path), 4000, seed=2)
+    expected = outlier_thresholds_frame(load_flo_data(str(path)))
+    assert stream_outlier_thresholds(str(path), chunksize=700) == expected
+    assert list(expected) == outlier_cols
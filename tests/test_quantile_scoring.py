@@ -0,0 +1,99 @@
+import uuid
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import quantile_scoring
+from quantile_scoring import (QuantileScorer, cltv_score_specs, fit_scorers, load_scorers, rfm_score_specs,
+                              save_scorers, score_frame)
+from quantile_sketch import QuantileSketch
+
+
+@pytest.fixture(scope="module")
+def rfm():
+    # pipelines'taki rfm gibi: master_id'ye göre sıralı, frequency'de çok sayıda eşitlik
+    rng = np.random.default_rng(3)
+    n = 6000
+    ids = sorted(str(uuid.UUID(int=int(x))) for x in rng.integers(0, 2 ** 63, n))
+    return pd.DataFrame({"recency": rng.integers(1, 400, n),
+                         "frequency": 2 + rng.poisson(1.5, n),
+                         "monetary": np.round(rng.gamma(2.0, 150.0, n), 2),
+                         "clv": rng.gamma(1.5, 80.0, n)},
+                        index=pd.Index(ids, name="master_id"))
+
+
+def _shuffled_partitions(frame, n_parts, seed):
+    order = np.random.default_rng(seed).permutation(len(frame))
+    return [frame.iloc[part] for part in np.array_split(order, n_parts)]
+
+
+def _qcut_scores(rfm):
+    # pipelines._pandas_rfm'deki pd.qcut çağrıları
+    return {"recency": pd.qcut(rfm["recency"], 5, labels=[5, 4, 3, 2, 1]),
+            "frequency": pd.qcut(rfm["frequency"].rank(method="first"), 5, labels=[1, 2, 3, 4, 5]),
+            "monetary": pd.qcut(rfm["monetary"], 5, labels=[1, 2, 3, 4, 5])}
+
+
+@pytest.mark.parametrize("col, n_bins", [("recency", 5), ("monetary", 5), ("clv", 4)])
+def test_merged_cut_points_match_qcut(rfm, col, n_bins):
+    scorer = QuantileScorer(n_bins, list(range(n_bins)))
+    for part in _shuffled_partitions(rfm, 7, seed=1):
+        scorer.merge(QuantileScorer(n_bins, list(range(n_bins))).partial_fit(part[col].to_numpy()))
+    _, edges = pd.qcut(rfm[col], n_bins, retbins=True)
+    np.testing.assert_array_equal(scorer.fit_cut_points(), edges[1:-1])
+
+
+@pytest.mark.parametrize("n_parts, n_jobs, seed", [(1, 1, 0), (7, 1, 1), (7, 2, 2)])
+def test_rfm_scores_match_qcut(rfm, n_parts, n_jobs, seed):
+    scorers = fit_scorers(_shuffled_partitions(rfm, n_parts, seed), rfm_score_specs, n_jobs=n_jobs)
+    scored = score_frame(rfm, scorers)
+    for col, expected in _qcut_scores(rfm).items():
+        np.testing.assert_array_equal(scored[col + "_score"].to_numpy(), expected.to_numpy(), err_msg=col)
+
+
+def test_frequency_ties_resolved_through_histogram(rfm, monkeypatch):
+    # eşit değerli aday sayısı limiti aşınca eşik master_id histogram turlarıyla daraltılır
+    monkeypatch.setattr(quantile_scoring, "tie_collect_limit", 50)
+    scorers = fit_scorers(_shuffled_partitions(rfm, 5, seed=4), {"frequency": rfm_score_specs["frequency"]})
+    expected = _qcut_scores(rfm)["frequency"]
+    np.testing.assert_array_equal(score_frame(rfm, scorers)["frequency_score"].to_numpy(), expected.to_numpy())
+    assert any(tie_id is not None for tie_id in scorers["frequency"].tie_ids)
+
+
+def test_tie_break_does_not_depend_on_row_order(rfm):
+    shuffled = rfm.sample(frac=1, random_state=7)
+    scorers = fit_scorers([shuffled], rfm_score_specs)
+    scored = score_frame(shuffled, scorers).loc[rfm.index]
+    np.testing.assert_array_equal(scored["frequency_score"].to_numpy(), _qcut_scores(rfm)["frequency"].to_numpy())
+
+
+def test_tie_break_needs_reusable_partitions(rfm):
+    with pytest.raises(ValueError):
+        fit_scorers(iter([rfm]), rfm_score_specs)
+
+
+def test_saved_scorers_score_new_customers(rfm, tmp_path):
+    scorers = fit_scorers([rfm], {**rfm_score_specs, **cltv_score_specs})
+    path = tmp_path / "scorers.json"
+    save_scorers(scorers, path)
+    loaded = load_scorers(path)
+    pd.testing.assert_frame_equal(score_frame(rfm, loaded), score_frame(rfm, scorers))
+    # eğitimdeki aralığın dışındaki değerler ilk / son dilime düşer
+    new = pd.DataFrame({"recency": [0, 10_000], "frequency": [1, 500], "monetary": [0.0, 1e9],
+                        "clv": [-1.0, 1e9]}, index=pd.Index(["a", "b"], name="master_id"))
+    scored = score_frame(new, loaded)
+    assert scored["recency_score"].tolist() == [5, 1]
+    assert scored["frequency_score"].tolist() == [1, 5]
+    assert scored["cltv_segment"].tolist() == ["D", "A"]
+
+
+def test_compressed_sketch_rank_error():
+    values = np.random.default_rng(0).gamma(2.0, 100.0, 200_000)
+    sketch = QuantileSketch(compression=500, max_exact=1000)
+    for chunk in np.array_split(values, 9):
+        sketch.merge(QuantileSketch(500, 1000).update(chunk))
+    assert not sketch.exact
+    qs = np.array([0.01, 0.2, 0.5, 0.8, 0.99])
+    ranks = np.searchsorted(np.sort(values), sketch.quantile(qs)) / len(values)
+    assert np.abs(ranks - qs).max() < 1e-3
@@ -0,0 +1,83 @@
+import pandas as pd
+import pytest
+
+from flo_cache import prepare_flo_data
+from flo_loader import load_flo_data
+from rfm_metrics import compute_cltv_df, compute_rfm
+from synthetic_data import write_flo_csv
+
+analysis_date = pd.Timestamp("2021-06-01")
+
+
+@pytest.fixture(scope="module")
+def customers(tmp_path_factory):
+    path = tmp_path_factory.mktemp("flo") / "flo.csv"
+    write_flo_csv(str(path), 3000, seed=3)
+    return prepare_flo_data(load_flo_data(str(path)))
+
+
+def _baseline_rfm(df):
+    # FLO_RFM.py'deki lambda'lı groupby
+    rfm = df.groupby("master_id").agg({"last_order_date": lambda x: (analysis_date - x.max()).days,
+                                       "total_number_of_purchases": lambda y: y,
+                                       "total_price": lambda z: z})
+    rfm.columns = ["recency", "frequency", "monetary"]
+    return rfm
+
+
+def _baseline_cltv_df(df):
+    # FLO_CLTV_Prediction.py'deki lambda'lı groupby
+    df = df.copy()
+    df["recency_cltv_weekly"] = (df["last_order_date"] - df["first_order_date"]).dt.days
+    cltv_df = df.groupby("master_id").agg({"recency_cltv_weekly": lambda x: x,
+                                           "first_order_date": lambda x: (analysis_date - x.min()).days,
+                                           "total_number_of_purchases": lambda y: y.astype(int),
+                                           "total_price": lambda z: z})
+    cltv_df.columns = ["recency_cltv_weekly", "T_weekly", "frequency", "monetary_cltv_avg"]
+    cltv_df["monetary_cltv_avg"] = cltv_df["monetary_cltv_avg"] / cltv_df["frequency"]
+    cltv_df = cltv_df[(cltv_df["frequency"] > 1)]
+    cltv_df["recency_cltv_weekly"] = cltv_df["recency_cltv_weekly"] / 7
+    cltv_df["T_weekly"] = cltv_df["T_weekly"] / 7
+    return cltv_df
+
+
+def _split_customers(df):
+    # her müşterinin sayı ve tutarlarını iki satıra böler (groupby'lı yol)
+    first, second = df.copy(), df.copy()
+    for col in ["total_number_of_purchases", "total_price"]:
+        first[col] = df[col] - df[col] // 2
+        second[col] = df[col] // 2
+    second["first_order_date"] = df["last_order_date"]
+    return pd.concat([first, second], ignore_index=True)
+
+
+def test_compute_rfm_matches_lambda_groupby(customers):
+    pd.testing.assert_frame_equal(compute_rfm(customers, analysis_date), _baseline_rfm(customers),
+                                  check_dtype=False)
+
+
+def test_compute_cltv_df_matches_lambda_groupby(customers):
+    pd.testing.assert_frame_equal(compute_cltv_df(customers, analysis_date), _baseline_cltv_df(customers),
+                                  check_dtype=False)
+
+
+def test_compute_rfm_sums_repeated_customers(customers):
+    rfm = compute_rfm(_split_customers(customers), analysis_date)
+    pd.testing.assert_frame_equal(rfm, _baseline_rfm(customers), check_dtype=False)
+
+
+def test_compute_cltv_df_sums_repeated_customers(customers):
+    cltv_df = compute_cltv_df(_split_customers(customers), analysis_date)
+    pd.testing.assert_frame_equal(cltv_df, _baseline_cltv_df(customers), check_dtype=False)
+
+
+def test_input_frame_is_not_modified(customers):
+    # tarihleri string, toplam sütunları olmayan ham tablo: sonuç aynı, tablo değişmemeli
+    raw = customers.drop(columns=["total_number_of_purchases", "total_price"])
+    for col in ["first_order_date", "last_order_date"]:
+        raw[col] = raw[col].dt.strftime("%Y-%m-%d")
+    before = raw.copy()
+    pd.testing.assert_frame_equal(compute_rfm(raw, analysis_date), _baseline_rfm(customers), check_dtype=False)
+    pd.testing.assert_frame_equal(compute_cltv_df(raw, analysis_date), _baseline_cltv_df(customers),
+                                  check_dtype=False)
+    pd.testing.assert_frame_equal(raw, before)
@@ -0,0 +1,37 @@
+import itertools
+
+import pandas as pd
+import pytest
+
+from rfm_segments import assign_segments, compile_seg_map, seg_map
+
+
+def _baseline_segments(recency_score, frequency_score):
+    # FLO_RFM.py: RF_SCORE string'i ve replace(seg_map, regex=True)
+    rf_score = recency_score.astype(str) + frequency_score.astype(str)
+    return rf_score.replace(seg_map, regex=True)
+
+
+def test_all_score_pairs_match_regex_replace():
+    pairs = list(itertools.product(range(1, 6), repeat=2))
+    recency_score = pd.Series([r for r, _ in pairs])
+    frequency_score = pd.Series([f for _, f in pairs])
+    segments = assign_segments(recency_score, frequency_score)
+    assert segments.astype(str).tolist() == _baseline_segments(recency_score, frequency_score).tolist()
+
+
+def test_qcut_scores_match_regex_replace():
+    rfm = pd.DataFrame({"recency": range(500, 0, -1), "frequency": [i % 17 + 1 for i in range(500)]})
+    recency_score = pd.qcut(rfm["recency"], 5, labels=[5, 4, 3, 2, 1])
+    frequency_score = pd.qcut(rfm["frequency"].rank(method="first"), 5, labels=[1, 2, 3, 4, 5])
+    segments = assign_segments(recency_score, frequency_score)
+    pd.testing.assert_index_equal(segments.index, rfm.index)
+    assert segments.astype(str).tolist() == _baseline_segments(recency_score, frequency_score).tolist()
+
+
+def test_incomplete_or_overlapping_map_is_rejected():
+    incomplete = {pattern: label for pattern, label in seg_map.items() if label != "champions"}
+    with pytest.raises(ValueError):
+        compile_seg_map(incomplete)
+    with pytest.raises(ValueError):
+        compile_seg_map({**seg_map, r"5[1-5]": "new_customers"})
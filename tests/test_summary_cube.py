@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from summary_cube import top_k
+
+
+@pytest.fixture(scope="module")
+def customers():
+    # ağır eşitlikler: frequency birkaç farklı değer, monetary'de tekrar eden tutarlar ve eksikler
+    rng = np.random.default_rng(5)
+    n = 5000
+    monetary = rng.choice([100.0, 250.0, 250.0, 999.0, -np.inf], n)
+    monetary[rng.random(n) < 0.05] = np.nan
+    return pd.DataFrame({"frequency": rng.integers(1, 6, n),
+                         "monetary": monetary,
+                         "clv": np.round(rng.gamma(1.0, 10.0, n))},
+                        index=pd.Index([f"id-{i:05d}" for i in rng.permutation(n)], name="master_id"))
+
+
+def _expected(customers, col, k):
+    return customers.sort_values(col, ascending=False, kind="stable").head(k)
+
+
+@pytest.mark.parametrize("col", ["frequency", "monetary", "clv"])
+@pytest.mark.parametrize("k", [1, 10, 777, 6000])
+def test_top_k_matches_stable_sort(customers, col, k):
+    pd.testing.assert_frame_equal(top_k(customers, col, k), _expected(customers, col, k))
+
+
+def test_top_k_all_missing():
+    frame = pd.DataFrame({"clv": [np.nan, 1.0, np.nan]}, index=pd.Index(["a", "b", "c"], name="master_id"))
+    assert top_k(frame, "clv", 3).index.tolist() == ["b", "a", "c"]
+    assert top_k(frame, "clv", 0).empty
+
+
+@pytest.mark.parametrize("col", ["frequency", "monetary", "clv"])
+def test_top_k_matches_polars_engine(customers, col):
+    pl = pytest.importorskip("polars")
+    import polars_engine as pe
+
+    lf = pl.from_pandas(customers.reset_index()).lazy()
+    expected = pe.top_k(lf, col, 500)
+    assert top_k(customers, col, 500).index.tolist() == expected.index.tolist()